@@ -5,7 +5,6 @@ Script de migration pour gérer le changement du modèle CustomUser
 
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
-from django.db import models
 
 User = get_user_model()
 
@@ -22,16 +21,13 @@ class Command(BaseCommand):
             try:
                 # Mettre à jour les statistiques
                 from dreams.models import Dream
-                from social.models import FriendRequest
+                from social.models import Friendship
                 
                 # Compter les rêves
                 dreams_count = Dream.objects.filter(user=user).count()
                 
-                # Compter les amis acceptés
-                friends_count = FriendRequest.objects.filter(
-                    models.Q(from_user=user) | models.Q(to_user=user),
-                    status='accepted'
-                ).distinct().count()
+                # Compter les amis acceptés (table d'adjacence)
+                friends_count = Friendship.objects.filter(user=user).count()
                 
                 # Mettre à jour l'utilisateur
                 user.dreams_count = dreams_count
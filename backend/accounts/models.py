@@ -87,11 +87,8 @@ class CustomUser(AbstractUser):
     def update_stats(self):
         """Met à jour les statistiques de l'utilisateur"""
         from dreams.models import Dream
-        from social.models import FriendRequest
+        from social.friends import get_friend_ids
         
         self.dreams_count = Dream.objects.filter(user=self).count()
-        self.friends_count = FriendRequest.objects.filter(
-            models.Q(from_user=self) | models.Q(to_user=self),
-            status='accepted'
-        ).count()
+        self.friends_count = len(get_friend_ids(self))
         self.save(update_fields=['dreams_count', 'friends_count'])
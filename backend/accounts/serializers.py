@@ -73,7 +73,7 @@ class ProfileSerializer(serializers.ModelSerializer):
             return {
                 'dream_id': obj.dream_favori.dream_id,
                 'transcription': obj.dream_favori.transcription[:100] + '...' if len(obj.dream_favori.transcription) > 100 else obj.dream_favori.transcription,
-                'img_b64': obj.dream_favori.img_b64,
+                'image_url': obj.dream_favori.get_image_url(self.context.get('request')),
                 'emotion': obj.dream_favori.emotion,
                 'date': obj.dream_favori.date
             }
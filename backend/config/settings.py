@@ -178,6 +178,74 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# 🖼️ Images des rêves (stockage adressé par contenu, voir dreams/storage.py)
+DREAM_BLOB_ROOT = Path(os.getenv('DREAM_BLOB_ROOT', MEDIA_ROOT / 'dreams'))
+
+# 🧵 Étapes du pipeline de génération exécutées en parallèle (voir dreams/pipeline.py)
+DREAM_PIPELINE_MAX_WORKERS = int(os.getenv('DREAM_PIPELINE_MAX_WORKERS', '4'))
+
+# ⚙️ File d'attente des générations asynchrones (voir dreams/jobs.py)
+DREAM_JOB_STALE_MINUTES = int(os.getenv('DREAM_JOB_STALE_MINUTES', 10))
+DREAM_JOB_MAX_ATTEMPTS = int(os.getenv('DREAM_JOB_MAX_ATTEMPTS', 3))
+# Tâches terminées ou en échec supprimées par le worker après ce délai
+DREAM_JOB_RETENTION_HOURS = int(os.getenv('DREAM_JOB_RETENTION_HOURS', 24))
+
+# 🌐 Appels HTTP sortants vers les APIs d'IA (voir dreams/http_client.py)
+AI_HTTP_CONNECT_TIMEOUT = float(os.getenv('AI_HTTP_CONNECT_TIMEOUT', 5))
+AI_HTTP_READ_TIMEOUT = float(os.getenv('AI_HTTP_READ_TIMEOUT', 30))
+AI_HTTP_POOL_MAXSIZE = int(os.getenv('AI_HTTP_POOL_MAXSIZE', 10))
+AI_HTTP_RETRIES = int(os.getenv('AI_HTTP_RETRIES', 2))
+
+# 🌸 Pollinations : échéance globale, timeout par tentative, backoff (s)
+# POLLINATIONS_HEDGE_AFTER : lance l'URL suivante en parallèle après N s sans réponse (vide = désactivé)
+POLLINATIONS_DEADLINE = float(os.getenv('POLLINATIONS_DEADLINE', 45))
+POLLINATIONS_ATTEMPT_TIMEOUT = float(os.getenv('POLLINATIONS_ATTEMPT_TIMEOUT', 30))
+POLLINATIONS_BACKOFF_BASE = float(os.getenv('POLLINATIONS_BACKOFF_BASE', 0.5))
+POLLINATIONS_HEDGE_AFTER = float(os.getenv('POLLINATIONS_HEDGE_AFTER')) if os.getenv('POLLINATIONS_HEDGE_AFTER') else None
+
+# 🎙️ Analyse des en-têtes audio (voir dreams/audio_probe.py)
+# AUDIO_PROBE_STRICT : refuse aussi les fichiers dont le contenu n'est reconnu comme aucun format audio
+AUDIO_PROBE_STRICT = os.getenv('AUDIO_PROBE_STRICT', 'False').lower() == 'true'
+
+# 🎚️ Prétraitement avant transcription (voir dreams/audio_preprocess.py) : WAV PCM → mono 16 kHz sans silences
+AUDIO_PREPROCESS = os.getenv('AUDIO_PREPROCESS', 'True').lower() == 'true'
+AUDIO_SILENCE_THRESHOLD_DB = float(os.getenv('AUDIO_SILENCE_THRESHOLD_DB', -45))
+
+# ✂️ Transcription des enregistrements longs par segments en parallèle (voir dreams/audio_segments.py)
+# TRANSCRIPTION_CHUNK_SECONDS=0 : toujours un seul appel
+TRANSCRIPTION_CHUNK_SECONDS = float(os.getenv('TRANSCRIPTION_CHUNK_SECONDS', 60))
+TRANSCRIPTION_CHUNK_OVERLAP_SECONDS = float(os.getenv('TRANSCRIPTION_CHUNK_OVERLAP_SECONDS', 1.0))
+TRANSCRIPTION_MAX_WORKERS = int(os.getenv('TRANSCRIPTION_MAX_WORKERS', 4))
+
+# 🤖 Cache disque des résultats d'IA (voir dreams/ai_cache.py)
+AI_CACHE_ROOT = Path(os.getenv('AI_CACHE_ROOT', BASE_DIR / 'cache' / 'ai'))
+TRANSCRIPTION_CACHE_TTL = int(os.getenv('TRANSCRIPTION_CACHE_TTL', 30 * 24 * 3600))
+TRANSCRIPTION_CACHE_MAX_MB = int(os.getenv('TRANSCRIPTION_CACHE_MAX_MB', 50))
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 7 * 24 * 3600))
+LLM_CACHE_MAX_MB = int(os.getenv('LLM_CACHE_MAX_MB', 20))
+LLM_CACHE_MEMORY_ITEMS = int(os.getenv('LLM_CACHE_MEMORY_ITEMS', 512))
+IMAGE_CACHE_TTL = int(os.getenv('IMAGE_CACHE_TTL', 24 * 3600))
+
+# 🗄️ Caches : 'feeds' = pages du feed public (voir dreams/feed_cache.py)
+# Partagé par défaut (fichiers sous BASE_DIR, volume commun aux workers gunicorn et au worker
+# de génération) : une invalidation doit atteindre tous les process. Pas de LocMemCache ici.
+# Plusieurs machines : FEED_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# et FEED_CACHE_LOCATION=redis://...
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'feeds': {
+        'BACKEND': os.getenv('FEED_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.getenv('FEED_CACHE_LOCATION', str(BASE_DIR / 'cache' / 'feeds')),
+        'TIMEOUT': int(os.getenv('FEED_CACHE_TIMEOUT', 60)),
+        'OPTIONS': {
+            # Index et rendus de FEED_CACHE_WINDOW rêves par tri et taille d'image
+            'MAX_ENTRIES': int(os.getenv('FEED_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+}
+
 LOGIN_URL = '/api/account/login/'
 
 # 📊 LOGGING pour la production
@@ -20,6 +20,10 @@ def health_check(request):
         checks["database"] = f"unhealthy: {str(e)}"
         status = "unhealthy"
     
+    # Compteurs hit/miss des caches d'IA (process courant)
+    from dreams.ai_cache import cache_stats
+    checks["ai_cache"] = cache_stats()
+    
     checks["timestamp"] = datetime.now().isoformat()
     
     return JsonResponse({
@@ -0,0 +1,364 @@
+# backend/dreams/ai_cache.py
+"""
+Cache des résultats d'IA (transcriptions, reformulations, émotions, images).
+
+Deux niveaux : un LRU en mémoire (par process, optionnel) devant le
+disque. Chaque entrée disque est un petit fichier JSON nommé par le
+SHA-256 de sa clé (contenu + modèle), rangé par espace de noms sous
+settings.AI_CACHE_ROOT.
+Le disque plutôt que la base : les étapes du pipeline tournent dans des
+threads (voir utils.run_stages) et le cache est partagé entre les workers
+d'une même machine sans contention sur la base.
+
+Éviction :
+- TTL depuis le dernier accès (mtime rafraîchi à chaque lecture)
+- taille maximale par espace de noms : les entrées les moins récemment
+  utilisées sont supprimées (`prune`, lancé périodiquement à l'écriture et
+  par la commande `prune_ai_cache`)
+
+Réglages par espace de noms : `<PREFIX>_TTL` (secondes),
+`<PREFIX>_MAX_MB` et `<PREFIX>_MEMORY_ITEMS` (taille du LRU mémoire, 0 =
+désactivé), lus à chaque accès (override_settings dans les tests).
+Une erreur disque ne fait jamais échouer l'appel : le cache est ignoré.
+
+Les compteurs hit/miss (par process) sont exposés par `cache_stats()`
+dans le health check.
+
+`SingleFlight` regroupe les appels concurrents identiques d'un process
+(double clic) : un seul appel distant, résultat partagé.
+"""
+import copy
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+
+# Une éviction par taille toutes les N écritures
+PRUNE_EVERY = 50
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_MB = 50
+
+
+def normalize_text(text: str) -> str:
+    """Texte normalisé pour les clés (Unicode NFC, casse, espaces)"""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text or '')).strip().casefold()
+
+
+def make_key(*parts) -> str:
+    """Clé de cache : SHA-256 des parties (séparateur non ambigu)"""
+    return hashlib.sha256('\0'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+class DiskCache:
+    """Cache clé → valeur JSON sur disque, avec TTL, taille maximale et LRU mémoire."""
+
+    def __init__(self, namespace: str, settings_prefix: str, default_ttl: int = DEFAULT_TTL,
+                 default_max_mb: int = DEFAULT_MAX_MB, default_memory_items: int = 0):
+        self.namespace = namespace
+        self.settings_prefix = settings_prefix
+        self.default_ttl = default_ttl
+        self.default_max_mb = default_max_mb
+        self.default_memory_items = default_memory_items
+        self._writes = 0
+        self._lock = threading.Lock()
+        # clé → (expiration, valeur), du moins au plus récemment utilisé
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    @property
+    def root(self) -> Path:
+        return Path(settings.AI_CACHE_ROOT) / self.namespace
+
+    @property
+    def ttl(self) -> int:
+        return int(getattr(settings, f'{self.settings_prefix}_TTL', self.default_ttl))
+
+    @property
+    def max_bytes(self) -> int:
+        return int(getattr(settings, f'{self.settings_prefix}_MAX_MB', self.default_max_mb)) * 1024 * 1024
+
+    @property
+    def memory_items(self) -> int:
+        return int(getattr(settings, f'{self.settings_prefix}_MEMORY_ITEMS', self.default_memory_items))
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / f'{key}.json'
+
+    def get(self, key: str) -> Optional[Any]:
+        """Valeur en cache, ou None (absente, expirée ou illisible)"""
+        value = self._memory_get(key)
+        if value is not None:
+            self._count('memory_hits')
+            return value
+
+        value = self._disk_get(key)
+        if value is None:
+            self._count('misses')
+            return None
+        self._count('disk_hits')
+        self._memory_set(key, value)
+        return value
+
+    def _disk_get(self, key: str) -> Optional[Any]:
+        path = self.path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink()
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)['value']
+            os.utime(path)  # Dernier accès : base du TTL et de l'éviction LRU
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Cache {self.namespace} illisible ({key[:12]}): {e}")
+            return None
+
+    def _memory_get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+        # Copie : l'appelant peut modifier le résultat sans altérer le cache
+        return copy.deepcopy(entry[1])
+
+    def _memory_set(self, key: str, value: Any) -> None:
+        max_items = self.memory_items
+        if max_items <= 0:
+            return
+        with self._lock:
+            self._memory[key] = (time.time() + self.ttl, copy.deepcopy(value))
+            self._memory.move_to_end(key)
+            while len(self._memory) > max_items:
+                self._memory.popitem(last=False)
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def set(self, key: str, value: Any) -> None:
+        self._memory_set(key, value)
+        target = self.path(key)
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Écriture atomique : fichier temporaire puis renommage
+            fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as tmp:
+                    json.dump({'value': value, 'stored_at': time.time()}, tmp, ensure_ascii=False)
+                os.replace(tmp_path, target)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            print(f"⚠️ Écriture du cache {self.namespace} impossible: {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % PRUNE_EVERY == 0
+        if should_prune:
+            self.prune()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            self.path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _entries(self) -> Iterator[Tuple[Path, os.stat_result]]:
+        if not self.root.is_dir():
+            return
+        for path in self.root.glob('*/*.json'):
+            try:
+                yield path, path.stat()
+            except FileNotFoundError:
+                continue
+
+    def prune(self) -> Tuple[int, int]:
+        """Supprime les entrées expirées puis les moins récentes au-delà de la taille max"""
+        now = time.time()
+        ttl, max_bytes = self.ttl, self.max_bytes
+        expired, evicted = 0, 0
+        live = []
+        for path, stat in self._entries():
+            if now - stat.st_mtime > ttl:
+                self._unlink(path)
+                expired += 1
+            else:
+                live.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in live)
+        for _, size, path in sorted(live, key=lambda entry: entry[0]):
+            if total <= max_bytes:
+                break
+            self._unlink(path)
+            total -= size
+            evicted += 1
+        return expired, evicted
+
+    def clear(self) -> int:
+        self.clear_memory()
+        count = 0
+        for path, _ in list(self._entries()):
+            self._unlink(path)
+            count += 1
+        return count
+
+    def clear_memory(self) -> None:
+        """Vide le niveau mémoire et remet les compteurs à zéro"""
+        with self._lock:
+            self._memory.clear()
+            self._counters = dict.fromkeys(self._counters, 0)
+
+    def counters(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters, memory_items=len(self._memory))
+        lookups = counters['memory_hits'] + counters['disk_hits'] + counters['misses']
+        counters['hit_rate'] = round((lookups - counters['misses']) / lookups, 3) if lookups else None
+        return counters
+
+    def stats(self) -> Dict[str, int]:
+        """Occupation disque (parcourt le répertoire : réservé aux commandes)"""
+        entries = list(self._entries())
+        return {'entries': len(entries), 'bytes': sum(stat.st_size for _, stat in entries)}
+
+    @staticmethod
+    def _unlink(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+_caches: Dict[str, DiskCache] = {}
+
+
+def register_cache(cache: DiskCache) -> DiskCache:
+    _caches[cache.namespace] = cache
+    return cache
+
+
+def get_cache(namespace: str) -> DiskCache:
+    try:
+        return _caches[namespace]
+    except KeyError:
+        raise ValueError(f"Cache inconnu. Utilisez: {', '.join(_caches)}")
+
+
+def cache_names():
+    return list(_caches)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Compteurs hit/miss de chaque cache (process courant)"""
+    return {name: cache.counters() for name, cache in _caches.items()}
+
+
+class SingleFlight:
+    """Un seul calcul en cours par clé : les appels concurrents attendent son résultat"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def do(self, key: str, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            # Même exception que l'appel en cours si celui-ci échoue
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+def cached_call(cache: DiskCache, key: str, compute: Callable[[], Any]) -> Any:
+    """Résultat en cache, sinon `compute()` (une valeur None n'est pas mise en cache)"""
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        if value is not None:
+            cache.set(key, value)
+    return value
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Transcriptions (Groq Whisper)
+# ──────────────────────────────────────────────────────────────────────────────
+transcription_cache = register_cache(DiskCache('transcriptions', 'TRANSCRIPTION_CACHE',
+                                               default_ttl=30 * 24 * 3600))
+
+
+def transcription_cache_key(audio_sha256: str, model: str, preprocessing: str = '') -> str:
+    """SHA-256 des octets audio (calculé en flux, voir audio.sha256_file) + nom du modèle
+    (+ version du prétraitement appliqué avant l'envoi, voir audio_preprocess.py)"""
+    if preprocessing:
+        return make_key('transcription', model, audio_sha256, preprocessing)
+    return make_key('transcription', model, audio_sha256)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Résultats LLM (reformulation, émotions)
+# ──────────────────────────────────────────────────────────────────────────────
+# Même transcription en preview puis à la sauvegarde : servie par le LRU mémoire
+llm_cache = register_cache(DiskCache('llm', 'LLM_CACHE', default_ttl=7 * 24 * 3600,
+                                     default_max_mb=20, default_memory_items=512))
+
+
+def prompt_version(*prompts: str) -> str:
+    """Version d'un prompt système : modifier le prompt invalide les résultats"""
+    return make_key(*prompts)[:12]
+
+
+def llm_cache_key(task: str, model: str, version: str, text: str, *extra) -> str:
+    return make_key(task, model, version, normalize_text(text), *extra)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Images générées (clé → blob du stockage adressé par contenu)
+# ──────────────────────────────────────────────────────────────────────────────
+# Les octets restent dans le BlobStore : l'entrée ne contient que la clé du blob
+image_cache = register_cache(DiskCache('images', 'IMAGE_CACHE', default_ttl=24 * 3600,
+                                       default_max_mb=5, default_memory_items=256))
+image_flights = SingleFlight()
+
+
+def image_cache_key(clean_prompt: str, size: int) -> str:
+    return make_key('image', size, normalize_text(clean_prompt))
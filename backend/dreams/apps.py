@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DreamsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dreams'
+
+    def ready(self):
+        # Invalidation du cache du feed public (suppressions, profils)
+        from . import signals  # noqa: F401
@@ -0,0 +1,115 @@
+# backend/dreams/audio.py
+"""
+Ingestion des fichiers audio sans copie complète en mémoire.
+
+`open_audio` donne accès à l'audio sous forme de fichier binaire
+positionnable, en réutilisant ce qui existe déjà :
+- TemporaryUploadedFile (upload > FILE_UPLOAD_MAX_MEMORY_SIZE) : le
+  fichier temporaire de Django sur le disque est rouvert tel quel
+- fichiers ouverts (InMemoryUploadedFile, FieldFile du worker, BytesIO) :
+  utilisés directement, position restaurée à la sortie
+- chemin disque : ouvert en lecture
+- octets : enveloppés dans un BytesIO
+- objets n'exposant que `chunks()` : recopiés morceau par morceau dans un
+  SpooledTemporaryFile (mémoire puis disque au-delà de 1 Mo)
+
+Ce qui a été ouvert par `open_audio` est toujours fermé/supprimé à la
+sortie du bloc, y compris sur exception.
+"""
+import hashlib
+import io
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+HASH_CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+
+class AudioSource(NamedTuple):
+    filename: str
+    file: BinaryIO
+    size: Optional[int]
+    # Chemin disque quand l'audio y est déjà (réutilisable par un outil externe)
+    path: Optional[str]
+
+
+def _basename(name, default: str = "audio.wav") -> str:
+    return Path(name).name if name else default
+
+
+def _size_of(fileobj) -> Optional[int]:
+    try:
+        position = fileobj.tell()
+        fileobj.seek(0, os.SEEK_END)
+        size = fileobj.tell()
+        fileobj.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+@contextmanager
+def open_audio(obj) -> Iterator[AudioSource]:
+    """Audio en fichier binaire positionné au début (voir docstring du module)."""
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        with io.BytesIO(obj) as buffer:
+            yield AudioSource("audio.wav", buffer, len(obj), None)
+        return
+
+    if isinstance(obj, (str, Path)):
+        if not os.path.exists(obj):
+            raise RuntimeError("Type de fichier audio non supporté.")
+        with open(obj, 'rb') as f:
+            yield AudioSource(_basename(str(obj)), f, os.path.getsize(obj), str(obj))
+        return
+
+    name = _basename(getattr(obj, 'name', None))
+
+    # Upload déjà écrit sur le disque par Django : pas de seconde copie
+    temporary_file_path = getattr(obj, 'temporary_file_path', None)
+    if callable(temporary_file_path):
+        path = temporary_file_path()
+        with open(path, 'rb') as f:
+            yield AudioSource(name, f, os.path.getsize(path), path)
+        return
+
+    if hasattr(obj, 'read') and hasattr(obj, 'seek'):
+        position = obj.tell() if hasattr(obj, 'tell') else 0
+        obj.seek(0)
+        try:
+            yield AudioSource(name, obj, getattr(obj, 'size', None) or _size_of(obj), None)
+        finally:
+            # Le fichier appartient à l'appelant : seulement remis à sa position
+            try:
+                obj.seek(position)
+            except (OSError, ValueError):
+                pass
+        return
+
+    if hasattr(obj, 'chunks') or hasattr(obj, 'read'):
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+            if hasattr(obj, 'chunks'):
+                for chunk in obj.chunks():
+                    spool.write(chunk)
+            else:
+                for chunk in iter(lambda: obj.read(HASH_CHUNK_SIZE), b''):
+                    spool.write(chunk)
+            size = spool.tell()
+            spool.seek(0)
+            yield AudioSource(name, spool, size, None)
+        return
+
+    raise RuntimeError("Type de fichier audio non supporté.")
+
+
+def sha256_file(fileobj: BinaryIO) -> str:
+    """SHA-256 lu par morceaux, puis retour au début du fichier"""
+    fileobj.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
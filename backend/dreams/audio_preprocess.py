@@ -0,0 +1,209 @@
+# backend/dreams/audio_preprocess.py
+"""
+Prétraitement de l'audio avant transcription : mono, 16 kHz, sans silences
+en début et fin d'enregistrement.
+
+Whisper travaille en interne sur du mono 16 kHz : un WAV stéréo 48 kHz
+envoyé tel quel pèse 6 fois plus lourd pour le même résultat. Les WAV PCM
+(entiers 8/16/24/32 bits, flottants 32/64 bits) sont donc convertis avec
+NumPy (calcul vectorisé) :
+- mixage des canaux en mono
+- filtre passe-bas (sinus cardinal fenêtré) puis décimation vers 16 kHz ;
+  interpolation linéaire quand le rapport des fréquences n'est pas entier
+- suppression des silences de début et de fin (énergie par fenêtre de
+  20 ms sous AUDIO_SILENCE_THRESHOLD_DB), avec une marge conservée
+
+Les formats compressés (MP3, M4A, OGG, WebM, FLAC) sont envoyés tels quels :
+leur décodage demanderait un codec externe. Sans NumPy, ou avec
+AUDIO_PREPROCESS=False, l'audio d'origine est utilisé.
+"""
+import io
+import struct
+import wave
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from django.conf import settings
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .audio import AudioSource
+
+TARGET_SAMPLE_RATE = 16000
+# Fait partie de la clé du cache de transcription : à changer si le traitement change
+PREPROCESS_VERSION = 'mono16k-trim-1'
+
+FILTER_TAPS = 63
+SILENCE_FRAME_MS = 20
+SILENCE_PADDING_MS = 200
+
+_PCM, _FLOAT, _EXTENSIBLE = 1, 3, 0xFFFE
+
+
+def preprocessing_enabled() -> bool:
+    return getattr(settings, 'AUDIO_PREPROCESS', True)
+
+
+def _read_wav(f) -> Optional[Tuple[int, int, int, int, bytes]]:
+    """(codec, canaux, fréquence, bits par échantillon, données) d'un WAV, None sinon"""
+    f.seek(0)
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+        return None
+
+    fmt = None
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            return None
+        chunk_id, chunk_size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+        if chunk_id == b'fmt ':
+            body = f.read(chunk_size + (chunk_size & 1))
+            codec, channels, sample_rate, _, _, bits = struct.unpack('<HHIIHH', body[:16])
+            if codec == _EXTENSIBLE and len(body) >= 26:
+                codec = struct.unpack('<H', body[24:26])[0]  # Sous-format (GUID)
+            fmt = (codec, channels, sample_rate, bits)
+        elif chunk_id == b'data':
+            if fmt is None:
+                return None
+            # Taille inconnue (enregistrement en flux) : jusqu'à la fin du fichier
+            data = f.read() if chunk_size in (0, 0xFFFFFFFF) else f.read(chunk_size)
+            return fmt + (data,)
+        else:
+            f.seek(chunk_size + (chunk_size & 1), io.SEEK_CUR)
+
+
+def _to_float(codec: int, channels: int, bits: int, data: bytes):
+    """Échantillons float32 dans [-1, 1], forme (n, canaux) ; None si format non géré"""
+    width = bits // 8
+    if not channels or not width or bits % 8:
+        return None
+    data = data[:len(data) - len(data) % (width * channels)]
+
+    if codec == _FLOAT and bits in (32, 64):
+        samples = np.frombuffer(data, dtype='<f4' if bits == 32 else '<f8').astype(np.float32)
+    elif codec != _PCM:
+        return None
+    elif bits == 8:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif bits == 16:
+        samples = np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768
+    elif bits == 24:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = raw[:, 0] | raw[:, 1] << 8 | raw[:, 2] << 16
+        values = np.where(values & 0x800000, values - 0x1000000, values)
+        samples = values.astype(np.float32) / 8388608
+    elif bits == 32:
+        samples = np.frombuffer(data, dtype='<i4').astype(np.float32) / 2147483648
+    else:
+        return None
+    return samples.reshape(-1, channels)
+
+
+def _lowpass(samples, cutoff: float):
+    """Filtre RIF passe-bas ; `cutoff` en fraction de la fréquence d'échantillonnage"""
+    n = np.arange(FILTER_TAPS) - (FILTER_TAPS - 1) / 2
+    kernel = np.sinc(2 * cutoff * n) * np.hamming(FILTER_TAPS)
+    kernel /= kernel.sum()
+    return np.convolve(samples, kernel.astype(np.float32), mode='same')
+
+
+def resample(samples, rate: int, target: int = TARGET_SAMPLE_RATE):
+    """Ramène `samples` (mono) à `target` Hz ; pas de suréchantillonnage"""
+    if rate <= target:
+        return samples, rate
+    # Coupure juste sous la nouvelle fréquence de Nyquist (anti-repliement)
+    filtered = _lowpass(samples, 0.45 * target / rate)
+    if rate % target == 0:
+        return filtered[::rate // target], target
+    positions = np.arange(int(len(samples) * target / rate)) * (rate / target)
+    return np.interp(positions, np.arange(len(filtered)), filtered).astype(np.float32), target
+
+
+def trim_silence(samples, rate: int):
+    """Retire les silences de début et de fin ; tout l'audio si rien ne dépasse le seuil"""
+    frame = max(int(rate * SILENCE_FRAME_MS / 1000), 1)
+    frames = len(samples) // frame
+    if not frames:
+        return samples
+    energy = np.sqrt(np.mean(samples[:frames * frame].reshape(frames, frame) ** 2, axis=1))
+    threshold = 10 ** (getattr(settings, 'AUDIO_SILENCE_THRESHOLD_DB', -45) / 20)
+    loud = np.flatnonzero(energy > threshold)
+    if not len(loud):
+        return samples
+    padding = int(rate * SILENCE_PADDING_MS / 1000)
+    start = max(loud[0] * frame - padding, 0)
+    end = min((loud[-1] + 1) * frame + padding, len(samples))
+    return samples[start:end]
+
+
+def encode_wav(samples, rate: int) -> bytes:
+    """WAV mono 16 bits"""
+    pcm = (np.clip(samples, -1, 1) * 32767).astype('<i2')
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def load_pcm(f) -> Optional[Tuple[object, int, int, int]]:
+    """(échantillons mono float32, fréquence, canaux d'origine, bits) d'un WAV PCM, None sinon"""
+    wav = _read_wav(f)
+    if wav is None:
+        return None
+    codec, channels, rate, bits, data = wav
+    samples = _to_float(codec, channels, bits, data)
+    if samples is None or not len(samples):
+        return None
+    mono = samples.mean(axis=1) if channels > 1 else samples[:, 0]
+    return mono, rate, channels, bits
+
+
+def preprocess_audio(audio: AudioSource) -> Optional[bytes]:
+    """WAV mono 16 kHz sans silences, ou None si l'original doit être envoyé tel quel"""
+    if np is None:
+        print("⚠️ NumPy non installé, audio envoyé sans prétraitement")
+        return None
+
+    try:
+        pcm = load_pcm(audio.file)
+        if pcm is None:
+            return None
+        mono, rate, channels, bits = pcm
+        original_duration = len(mono) / rate
+        mono, new_rate = resample(mono, rate)
+        trimmed = trim_silence(mono, new_rate)
+
+        if channels == 1 and new_rate == rate and bits == 16 and len(trimmed) == len(mono):
+            return None  # Déjà au bon format : pas de ré-encodage
+
+        converted = encode_wav(trimmed, new_rate)
+        if audio.size and len(converted) >= audio.size:
+            return None
+        print(f"🎚️ Audio prétraité: {channels} canaux {rate} Hz → mono {new_rate} Hz, "
+              f"{original_duration:.1f}s → {len(trimmed) / new_rate:.1f}s, "
+              f"{audio.size} → {len(converted)} octets")
+        return converted
+    except Exception as e:
+        print(f"❌ Erreur prétraitement audio: {e}")
+        return None
+    finally:
+        audio.file.seek(0)
+
+
+@contextmanager
+def prepared_audio(audio: AudioSource) -> Iterator[AudioSource]:
+    """Audio à envoyer au modèle : version prétraitée si possible, original sinon"""
+    converted = preprocess_audio(audio) if preprocessing_enabled() else None
+    if converted is None:
+        yield audio
+        return
+    with io.BytesIO(converted) as buffer:
+        yield AudioSource(f"{Path(audio.filename).stem}.wav", buffer, len(converted), None)
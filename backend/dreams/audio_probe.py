@@ -0,0 +1,506 @@
+# backend/dreams/audio_probe.py
+"""
+Analyse des en-têtes audio en pur Python : format, durée, fréquence
+d'échantillonnage, canaux — sans décoder ni lire tout le fichier.
+
+Seuls les premiers Ko (et pour certains conteneurs les derniers) sont lus :
+- WAV  : blocs RIFF `fmt ` et `data` (durée = taille des données / débit)
+- FLAC : bloc STREAMINFO (nombre total d'échantillons)
+- OGG  : en-tête Vorbis/Opus de la première page, granule de la dernière
+- MP3  : tag ID3v2 sauté, première trame (+ en-tête Xing/Info/VBRI pour le
+         VBR, sinon estimation à débit constant)
+- M4A  : boîtes `ftyp` / `moov` (mvhd, stsd) parcourues par en-têtes, même
+         quand `moov` est en fin de fichier
+- WebM : éléments EBML Info/Tracks ; sans Duration (MediaRecorder des
+         navigateurs), durée déduite du dernier cluster en fin de fichier
+
+`probe_audio` retourne None si le contenu n'est pas reconnu et lève
+AudioProbeError si l'en-tête est reconnu mais tronqué ou incohérent.
+"""
+import os
+import struct
+from typing import BinaryIO, Callable, Dict, Iterator, NamedTuple, Optional, Tuple
+
+HEAD_BYTES = 64 * 1024
+TAIL_BYTES = 64 * 1024
+# Au-delà, la boîte moov d'un M4A n'est pas lue (fichiers audio de quelques minutes : quelques Ko)
+MAX_MOOV_BYTES = 4 * 1024 * 1024
+
+
+class AudioInfo(NamedTuple):
+    format: str
+    codec: Optional[str]
+    # Secondes, None si le conteneur ne permet pas de la connaître
+    duration: Optional[float]
+    sample_rate: Optional[int]
+    channels: Optional[int]
+
+
+class AudioProbeError(ValueError):
+    """En-tête audio reconnu mais tronqué ou incohérent"""
+
+
+def _read_at(f: BinaryIO, offset: int, length: int) -> bytes:
+    f.seek(offset)
+    return f.read(length)
+
+
+def _file_size(f: BinaryIO) -> int:
+    f.seek(0, os.SEEK_END)
+    return f.tell()
+
+
+def probe_audio(f: BinaryIO) -> Optional[AudioInfo]:
+    """Analyse les en-têtes du fichier `f` (binaire, positionnable) ; position restaurée."""
+    position = f.tell()
+    try:
+        size = _file_size(f)
+        head = _read_at(f, 0, HEAD_BYTES)
+        if not head:
+            raise AudioProbeError("Fichier audio vide")
+        for detect, probe in _PROBES:
+            if detect(head):
+                return probe(f, size, head)
+        return None
+    except (struct.error, IndexError) as e:
+        raise AudioProbeError(f"En-tête audio tronqué: {e}")
+    finally:
+        f.seek(position)
+
+
+def _round(duration: Optional[float]) -> Optional[float]:
+    return round(duration, 3) if duration is not None else None
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# WAV
+# ──────────────────────────────────────────────────────────────────────────────
+def _probe_wav(f: BinaryIO, size: int, head: bytes) -> AudioInfo:
+    if head[8:12] != b'WAVE':
+        raise AudioProbeError("Fichier RIFF qui n'est pas un WAV")
+
+    fmt, data_size, pos = None, None, 12
+    while pos + 8 <= size:
+        header = _read_at(f, pos, 8)
+        if len(header) < 8:
+            break
+        chunk_id, chunk_size = header[:4], struct.unpack('<I', header[4:])[0]
+        if chunk_id == b'fmt ':
+            fmt = struct.unpack('<HHIIHH', _read_at(f, pos + 8, 16))
+        elif chunk_id == b'data':
+            available = size - pos - 8
+            # Taille inconnue (enregistrement en flux) ou fichier tronqué : ce qui est présent
+            data_size = available if chunk_size in (0, 0xFFFFFFFF) or chunk_size > available else chunk_size
+            break
+        pos += 8 + chunk_size + (chunk_size & 1)
+
+    if fmt is None:
+        raise AudioProbeError("WAV sans bloc fmt")
+    codec, channels, sample_rate, byte_rate, _, bits = fmt
+    if not channels or not sample_rate or not byte_rate:
+        raise AudioProbeError("En-tête WAV incohérent")
+
+    duration = data_size / byte_rate if data_size is not None else None
+    codec_name = {1: 'pcm', 3: 'pcm_float', 0xFFFE: 'pcm'}.get(codec, f'wav_{codec}')
+    return AudioInfo('wav', codec_name, _round(duration), sample_rate, channels)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# FLAC
+# ──────────────────────────────────────────────────────────────────────────────
+def _parse_streaminfo(block: bytes) -> Tuple[int, int, int]:
+    """(fréquence, canaux, nombre total d'échantillons) d'un bloc STREAMINFO"""
+    if len(block) < 18:
+        raise AudioProbeError("Bloc STREAMINFO tronqué")
+    packed = int.from_bytes(block[10:18], 'big')
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate:
+        raise AudioProbeError("Fréquence FLAC invalide")
+    return sample_rate, channels, total_samples
+
+
+def _probe_flac(f: BinaryIO, size: int, head: bytes) -> AudioInfo:
+    start = _id3v2_size(head)
+    if head[start:start + 4] != b'fLaC':
+        raise AudioProbeError("Signature FLAC absente")
+    if head[start + 4] & 0x7F != 0:
+        raise AudioProbeError("Le premier bloc FLAC doit être STREAMINFO")
+
+    sample_rate, channels, total_samples = _parse_streaminfo(head[start + 8:start + 8 + 34])
+    duration = total_samples / sample_rate if total_samples else None
+    return AudioInfo('flac', 'flac', _round(duration), sample_rate, channels)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# OGG (Vorbis, Opus)
+# ──────────────────────────────────────────────────────────────────────────────
+def _last_granule(f: BinaryIO, size: int) -> Optional[int]:
+    tail = _read_at(f, max(size - TAIL_BYTES, 0), TAIL_BYTES)
+    index = tail.rfind(b'OggS')
+    while index >= 0:
+        if len(tail) >= index + 14 and tail[index + 4] == 0:
+            granule = struct.unpack('<q', tail[index + 6:index + 14])[0]
+            if granule >= 0:
+                return granule
+        index = tail.rfind(b'OggS', 0, index)
+    return None
+
+
+def _probe_ogg(f: BinaryIO, size: int, head: bytes) -> AudioInfo:
+    segments = head[26]
+    packet = head[27 + segments:27 + segments + 64]
+
+    if packet.startswith(b'\x01vorbis'):
+        channels = packet[11]
+        sample_rate = struct.unpack('<I', packet[12:16])[0]
+        codec, granule_rate, pre_skip = 'vorbis', sample_rate, 0
+    elif packet.startswith(b'OpusHead'):
+        channels = packet[9]
+        pre_skip = struct.unpack('<H', packet[10:12])[0]
+        sample_rate = struct.unpack('<I', packet[12:16])[0] or 48000
+        # Les granules Opus sont toujours à 48 kHz
+        codec, granule_rate = 'opus', 48000
+    else:
+        return AudioInfo('ogg', None, None, None, None)
+
+    if not channels or not granule_rate:
+        raise AudioProbeError("En-tête OGG incohérent")
+
+    granule = _last_granule(f, size)
+    duration = max(granule - pre_skip, 0) / granule_rate if granule is not None else None
+    return AudioInfo('ogg', codec, _round(duration), sample_rate, channels)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# MP3
+# ──────────────────────────────────────────────────────────────────────────────
+_MP3_BITRATES = {
+    (1, 1): (32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+
+
+class _Mp3Frame(NamedTuple):
+    version: float
+    layer: int
+    bitrate: int  # kbit/s
+    sample_rate: int
+    channels: int
+    samples: int
+    length: int
+
+
+def _mp3_frame(header: bytes) -> Optional[_Mp3Frame]:
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = {0: 2.5, 2: 2, 3: 1}.get((header[1] >> 3) & 0x3)
+    layer = {1: 3, 2: 2, 3: 1}.get((header[1] >> 1) & 0x3)
+    bitrate_index, rate_index = header[2] >> 4, (header[2] >> 2) & 0x3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = _MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index - 1]
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 0x1
+    channels = 1 if header[3] >> 6 == 3 else 2
+    if layer == 1:
+        samples, length = 384, (12 * bitrate * 1000 // sample_rate + padding) * 4
+    else:
+        samples = 1152 if layer == 2 or version == 1 else 576
+        length = samples // 8 * bitrate * 1000 // sample_rate + padding
+    return _Mp3Frame(version, layer, bitrate, sample_rate, channels, samples, length)
+
+
+def _id3v2_size(head: bytes) -> int:
+    if head[:3] != b'ID3' or len(head) < 10:
+        return 0
+    size = (head[6] & 0x7F) << 21 | (head[7] & 0x7F) << 14 | (head[8] & 0x7F) << 7 | (head[9] & 0x7F)
+    footer = 10 if head[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _find_mp3_frame(f: BinaryIO, size: int, head: bytes) -> Optional[Tuple[int, _Mp3Frame]]:
+    tagged = head[:3] == b'ID3'
+    start = _id3v2_size(head)
+    window = _read_at(f, start, 4096) if start else head[:4096]
+    # Avec un tag ID3 on tolère un remplissage avant la première trame ; sinon trame en tête de fichier
+    for offset in range(len(window) - 3 if tagged else 1):
+        frame = _mp3_frame(window[offset:offset + 4])
+        if frame is None:
+            continue
+        # Confirmation par la trame suivante (évite les faux positifs)
+        following = _read_at(f, start + offset + frame.length, 4)
+        if _mp3_frame(following) is not None or start + offset + frame.length >= size:
+            return start + offset, frame
+    return None
+
+
+def _looks_like_mp3(head: bytes) -> bool:
+    return head[:3] == b'ID3' and head[_id3v2_size(head):][:4] != b'fLaC' or _mp3_frame(head[:4]) is not None
+
+
+def _probe_mp3(f: BinaryIO, size: int, head: bytes) -> Optional[AudioInfo]:
+    found = _find_mp3_frame(f, size, head)
+    if found is None:
+        if head[:3] == b'ID3':
+            raise AudioProbeError("Tag ID3 sans trame MP3 valide")
+        return None
+    offset, frame = found
+
+    # En-tête VBR : Xing/Info après les informations latérales, VBRI à 32 octets
+    side_info = (32 if frame.channels == 2 else 17) if frame.version == 1 else (17 if frame.channels == 2 else 9)
+    data = _read_at(f, offset, 4 + 32 + 64)
+    frames = None
+    xing = data[4 + side_info:4 + side_info + 16]
+    if xing[:4] in (b'Xing', b'Info') and struct.unpack('>I', xing[4:8])[0] & 0x1:
+        frames = struct.unpack('>I', xing[8:12])[0]
+    elif data[36:40] == b'VBRI':
+        frames = struct.unpack('>I', data[50:54])[0]
+
+    if frames:
+        duration = frames * frame.samples / frame.sample_rate
+    else:
+        # Débit constant : taille des données audio / débit
+        duration = (size - offset) * 8 / (frame.bitrate * 1000)
+    return AudioInfo('mp3', f'mp{frame.layer}', _round(duration), frame.sample_rate, frame.channels)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# M4A / MP4
+# ──────────────────────────────────────────────────────────────────────────────
+def _box_header(data: bytes, pos: int, end: int) -> Optional[Tuple[bytes, int, int]]:
+    """(type, début du contenu, fin de la boîte)"""
+    if pos + 8 > end:
+        return None
+    box_size, box_type = struct.unpack('>I4s', data[pos:pos + 8])
+    header = 8
+    if box_size == 1:
+        box_size = struct.unpack('>Q', data[pos + 8:pos + 16])[0]
+        header = 16
+    elif box_size == 0:
+        box_size = end - pos
+    if box_size < header:
+        raise AudioProbeError("Boîte MP4 de taille invalide")
+    return box_type, pos + header, pos + box_size
+
+
+def _iter_boxes(data: bytes, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    pos = start
+    while True:
+        box = _box_header(data, pos, end)
+        if box is None:
+            return
+        yield box
+        pos = box[2]
+
+
+def _find_box(data: bytes, start: int, end: int, path: Tuple[bytes, ...]) -> Optional[Tuple[int, int]]:
+    for box_type, body, box_end in _iter_boxes(data, start, end):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return body, min(box_end, end)
+            return _find_box(data, body, min(box_end, end), path[1:])
+    return None
+
+
+def _read_moov(f: BinaryIO, size: int) -> Optional[bytes]:
+    """Contenu de la boîte moov, trouvée en sautant les boîtes de premier niveau"""
+    pos = 0
+    while pos + 8 <= size:
+        header = _read_at(f, pos, 16)
+        box = _box_header(header, 0, size - pos)
+        if box is None:
+            return None
+        box_type, body, box_end = box
+        if box_type == b'moov':
+            if box_end - body > MAX_MOOV_BYTES:
+                raise AudioProbeError("Boîte moov trop volumineuse")
+            return _read_at(f, pos + body, box_end - body)
+        pos += box_end
+    return None
+
+
+def _probe_mp4(f: BinaryIO, size: int, head: bytes) -> AudioInfo:
+    moov = _read_moov(f, size)
+    if moov is None:
+        raise AudioProbeError("Fichier MP4 sans boîte moov")
+
+    duration = None
+    mvhd = _find_box(moov, 0, len(moov), (b'mvhd',))
+    if mvhd:
+        body = moov[mvhd[0]:mvhd[1]]
+        if body[0] == 1:
+            timescale, length = struct.unpack('>IQ', body[20:32])
+        else:
+            timescale, length = struct.unpack('>II', body[12:20])
+        if not timescale:
+            raise AudioProbeError("Échelle de temps MP4 nulle")
+        duration = length / timescale
+
+    # Première piste audio : format, canaux et fréquence de l'entrée stsd
+    for box_type, body, box_end in _iter_boxes(moov, 0, len(moov)):
+        if box_type != b'trak':
+            continue
+        hdlr = _find_box(moov, body, box_end, (b'mdia', b'hdlr'))
+        if not hdlr or moov[hdlr[0] + 8:hdlr[0] + 12] != b'soun':
+            continue
+        stsd = _find_box(moov, body, box_end, (b'mdia', b'minf', b'stbl', b'stsd'))
+        if not stsd:
+            break
+        entry = moov[stsd[0] + 8:stsd[1]]
+        codec = entry[4:8].decode('latin-1').strip()
+        channels = struct.unpack('>H', entry[24:26])[0]
+        sample_rate = struct.unpack('>I', entry[32:36])[0] >> 16
+        return AudioInfo('mp4', codec, _round(duration), sample_rate or None, channels or None)
+
+    return AudioInfo('mp4', None, _round(duration), None, None)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# WebM / Matroska (EBML)
+# ──────────────────────────────────────────────────────────────────────────────
+_EBML_HEADER = 0x1A45DFA3
+_SEGMENT, _INFO, _TRACKS, _CLUSTER = 0x18538067, 0x1549A966, 0x1654AE6B, 0x1F43B675
+_TIMESTAMP_SCALE, _DURATION = 0x2AD7B1, 0x4489
+_TRACK_ENTRY, _TRACK_TYPE, _CODEC_ID, _AUDIO = 0xAE, 0x83, 0x86, 0xE1
+_SAMPLING_FREQUENCY, _CHANNELS = 0xB5, 0x9F
+_CLUSTER_TIMESTAMP, _SIMPLE_BLOCK, _BLOCK_GROUP, _BLOCK = 0xE7, 0xA3, 0xA0, 0xA1
+_MASTER_ELEMENTS = {_SEGMENT, _INFO, _TRACKS, _TRACK_ENTRY, _AUDIO}
+
+
+def _vint(data: bytes, pos: int, keep_marker: bool = False) -> Tuple[Optional[int], int]:
+    """(valeur, longueur) d'un entier EBML ; valeur None pour une taille inconnue"""
+    first = data[pos]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise AudioProbeError("Entier EBML invalide")
+    value = first if keep_marker else first & (0xFF >> length)
+    for byte in data[pos + 1:pos + length]:
+        value = value << 8 | byte
+    if len(data) < pos + length:
+        raise IndexError("vint tronqué")
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return None, length
+    return value, length
+
+
+def _iter_ebml(data: bytes, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+    """(id, début du contenu, fin) ; une taille inconnue s'étend jusqu'à `end`"""
+    pos = start
+    while pos < end:
+        try:
+            element_id, id_length = _vint(data, pos, keep_marker=True)
+            size, size_length = _vint(data, pos + id_length)
+        except IndexError:
+            return
+        body = pos + id_length + size_length
+        element_end = end if size is None else min(body + size, end)
+        yield element_id, body, element_end
+        if size is None and element_id not in _MASTER_ELEMENTS:
+            return
+        pos = body if size is None else body + size
+
+
+def _ebml_uint(data: bytes) -> int:
+    return int.from_bytes(data, 'big')
+
+
+def _ebml_float(data: bytes) -> float:
+    return struct.unpack('>f' if len(data) == 4 else '>d', data)[0]
+
+
+def _webm_tail_duration(f: BinaryIO, size: int, timescale: int) -> Optional[float]:
+    """Durée d'après le dernier cluster : timestamp + plus grand décalage de bloc"""
+    tail = _read_at(f, max(size - TAIL_BYTES, 0), TAIL_BYTES)
+    marker = _CLUSTER.to_bytes(4, 'big')
+    index = tail.rfind(marker)
+    while index >= 0:
+        cluster = next(_iter_ebml(tail, index, len(tail)), None)
+        if cluster and cluster[0] == _CLUSTER:
+            cluster_time, last_block = None, 0
+            for element_id, body, element_end in _iter_ebml(tail, cluster[1], cluster[2]):
+                if element_id == _CLUSTER_TIMESTAMP:
+                    cluster_time = _ebml_uint(tail[body:element_end])
+                block = None
+                if element_id == _SIMPLE_BLOCK:
+                    block = body
+                elif element_id == _BLOCK_GROUP:
+                    inner = next((b for i, b, _ in _iter_ebml(tail, body, element_end) if i == _BLOCK), None)
+                    block = inner
+                if block is not None and block + 4 <= len(tail):
+                    _, track_length = _vint(tail, block)
+                    offset = struct.unpack('>h', tail[block + track_length:block + track_length + 2])[0]
+                    last_block = max(last_block, offset)
+            if cluster_time is not None:
+                return (cluster_time + last_block) * timescale / 1e9
+        index = tail.rfind(marker, 0, index)
+    return None
+
+
+def _probe_webm(f: BinaryIO, size: int, head: bytes) -> AudioInfo:
+    elements = _iter_ebml(head, 0, len(head))
+    ebml_header = next(elements, None)
+    if not ebml_header or ebml_header[0] != _EBML_HEADER:
+        raise AudioProbeError("En-tête EBML invalide")
+    segment = next(elements, None)
+    if not segment or segment[0] != _SEGMENT:
+        raise AudioProbeError("Segment Matroska absent")
+
+    timescale, duration = 1000000, None
+    codec = sample_rate = channels = None
+    for element_id, body, end in _iter_ebml(head, segment[1], segment[2]):
+        if element_id == _CLUSTER:
+            break  # Données audio : les métadonnées sont avant
+        if element_id == _INFO:
+            for child_id, child_body, child_end in _iter_ebml(head, body, end):
+                if child_id == _TIMESTAMP_SCALE:
+                    timescale = _ebml_uint(head[child_body:child_end]) or timescale
+                elif child_id == _DURATION:
+                    duration = _ebml_float(head[child_body:child_end])
+        elif element_id == _TRACKS:
+            for entry_id, entry_body, entry_end in _iter_ebml(head, body, end):
+                if entry_id != _TRACK_ENTRY:
+                    continue
+                track = {i: (b, e) for i, b, e in _iter_ebml(head, entry_body, entry_end)}
+                if _TRACK_TYPE in track and _ebml_uint(head[slice(*track[_TRACK_TYPE])]) != 2:
+                    continue  # Pas une piste audio
+                if _CODEC_ID in track:
+                    codec = head[slice(*track[_CODEC_ID])].decode('ascii', 'replace').rstrip('\x00')
+                if _AUDIO in track:
+                    for audio_id, audio_body, audio_end in _iter_ebml(head, *track[_AUDIO]):
+                        if audio_id == _SAMPLING_FREQUENCY:
+                            sample_rate = int(_ebml_float(head[audio_body:audio_end]))
+                        elif audio_id == _CHANNELS:
+                            channels = _ebml_uint(head[audio_body:audio_end])
+                break
+
+    if duration is not None:
+        duration = duration * timescale / 1e9
+    else:
+        duration = _webm_tail_duration(f, size, timescale)
+    return AudioInfo('webm', codec, _round(duration), sample_rate or (48000 if codec == 'A_OPUS' else None),
+                     channels)
+
+
+# Ordre de détection (signature → analyse)
+_PROBES: Tuple[Tuple[Callable[[bytes], bool], Callable], ...] = (
+    (lambda head: head[:4] == b'RIFF', _probe_wav),
+    (lambda head: head[_id3v2_size(head):][:4] == b'fLaC', _probe_flac),
+    (lambda head: head[:4] == b'OggS', _probe_ogg),
+    (lambda head: head[4:8] == b'ftyp', _probe_mp4),
+    (lambda head: head[:4] == b'\x1a\x45\xdf\xa3', _probe_webm),
+    (_looks_like_mp3, _probe_mp3),
+)
+
+PROBED_FORMATS: Dict[str, str] = {
+    'wav': '.wav', 'flac': '.flac', 'ogg': '.ogg', 'mp4': '.m4a', 'webm': '.webm', 'mp3': '.mp3',
+}
@@ -0,0 +1,106 @@
+# backend/dreams/audio_segments.py
+"""
+Découpage des enregistrements longs pour une transcription en parallèle.
+
+Un rêve de 5 minutes envoyé en une seule requête Whisper attend un seul
+long appel. Les WAV PCM (après prétraitement, voir audio_preprocess.py)
+sont découpés en segments d'environ TRANSCRIPTION_CHUNK_SECONDS :
+- chaque coupure est placée sur la fenêtre de 20 ms la plus silencieuse
+  des dernières secondes du segment (pas de mot coupé en deux)
+- chaque segment reprend TRANSCRIPTION_CHUNK_OVERLAP_SECONDS du précédent,
+  au cas où la coupure tomberait quand même dans la parole
+- les textes sont recollés en retirant les mots répétés à la jonction
+
+Les formats compressés ne sont pas découpés : transcription en un appel.
+"""
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from .audio import AudioSource
+from .audio_preprocess import encode_wav, load_pcm, np
+
+FRAME_MS = 20
+# La coupure est cherchée dans les N dernières secondes de chaque segment
+CUT_SEARCH_SECONDS = 10
+# Pas de segment final plus court que ce ratio de la durée cible : rattaché au précédent
+MIN_LAST_SEGMENT_RATIO = 0.25
+MAX_OVERLAP_WORDS = 12
+
+_WORD = re.compile(r"\w+")
+
+
+def chunk_seconds() -> float:
+    """Durée cible d'un segment (0 = découpage désactivé)"""
+    return float(getattr(settings, 'TRANSCRIPTION_CHUNK_SECONDS', 60))
+
+
+def split_points(samples, rate: int, target_seconds: float, overlap_seconds: float = 1.0) -> List[Tuple[int, int]]:
+    """Bornes (début, fin) en échantillons des segments ; un seul si l'audio est court"""
+    total = len(samples)
+    chunk = int(target_seconds * rate)
+    if not chunk or total <= chunk * (1 + MIN_LAST_SEGMENT_RATIO):
+        return [(0, total)]
+
+    frame = max(int(rate * FRAME_MS / 1000), 1)
+    frames = total // frame
+    energy = np.sqrt(np.mean(samples[:frames * frame].reshape(frames, frame) ** 2, axis=1))
+    search = max(min(int(CUT_SEARCH_SECONDS * rate), chunk // 2) // frame, 1)
+
+    cuts, start = [], 0
+    while total - start > chunk * (1 + MIN_LAST_SEGMENT_RATIO):
+        end_frame = (start + chunk) // frame
+        quietest = end_frame - search + int(np.argmin(energy[end_frame - search:end_frame]))
+        start = quietest * frame + frame // 2
+        cuts.append(start)
+
+    bounds = [0] + cuts + [total]
+    overlap = int(overlap_seconds * rate)
+    return [(max(begin - overlap, 0), end) for begin, end in zip(bounds, bounds[1:])]
+
+
+def split_audio(audio: AudioSource) -> Optional[List[bytes]]:
+    """Segments WAV d'un enregistrement PCM long, None s'il doit partir en un seul appel"""
+    target = chunk_seconds()
+    if np is None or target <= 0:
+        return None
+    try:
+        pcm = load_pcm(audio.file)
+        if pcm is None:
+            return None
+        samples, rate = pcm[0], pcm[1]
+        overlap = float(getattr(settings, 'TRANSCRIPTION_CHUNK_OVERLAP_SECONDS', 1.0))
+        bounds = split_points(samples, rate, target, overlap)
+        if len(bounds) < 2:
+            return None
+        return [encode_wav(samples[begin:end], rate) for begin, end in bounds]
+    except Exception as e:
+        print(f"❌ Erreur découpage audio: {e}")
+        return None
+    finally:
+        audio.file.seek(0)
+
+
+def _normalize(word: str) -> str:
+    return ''.join(_WORD.findall(word.lower()))
+
+
+def _overlap_length(previous: Sequence[str], words: Sequence[str]) -> int:
+    """Nombre de mots en tête de `words` qui répètent la fin de `previous`"""
+    for count in range(min(MAX_OVERLAP_WORDS, len(previous), len(words)), 0, -1):
+        tail = [_normalize(w) for w in previous[-count:]]
+        if tail == [_normalize(w) for w in words[:count]]:
+            # Un seul mot court en commun (« et », « le ») n'est pas une répétition fiable
+            if count > 1 or len(tail[0]) > 3:
+                return count
+    return 0
+
+
+def stitch_transcripts(texts: Sequence[str]) -> str:
+    """Recolle les textes des segments en retirant les mots répétés aux jonctions"""
+    words: List[str] = []
+    for text in texts:
+        segment = text.split()
+        words.extend(segment[_overlap_length(words, segment):])
+    return ' '.join(words)
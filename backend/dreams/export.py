@@ -0,0 +1,205 @@
+# backend/dreams/export.py
+"""
+Export du journal complet d'un utilisateur (ou d'une période).
+
+Tous les formats sont produits en flux (générateurs d'octets) à partir
+d'un `.iterator()` sur les rêves : la mémoire reste constante quelle que
+soit la taille du journal.
+
+- zip  : par rêve, une page HTML, ses métadonnées JSON et le fichier image
+         (lu une seule fois depuis le stockage, ou décodé du base64 legacy)
+- json : tableau JSON des métadonnées
+- csv  : une ligne par rêve
+- md   : journal Markdown
+"""
+import csv
+import json
+import time
+import zipfile
+from datetime import date
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from django.utils.dateparse import parse_date
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Dream
+from .renderers import get_renderer
+from .storage import MIME_TO_EXT, decode_data_uri, get_blob_store
+from .streaming import iter_json_array
+
+EXPORT_CHUNK_SIZE = 100
+
+EXPORT_FIELDS = [
+    'dream_id', 'date', 'created_at', 'privacy', 'transcription', 'reformed_prompt',
+    'emotion', 'emotion_confidence', 'emotion_emoji', 'emotion_color', 'image_url',
+]
+
+
+class InvalidExportRequest(ValueError):
+    """Format ou période d'export invalide"""
+
+
+def parse_export_range(start: Optional[str], end: Optional[str]) -> Tuple[Optional[date], Optional[date]]:
+    """Période d'export (dates ISO AAAA-MM-JJ, bornes incluses et optionnelles)"""
+    bounds = []
+    for label, value in (('start', start), ('end', end)):
+        if not value:
+            bounds.append(None)
+            continue
+        try:
+            parsed = parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise InvalidExportRequest(f"Date '{label}' invalide (format attendu : AAAA-MM-JJ)")
+        bounds.append(parsed)
+
+    if bounds[0] and bounds[1] and bounds[0] > bounds[1]:
+        raise InvalidExportRequest("La date de début doit précéder la date de fin")
+    return bounds[0], bounds[1]
+
+
+def export_queryset(user, start: Optional[date] = None, end: Optional[date] = None):
+    """Rêves à exporter, du plus ancien au plus récent"""
+    dreams = Dream.objects.filter(user=user)
+    if start:
+        dreams = dreams.filter(date__gte=start)
+    if end:
+        dreams = dreams.filter(date__lte=end)
+    return dreams.order_by('date', 'dream_id')
+
+
+def dream_metadata(dream: Dream) -> dict:
+    """Métadonnées exportées d'un rêve"""
+    data = {field: getattr(dream, field) for field in EXPORT_FIELDS if field != 'image_url'}
+    # Pas de data URI legacy dans les métadonnées, seulement une URL
+    data['image_url'] = dream.image_url if dream.image_key else None
+    return data
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, cls=JSONEncoder, ensure_ascii=False)
+
+
+def _dream_image(dream: Dream, store) -> Optional[Tuple[str, bytes]]:
+    """(extension, octets) de l'image du rêve, ou None"""
+    if dream.image_key and store.exists(dream.image_key):
+        return dream.image_key.rsplit('.', 1)[-1], store.read(dream.image_key)
+    decoded = decode_data_uri(dream.img_b64)
+    if decoded is not None:
+        mime, data = decoded
+        return MIME_TO_EXT[mime], data
+    return None
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Formats
+# ──────────────────────────────────────────────────────────────────────────────
+class _ZipStream:
+    """Flux d'écriture non seekable : zipfile y écrit, on vide les octets au fil de l'eau"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(dreams) -> Iterator[bytes]:
+    renderer = get_renderer('html')
+    store = get_blob_store()
+    stream = _ZipStream()
+
+    with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for dream in dreams:
+            folder = f"{dream.date:%Y-%m-%d}_{dream.dream_id}" if dream.date else f"reve_{dream.dream_id}"
+
+            image = _dream_image(dream, store)
+            image_name = f"image.{image[0]}" if image else None
+
+            # Image référencée par chemin relatif dans l'archive
+            metadata = dream_metadata(dream)
+            metadata['image_url'] = image_name
+
+            archive.writestr(f"{folder}/dream.html", renderer.render(dream, image_src=image_name or ''))
+            archive.writestr(f"{folder}/dream.json", _dumps(metadata))
+            if image:
+                # Images déjà compressées : stockées telles quelles
+                archive.writestr(f"{folder}/{image_name}", image[1], compress_type=zipfile.ZIP_STORED)
+
+            yield stream.drain()
+
+    # Répertoire central écrit à la fermeture de l'archive
+    yield stream.drain()
+
+
+def iter_json(dreams) -> Iterator[bytes]:
+    for chunk in iter_json_array(dreams, dream_metadata):
+        yield chunk.encode('utf-8')
+
+
+class _Echo:
+    """Pseudo-fichier pour csv.writer : retourne la ligne au lieu de l'écrire"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(dreams) -> Iterator[bytes]:
+    writer = csv.writer(_Echo())
+    # BOM : ouverture correcte des accents dans Excel
+    yield '\ufeff'.encode('utf-8') + writer.writerow(EXPORT_FIELDS).encode('utf-8')
+    for dream in dreams:
+        metadata = dream_metadata(dream)
+        row = [metadata[field] if metadata[field] is not None else '' for field in EXPORT_FIELDS]
+        yield writer.writerow(row).encode('utf-8')
+
+
+def iter_markdown(dreams) -> Iterator[bytes]:
+    renderer = get_renderer('md')
+    yield "# 🌙 Mon journal de rêves\n\n".encode('utf-8')
+    for dream in dreams:
+        yield (renderer.render(dream).strip() + "\n\n---\n\n").encode('utf-8')
+
+
+# format → (générateur, content type, extension)
+EXPORTERS: Dict[str, Tuple[Callable, str, str]] = {
+    'zip': (iter_zip, 'application/zip', 'zip'),
+    'json': (iter_json, 'application/json', 'json'),
+    'csv': (iter_csv, 'text/csv; charset=utf-8', 'csv'),
+    'md': (iter_markdown, 'text/markdown; charset=utf-8', 'md'),
+}
+
+
+def get_exporter(fmt: str) -> Tuple[Callable, str, str]:
+    try:
+        return EXPORTERS[fmt]
+    except KeyError:
+        raise InvalidExportRequest(f"Format invalide. Utilisez: {', '.join(EXPORTERS)}")
+
+
+def export_journal(user, fmt: str = 'zip', start: Optional[date] = None,
+                   end: Optional[date] = None) -> Iterator[bytes]:
+    """Octets de l'export du journal de `user`, produits au fil de la lecture"""
+    exporter, _, _ = get_exporter(fmt)
+    dreams = export_queryset(user, start, end).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return exporter(dreams)
+
+
+def export_filename(user, fmt: str) -> str:
+    _, _, extension = get_exporter(fmt)
+    return f"reves_{user.username}_{time.strftime('%Y%m%d')}.{extension}"
@@ -0,0 +1,358 @@
+# dreams/tests/test_ai_cache.py
+"""Tests pour le cache disque des résultats d'IA"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from dreams import utils
+from dreams.ai_cache import (
+    DiskCache, SingleFlight, cache_names, get_cache, image_cache, image_flights, llm_cache, llm_cache_key,
+    transcription_cache, transcription_cache_key
+)
+from dreams.utils import (
+    transcribe_audio, rephrase_text, analyze_emotion_with_groq, analyze_emotion_with_huggingface,
+    generate_image_base64
+)
+from dreams.storage import BlobStore
+from dreams.features.steps.test_storage import BlobStorageTestMixin, PNG_DATA_URI, PNG_KEY
+
+AUDIO_BYTES = b'RIFF' + b'fake wav payload' * 20
+
+
+class AICacheTestMixin:
+    """Isole le cache disque dans un répertoire temporaire"""
+
+    def setUp(self):
+        super().setUp()
+        self.cache_root = tempfile.mkdtemp()
+        self.ai_cache_override = override_settings(AI_CACHE_ROOT=self.cache_root)
+        self.ai_cache_override.enable()
+        for name in cache_names():
+            get_cache(name).clear_memory()
+
+    def tearDown(self):
+        for name in cache_names():
+            get_cache(name).clear_memory()
+        self.ai_cache_override.disable()
+        shutil.rmtree(self.cache_root, ignore_errors=True)
+        super().tearDown()
+
+    def age(self, cache, key, seconds):
+        """Recule la date de dernier accès d'une entrée"""
+        past = time.time() - seconds
+        os.utime(cache.path(key), (past, past))
+
+
+class DiskCacheTests(AICacheTestMixin, SimpleTestCase):
+    """Tests du stockage et de l'éviction"""
+
+    def setUp(self):
+        super().setUp()
+        self.cache = DiskCache('tests', 'TEST_AI_CACHE', default_ttl=3600, default_max_mb=1)
+
+    def test_roundtrip(self):
+        """Test qu'une valeur écrite est relue telle quelle"""
+        self.cache.set('ab' * 32, {'text': 'Je volais 🌙'})
+
+        self.assertEqual(self.cache.get('ab' * 32), {'text': 'Je volais 🌙'})
+        self.assertIsNone(self.cache.get('cd' * 32))
+
+    def test_expired_entry_is_a_miss(self):
+        """Test que le TTL court depuis le dernier accès"""
+        key = 'ab' * 32
+        self.cache.set(key, 'valeur')
+        self.age(self.cache, key, 7200)
+
+        self.assertIsNone(self.cache.get(key))
+        self.assertFalse(self.cache.path(key).exists())
+
+    @override_settings(TEST_AI_CACHE_MAX_MB=0)
+    def test_prune_evicts_least_recently_used(self):
+        """Test de l'éviction par taille, les moins récemment lues d'abord"""
+        old, recent = 'ab' * 32, 'cd' * 32
+        self.cache.set(old, 'x' * 100)
+        self.cache.set(recent, 'y' * 100)
+        self.age(self.cache, old, 60)
+        self.age(self.cache, recent, 30)
+
+        expired, evicted = self.cache.prune()
+
+        self.assertEqual((expired, evicted), (0, 2))
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_prune_keeps_entries_under_limit(self):
+        """Test que prune ne retire que les entrées expirées sous la taille max"""
+        fresh, stale = 'ab' * 32, 'cd' * 32
+        self.cache.set(fresh, 'frais')
+        self.cache.set(stale, 'périmé')
+        self.age(self.cache, stale, 7200)
+
+        self.assertEqual(self.cache.prune(), (1, 0))
+        self.assertEqual(self.cache.get(fresh), 'frais')
+
+    @override_settings(TEST_AI_CACHE_MEMORY_ITEMS=2)
+    def test_memory_tier_is_lru(self):
+        """Test que le niveau mémoire garde les entrées les plus récemment utilisées"""
+        keys = ['ab' * 32, 'cd' * 32, 'ef' * 32]
+        self.cache.set(keys[0], 'a')
+        self.cache.set(keys[1], 'b')
+        self.cache.get(keys[0])  # keys[1] devient la moins récente
+        self.cache.set(keys[2], 'c')
+        for key in keys:
+            self.cache.path(key).unlink()  # Plus que le niveau mémoire
+
+        self.assertEqual(self.cache.get(keys[0]), 'a')
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertEqual(self.cache.get(keys[2]), 'c')
+
+    @override_settings(TEST_AI_CACHE_MEMORY_ITEMS=10)
+    def test_hit_and_miss_counters(self):
+        """Test des compteurs mémoire / disque / miss"""
+        self.cache.set('ab' * 32, 'valeur')
+        self.cache.get('ab' * 32)
+        self.cache.clear_memory()
+        self.cache.get('ab' * 32)  # Relue du disque puis remise en mémoire
+        self.cache.get('ab' * 32)
+        self.cache.get('cd' * 32)
+
+        counters = self.cache.counters()
+        self.assertEqual((counters['memory_hits'], counters['disk_hits'], counters['misses']), (1, 1, 1))
+        self.assertEqual(counters['hit_rate'], 0.667)
+
+    @override_settings(TEST_AI_CACHE_MEMORY_ITEMS=10)
+    def test_memory_values_are_copies(self):
+        """Test qu'un résultat modifié par l'appelant n'altère pas le cache"""
+        self.cache.set('ab' * 32, {'emotion': 'heureux'})
+        self.cache.get('ab' * 32)['emotion'] = 'triste'
+
+        self.assertEqual(self.cache.get('ab' * 32), {'emotion': 'heureux'})
+
+    def test_prune_command(self):
+        """Test de la commande de purge"""
+        transcription_cache.set('ab' * 32, {'text': 'vieux'})
+        self.age(transcription_cache, 'ab' * 32, 365 * 24 * 3600)
+        out = StringIO()
+
+        call_command('prune_ai_cache', '--cache', 'transcriptions', stdout=out)
+
+        self.assertIn('1 expirées', out.getvalue())
+        self.assertIsNone(transcription_cache.get('ab' * 32))
+
+
+@override_settings(TRANSCRIPTION_CACHE_TTL=3600)
+class TranscriptionCacheTests(AICacheTestMixin, SimpleTestCase):
+    """Tests du cache de transcription (SHA-256 audio + modèle)"""
+
+    @patch('dreams.utils._transcribe_with_groq', return_value="Je volais au-dessus de la ville")
+    def test_same_audio_transcribed_once(self, mock_groq):
+        """Test qu'un nouvel essai avec le même enregistrement n'appelle pas Groq"""
+        first = transcribe_audio(AUDIO_BYTES)
+        second = transcribe_audio(bytearray(AUDIO_BYTES))
+
+        self.assertEqual(first, "Je volais au-dessus de la ville")
+        self.assertEqual(second, first)
+        mock_groq.assert_called_once()
+
+    @patch('dreams.utils._transcribe_with_groq', side_effect=["premier", "second"])
+    def test_different_audio_is_a_miss(self, mock_groq):
+        """Test que des octets différents donnent une autre entrée"""
+        self.assertEqual(transcribe_audio(AUDIO_BYTES), "premier")
+        self.assertEqual(transcribe_audio(AUDIO_BYTES + b'!'), "second")
+        self.assertEqual(mock_groq.call_count, 2)
+
+    def test_key_depends_on_model(self):
+        """Test que changer de modèle invalide les transcriptions"""
+        digest = hashlib.sha256(AUDIO_BYTES).hexdigest()
+        self.assertNotEqual(
+            transcription_cache_key(digest, 'whisper-large-v3'),
+            transcription_cache_key(digest, 'whisper-large-v3-turbo'),
+        )
+
+    @patch('dreams.utils._transcribe_with_groq', return_value=None)
+    def test_fallback_not_cached(self, mock_groq):
+        """Test qu'un échec Groq (fallback) n'est pas mis en cache"""
+        transcribe_audio(AUDIO_BYTES)
+        transcribe_audio(AUDIO_BYTES)
+
+        self.assertEqual(mock_groq.call_count, 2)
+        self.assertEqual(transcription_cache.stats()['entries'], 0)
+
+
+class LLMCacheTests(AICacheTestMixin, SimpleTestCase):
+    """Tests de la mémoïsation des reformulations et analyses émotionnelles"""
+
+    @patch('dreams.utils._rephrase_with_groq', return_value="Forêt lumineuse sous la lune")
+    def test_rephrase_memoized_by_normalized_text(self, mock_groq):
+        """Test que la preview puis la sauvegarde n'appellent Groq qu'une fois"""
+        first = rephrase_text("Je volais  dans la FORÊT")
+        second = rephrase_text(" je volais dans la forêt\n")
+
+        self.assertEqual(first, "Forêt lumineuse sous la lune")
+        self.assertEqual(second, first)
+        mock_groq.assert_called_once()
+        self.assertEqual(llm_cache.counters()['memory_hits'], 1)
+
+    @patch('dreams.utils._rephrase_with_groq', side_effect=["Forêt lumineuse", "Forêt sombre"])
+    def test_prompt_version_invalidates(self, mock_groq):
+        """Test qu'une nouvelle version du prompt système ignore les anciens résultats"""
+        rephrase_text("Je volais dans la forêt")
+        with patch.object(utils, 'REPHRASE_PROMPT_VERSION', 'nouvelle-version'):
+            result = rephrase_text("Je volais dans la forêt")
+
+        self.assertEqual(result, "Forêt sombre")
+        self.assertEqual(mock_groq.call_count, 2)
+
+    @patch('dreams.utils._rephrase_with_groq', side_effect=Exception("Groq indisponible"))
+    def test_rephrase_fallback_not_cached(self, mock_groq):
+        """Test qu'une reformulation de secours n'est pas mise en cache"""
+        rephrase_text("Je volais dans la forêt")
+        rephrase_text("Je volais dans la forêt")
+
+        self.assertEqual(mock_groq.call_count, 2)
+
+    def test_keys_depend_on_model(self):
+        """Test que changer de modèle donne une autre clé"""
+        self.assertNotEqual(
+            llm_cache_key('emotion', 'llama-3.1-8b-instant', 'v1', "Un rêve"),
+            llm_cache_key('emotion', 'llama-3.3-70b-versatile', 'v1', "Un rêve"),
+        )
+
+    @patch('dreams.utils._analyze_emotion_with_groq')
+    def test_groq_emotion_memoized(self, mock_groq):
+        """Test que l'analyse Groq est réutilisée pour une même transcription"""
+        mock_groq.return_value = {'emotion': 'excitant', 'confidence': 0.9, 'method': 'groq',
+                                  'emoji': '🤩', 'color': '#ef4444', 'reasoning': 'Une course'}
+
+        analyze_emotion_with_groq("Une course dans les nuages")
+        result = analyze_emotion_with_groq("Une course dans les nuages")
+
+        self.assertEqual(result['emotion'], 'excitant')
+        mock_groq.assert_called_once()
+
+    @patch('dreams.utils._analyze_emotion_with_groq', return_value=None)
+    def test_groq_emotion_failure_not_cached(self, mock_groq):
+        """Test qu'un échec (None) n'est pas mis en cache"""
+        self.assertIsNone(analyze_emotion_with_groq("Une course"))
+        self.assertIsNone(analyze_emotion_with_groq("Une course"))
+        self.assertEqual(mock_groq.call_count, 2)
+
+    @patch.dict('os.environ', {'HUGGINGFACE_API_KEY': 'test-key'})
+    @patch('dreams.utils._analyze_emotion_with_huggingface')
+    def test_huggingface_emotion_memoized(self, mock_hf):
+        """Test que l'analyse HuggingFace est réutilisée pour une même transcription"""
+        mock_hf.return_value = {'emotion': 'heureux', 'confidence': 0.8, 'method': 'huggingface',
+                                'emoji': '😊', 'color': '#10b981', 'hf_label': 'positive'}
+
+        analyze_emotion_with_huggingface("Un jardin plein de joie")
+        analyze_emotion_with_huggingface("Un jardin plein de JOIE")
+
+        mock_hf.assert_called_once()
+
+
+class SingleFlightTests(SimpleTestCase):
+    """Tests du regroupement des appels concurrents"""
+
+    def test_concurrent_calls_share_one_computation(self):
+        """Test que deux appels simultanés n'exécutent le calcul qu'une fois"""
+        flights = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'image'
+
+        leader = threading.Thread(target=lambda: results.append(flights.do('k', compute)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(flights.do('k', compute)))
+        follower.start()
+        time.sleep(0.1)  # Le second appel attend le premier
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(results, ['image', 'image'])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flights.in_flight(), 0)
+
+    def test_error_shared_then_released(self):
+        """Test qu'un échec est propagé et libère la clé"""
+        flights = SingleFlight()
+
+        def failing():
+            raise RuntimeError("Pollinations indisponible")
+
+        with self.assertRaises(RuntimeError):
+            flights.do('k', failing)
+
+        self.assertEqual(flights.do('k', lambda: 'ok'), 'ok')
+
+
+class ImageCacheTests(AICacheTestMixin, BlobStorageTestMixin, SimpleTestCase):
+    """Tests du cache d'images (prompt nettoyé + taille, blobs réutilisés)"""
+
+    @patch('dreams.utils.generate_pollinations_image', return_value=PNG_DATA_URI)
+    def test_same_prompt_fetched_once(self, mock_pollinations):
+        """Test qu'un prompt identique (au nettoyage près) est servi depuis le blob store"""
+        first = generate_image_base64("Forêt lumineuse, lune !")
+        second = generate_image_base64("forêt lumineuse,  lune")
+
+        self.assertEqual(first, PNG_DATA_URI)
+        self.assertEqual(second, PNG_DATA_URI)
+        mock_pollinations.assert_called_once()
+        self.assertTrue(BlobStore().exists(PNG_KEY))
+
+    @patch('dreams.utils.generate_pollinations_image', return_value=PNG_DATA_URI)
+    def test_missing_blob_is_refetched(self, mock_pollinations):
+        """Test qu'une entrée dont le blob a disparu est régénérée"""
+        generate_image_base64("Forêt lumineuse")
+        BlobStore().delete(PNG_KEY)
+        image_cache.clear_memory()
+
+        self.assertEqual(generate_image_base64("Forêt lumineuse"), PNG_DATA_URI)
+        self.assertEqual(mock_pollinations.call_count, 2)
+
+    @patch('dreams.utils.generate_pollinations_image', side_effect=Exception("Pollinations indisponible"))
+    def test_placeholder_not_cached(self, mock_pollinations):
+        """Test que le placeholder de secours n'est pas mis en cache"""
+        result = generate_image_base64("Forêt lumineuse")
+        generate_image_base64("Forêt lumineuse")
+
+        self.assertTrue(result.startswith("data:image/svg+xml;base64,"))
+        self.assertEqual(mock_pollinations.call_count, 2)
+
+    def test_double_click_single_fetch(self):
+        """Test que deux générations simultanées du même prompt ne font qu'un appel"""
+        started, release = threading.Event(), threading.Event()
+        results = []
+
+        def slow_pollinations(prompt):
+            started.set()
+            release.wait(5)
+            return PNG_DATA_URI
+
+        with patch('dreams.utils.generate_pollinations_image', side_effect=slow_pollinations) as mock_pollinations:
+            first = threading.Thread(target=lambda: results.append(generate_image_base64("Forêt lumineuse")))
+            first.start()
+            started.wait(5)
+            second = threading.Thread(target=lambda: results.append(generate_image_base64("Forêt lumineuse")))
+            second.start()
+            time.sleep(0.1)
+            release.set()
+            first.join(5)
+            second.join(5)
+
+        self.assertEqual(results, [PNG_DATA_URI, PNG_DATA_URI])
+        mock_pollinations.assert_called_once()
+        self.assertEqual(image_flights.in_flight(), 0)
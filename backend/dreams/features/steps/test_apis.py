@@ -1,6 +1,7 @@
 # dreams/tests/test_apis.py
 """Tests pour les APIs REST de dreams"""
 
+import json
 from unittest.mock import patch, MagicMock
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -10,14 +11,16 @@ from rest_framework.authtoken.models import Token
 
 from dreams.models import Dream
 from dreams.utils import MAX_AUDIO_SIZE_MB
+from dreams.features.steps.test_storage import BlobStorageTestMixin
 
 User = get_user_model()
 
 
-class DreamAPITests(APITestCase):
+class DreamAPITests(BlobStorageTestMixin, APITestCase):
     """Tests pour les APIs Dream"""
     
     def setUp(self):
+        super().setUp()
         self.user = User.objects.create_user(
             username='testuser',
             email='test@example.com',
@@ -71,11 +74,47 @@ class DreamAPITests(APITestCase):
         self.assertEqual(stats['private_dreams'], 1)
         self.assertEqual(stats['public_dreams'], 1)
     
+    def test_dream_list_compact_view(self):
+        """Test du mode compact de la liste des rêves"""
+        response = self.client.get('/api/dreams/list', {'view': 'compact'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        dream = response.data['dreams'][0]
+        self.assertNotIn('transcription', dream)
+        self.assertIn('image_url', dream)
+        self.assertEqual(response.data['stats']['total_dreams'], 2)
+    
+    def test_dream_list_sparse_fields(self):
+        """Test de la sélection de champs (?fields=)"""
+        response = self.client.get('/api/dreams/list', {'fields': 'dream_id,privacy'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(response.data['dreams'], key=lambda d: d['dream_id']),
+            [
+                {'dream_id': self.dream1.dream_id, 'privacy': 'private'},
+                {'dream_id': self.dream2.dream_id, 'privacy': 'public'},
+            ]
+        )
+        
+        response = self.client.get('/api/dreams/list', {'fields': 'dream_id,password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_dream_list_streaming(self):
+        """Test de la liste streamée (?stream=1) : même contenu que la réponse classique"""
+        regular = self.client.get('/api/dreams/list')
+        streamed = self.client.get('/api/dreams/list', {'stream': '1'})
+        
+        self.assertTrue(streamed.streaming)
+        data = json.loads(b''.join(streamed.streaming_content))
+        self.assertEqual(data['stats'], regular.json()['stats'])
+        self.assertEqual(data['dreams'], regular.json()['dreams'])
+    
     @patch('dreams.views.validate_audio_complete')
-    @patch('dreams.views.transcribe_audio')
-    @patch('dreams.views.rephrase_text')
-    @patch('dreams.views.generate_image_base64')
-    @patch('dreams.views.analyze_dream_emotion')
+    @patch('dreams.pipeline.transcribe_audio')
+    @patch('dreams.pipeline.rephrase_text')
+    @patch('dreams.pipeline.generate_image_base64')
+    @patch('dreams.pipeline.analyze_dream_emotion')
     def test_dream_generate_api_success(self, mock_emotion, mock_generate_image, 
                                        mock_rephrase, mock_transcribe, mock_validate):
         """Test de l'API de génération de rêve réussie avec mocks dans views"""
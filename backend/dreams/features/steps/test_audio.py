@@ -0,0 +1,139 @@
+# dreams/tests/test_audio.py
+"""Tests pour l'ingestion des fichiers audio (sans copie complète)"""
+
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+from django.test import SimpleTestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+
+from dreams.audio import open_audio, sha256_file
+from dreams.utils import transcribe_audio
+
+AUDIO_BYTES = b'RIFF' + b'fake wav payload' * 1000
+
+
+class ChunksOnly:
+    """Objet n'exposant que chunks() (ni read ni seek)"""
+    name = "chunks.ogg"
+
+    def chunks(self):
+        yield AUDIO_BYTES[:100]
+        yield AUDIO_BYTES[100:]
+
+
+class OpenAudioTests(SimpleTestCase):
+    """Tests de open_audio selon le type d'entrée"""
+
+    def make_temporary_upload(self):
+        upload = TemporaryUploadedFile("long.wav", "audio/wav", len(AUDIO_BYTES), None)
+        upload.write(AUDIO_BYTES)
+        upload.seek(0)
+        self.addCleanup(upload.close)
+        return upload
+
+    def test_bytes(self):
+        """Test des octets bruts"""
+        with open_audio(AUDIO_BYTES) as audio:
+            self.assertEqual(audio.filename, "audio.wav")
+            self.assertEqual(audio.size, len(AUDIO_BYTES))
+            self.assertEqual(audio.file.read(), AUDIO_BYTES)
+
+    def test_temporary_upload_reuses_django_file(self):
+        """Test qu'un upload déjà sur le disque est rouvert sans copie"""
+        upload = self.make_temporary_upload()
+
+        with patch('tempfile.NamedTemporaryFile') as mock_tmp, patch('tempfile.SpooledTemporaryFile') as mock_spool:
+            with open_audio(upload) as audio:
+                self.assertEqual(audio.path, upload.temporary_file_path())
+                self.assertEqual(audio.filename, "long.wav")
+                self.assertEqual(audio.file.read(), AUDIO_BYTES)
+                reopened = audio.file
+
+        self.assertTrue(reopened.closed)
+        self.assertTrue(os.path.exists(upload.temporary_file_path()))  # Toujours à Django
+        mock_tmp.assert_not_called()
+        mock_spool.assert_not_called()
+
+    def test_open_file_used_in_place(self):
+        """Test qu'un fichier ouvert est utilisé directement et sa position restaurée"""
+        upload = SimpleUploadedFile("court.mp3", AUDIO_BYTES, content_type="audio/mpeg")
+        upload.seek(10)
+
+        with open_audio(upload) as audio:
+            self.assertIs(audio.file, upload)
+            self.assertEqual(audio.file.tell(), 0)
+            self.assertEqual(audio.size, len(AUDIO_BYTES))
+
+        self.assertEqual(upload.tell(), 10)
+        self.assertFalse(upload.closed)
+
+    def test_chunks_only_spooled_and_cleaned(self):
+        """Test qu'un objet à chunks() est recopié par morceaux puis libéré"""
+        with open_audio(ChunksOnly()) as audio:
+            self.assertEqual(audio.filename, "chunks.ogg")
+            self.assertEqual(audio.file.read(), AUDIO_BYTES)
+            spool = audio.file
+
+        self.assertTrue(spool.closed)
+
+    def test_path(self):
+        """Test d'un chemin disque"""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        path = os.path.join(tmp_dir, "reve.flac")
+        with open(path, 'wb') as f:
+            f.write(AUDIO_BYTES)
+
+        with open_audio(path) as audio:
+            self.assertEqual((audio.filename, audio.path, audio.size), ("reve.flac", path, len(AUDIO_BYTES)))
+
+    def test_sha256_streamed(self):
+        """Test du hash calculé par morceaux"""
+        buffer = io.BytesIO(AUDIO_BYTES)
+
+        self.assertEqual(sha256_file(buffer), hashlib.sha256(AUDIO_BYTES).hexdigest())
+        self.assertEqual(buffer.tell(), 0)
+
+
+class TranscriptionIngestionTests(SimpleTestCase):
+    """Tests du passage de l'audio au client de transcription"""
+
+    def setUp(self):
+        self.cache_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(AI_CACHE_ROOT=self.cache_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.cache_root, ignore_errors=True)
+
+    def test_upload_streamed_to_client(self):
+        """Test que le client reçoit le fichier temporaire de Django, pas une copie"""
+        upload = TemporaryUploadedFile("long.wav", "audio/wav", len(AUDIO_BYTES), None)
+        upload.write(AUDIO_BYTES)
+        upload.seek(0)
+        self.addCleanup(upload.close)
+        seen = {}
+
+        def fake_groq(audio, model):
+            seen['path'] = audio.path
+            seen['content'] = audio.file.read()
+            return "Je volais"
+
+        with patch('dreams.utils._transcribe_with_groq', side_effect=fake_groq):
+            self.assertEqual(transcribe_audio(upload), "Je volais")
+
+        self.assertEqual(seen['path'], upload.temporary_file_path())
+        self.assertEqual(seen['content'], AUDIO_BYTES)
+
+    @patch('dreams.utils._transcribe_with_groq', return_value="Je volais")
+    def test_cache_key_independent_of_input_type(self, mock_groq):
+        """Test que bytes et upload du même audio partagent l'entrée de cache"""
+        transcribe_audio(AUDIO_BYTES)
+        transcribe_audio(SimpleUploadedFile("reve.wav", AUDIO_BYTES, content_type="audio/wav"))
+
+        mock_groq.assert_called_once()
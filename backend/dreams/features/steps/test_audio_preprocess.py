@@ -0,0 +1,177 @@
+# dreams/tests/test_audio_preprocess.py
+"""Tests pour le prétraitement audio (mono 16 kHz, silences retirés)"""
+
+import io
+import shutil
+import struct
+import tempfile
+import wave
+from unittest.mock import patch
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from dreams.audio import open_audio
+from dreams.audio_preprocess import prepared_audio, preprocess_audio, resample, trim_silence
+from dreams.utils import transcribe_audio
+
+
+def tone(seconds, rate, frequency=440.0, amplitude=0.5):
+    t = np.arange(int(seconds * rate)) / rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def make_pcm_wav(samples, rate, channels=1, sample_width=2):
+    """WAV entier : `samples` mono dupliqué sur `channels` canaux"""
+    interleaved = np.repeat(samples, channels)
+    if sample_width == 2:
+        data = (interleaved * 32767).astype('<i2').tobytes()
+    else:
+        values = (interleaved * 8388607).astype('<i4')
+        data = b''.join(struct.pack('<i', v)[:3] for v in values)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(sample_width)
+        w.setframerate(rate)
+        w.writeframes(data)
+    return buffer.getvalue()
+
+
+def make_float_wav(samples, rate):
+    data = samples.astype('<f4').tobytes()
+    fmt = struct.pack('<HHIIHH', 3, 1, rate, rate * 4, 4, 32)
+    return (b'RIFF' + struct.pack('<I', 4 + 8 + len(fmt) + 8 + len(data)) + b'WAVE'
+            + b'fmt ' + struct.pack('<I', len(fmt)) + fmt + b'data' + struct.pack('<I', len(data)) + data)
+
+
+def dream_recording(rate=48000, channels=2, silence=1.0, speech=2.0):
+    """Enregistrement type : silence, « parole » (sinusoïde), silence"""
+    quiet = np.zeros(int(silence * rate), dtype=np.float32)
+    return make_pcm_wav(np.concatenate([quiet, tone(speech, rate), quiet]), rate, channels)
+
+
+def read_wav(data):
+    with wave.open(io.BytesIO(data)) as w:
+        frames = np.frombuffer(w.readframes(w.getnframes()), dtype='<i2').astype(np.float32) / 32768
+        return w.getnchannels(), w.getframerate(), frames
+
+
+def preprocess(data, name="reve.wav"):
+    with open_audio(SimpleUploadedFile(name, data)) as audio:
+        return preprocess_audio(audio)
+
+
+class PreprocessTests(SimpleTestCase):
+    """Tests de conversion des WAV PCM"""
+
+    def test_stereo_48k_downmixed_resampled_trimmed(self):
+        """Test stéréo 48 kHz → mono 16 kHz, silences retirés, fichier plus léger"""
+        original = dream_recording(rate=48000, channels=2)
+        converted = preprocess(original)
+
+        channels, rate, samples = read_wav(converted)
+        self.assertEqual((channels, rate), (1, 16000))
+        # 2 s de parole + 200 ms de marge de chaque côté
+        self.assertAlmostEqual(len(samples) / rate, 2.4, delta=0.05)
+        self.assertLess(len(converted), len(original) / 8)
+
+    def test_non_integer_ratio(self):
+        """Test 44,1 kHz → 16 kHz par interpolation"""
+        channels, rate, samples = read_wav(preprocess(dream_recording(rate=44100, channels=1)))
+        self.assertEqual(rate, 16000)
+        self.assertAlmostEqual(len(samples) / rate, 2.4, delta=0.05)
+
+    def test_24_bit_and_float(self):
+        """Test des WAV 24 bits et flottants 32 bits"""
+        signal = np.concatenate([np.zeros(48000, dtype=np.float32), tone(1, 48000)])
+        for data in (make_pcm_wav(signal, 48000, sample_width=3), make_float_wav(signal, 48000)):
+            channels, rate, samples = read_wav(preprocess(data))
+            self.assertEqual((channels, rate), (1, 16000))
+            self.assertAlmostEqual(np.abs(samples).max(), 0.5, delta=0.02)
+
+    def test_already_mono_16k_passthrough(self):
+        """Test qu'un WAV déjà au bon format et sans silence n'est pas ré-encodé"""
+        self.assertIsNone(preprocess(make_pcm_wav(tone(1, 16000), 16000)))
+
+    def test_compressed_formats_passthrough(self):
+        """Test que les formats non PCM sont envoyés tels quels"""
+        self.assertIsNone(preprocess(b'ID3' + b'\x00' * 1000, name="reve.mp3"))
+        self.assertIsNone(preprocess(b'fake audio content' * 100))
+
+    def test_file_position_reset(self):
+        """Test que le fichier d'origine est remis au début"""
+        with open_audio(dream_recording()) as audio:
+            preprocess_audio(audio)
+            self.assertEqual(audio.file.tell(), 0)
+
+
+class SignalTests(SimpleTestCase):
+    """Tests du rééchantillonnage et de la détection de silence"""
+
+    def test_resample_keeps_speech_band(self):
+        """Test qu'une fréquence vocale est conservée"""
+        samples, rate = resample(tone(1, 48000, frequency=440), 48000)
+        spectrum = np.abs(np.fft.rfft(samples))
+        self.assertEqual(rate, 16000)
+        self.assertAlmostEqual(np.argmax(spectrum) * rate / len(samples), 440, delta=2)
+
+    def test_resample_filters_aliasing(self):
+        """Test qu'une fréquence au-delà de 8 kHz est atténuée (pas de repliement)"""
+        samples, _ = resample(tone(1, 48000, frequency=12000), 48000)
+        self.assertLess(np.abs(samples[100:-100]).max(), 0.05)
+
+    def test_no_upsampling(self):
+        """Test qu'un audio 8 kHz n'est pas suréchantillonné"""
+        samples = tone(1, 8000)
+        self.assertIs(resample(samples, 8000)[0], samples)
+
+    def test_all_silence_kept(self):
+        """Test qu'un enregistrement entièrement silencieux n'est pas vidé"""
+        silence = np.zeros(16000, dtype=np.float32)
+        self.assertEqual(len(trim_silence(silence, 16000)), 16000)
+
+
+class PreprocessedTranscriptionTests(SimpleTestCase):
+    """Tests de l'audio envoyé au client de transcription"""
+
+    def setUp(self):
+        self.cache_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(AI_CACHE_ROOT=self.cache_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.cache_root, ignore_errors=True)
+
+    def transcribe(self, data):
+        seen = {}
+
+        def fake_groq(audio, model):
+            seen['filename'] = audio.filename
+            seen['content'] = audio.file.read()
+            return "Je volais"
+
+        with patch('dreams.utils._transcribe_with_groq', side_effect=fake_groq):
+            self.assertEqual(transcribe_audio(SimpleUploadedFile("reve.wav", data)), "Je volais")
+        return seen
+
+    def test_converted_audio_sent(self):
+        """Test que le WAV converti est envoyé à la place de l'original"""
+        original = dream_recording()
+        seen = self.transcribe(original)
+
+        self.assertEqual(read_wav(seen['content'])[:2], (1, 16000))
+        self.assertLess(len(seen['content']), len(original))
+
+    @override_settings(AUDIO_PREPROCESS=False)
+    def test_bypass_switch(self):
+        """Test que AUDIO_PREPROCESS=False envoie l'audio d'origine"""
+        original = dream_recording()
+        self.assertEqual(self.transcribe(original)['content'], original)
+
+    def test_prepared_audio_keeps_original_when_unchanged(self):
+        """Test que prepared_audio rend la source telle quelle sans conversion"""
+        with open_audio(b'fake audio content') as audio, prepared_audio(audio) as prepared:
+            self.assertIs(prepared, audio)
@@ -0,0 +1,197 @@
+# dreams/tests/test_audio_probe.py
+"""Tests pour l'analyse des en-têtes audio (durée, format, canaux)"""
+
+import io
+import struct
+import wave
+from django.test import SimpleTestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from dreams.audio_probe import probe_audio, AudioProbeError
+from dreams.utils import validate_audio_file
+
+
+def make_wav(seconds, rate=16000, channels=1):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b'\x00\x00' * channels * int(rate * seconds))
+    return buffer.getvalue()
+
+
+def make_flac(seconds, rate=44100, channels=2):
+    packed = rate << 44 | (channels - 1) << 41 | 15 << 36 | int(rate * seconds)
+    streaminfo = struct.pack('>HH', 4096, 4096) + b'\x00' * 6 + packed.to_bytes(8, 'big') + b'\x00' * 16
+    return b'fLaC' + bytes([0x80]) + len(streaminfo).to_bytes(3, 'big') + streaminfo + b'\x00' * 1000
+
+
+def ogg_page(packet, granule, sequence):
+    header = b'OggS' + bytes([0, 0]) + struct.pack('<qII', granule, 1, sequence) + b'\x00' * 4
+    return header + bytes([1, len(packet)]) + packet
+
+
+def make_opus(seconds, channels=1):
+    head = b'OpusHead' + bytes([1, channels]) + struct.pack('<HIh', 312, 48000, 0) + b'\x00'
+    pages = [ogg_page(head, 0, 0), ogg_page(b'OpusTags' + b'\x00' * 8, 0, 1)]
+    pages += [ogg_page(b'\x00' * 100, 312 + int(48000 * seconds * i / 10), i + 2) for i in range(1, 11)]
+    return b''.join(pages)
+
+
+MP3_HEADER = b'\xff\xfb\x90\xc4'  # MPEG-1 Layer III, 128 kbit/s, 44,1 kHz, mono
+MP3_FRAME_LENGTH = 417
+
+
+def make_mp3(frames, xing_frames=None):
+    frame = MP3_HEADER + b'\x00' * (MP3_FRAME_LENGTH - 4)
+    first = frame
+    if xing_frames is not None:
+        xing = b'Xing' + struct.pack('>II', 0x1, xing_frames)
+        first = MP3_HEADER + b'\x00' * 17 + xing + b'\x00' * (MP3_FRAME_LENGTH - 4 - 17 - len(xing))
+    tag = b'ID3\x03\x00\x00\x00\x00\x00\x0a' + b'\x00' * 10
+    return tag + first + frame * frames
+
+
+def box(kind, payload):
+    return struct.pack('>I', 8 + len(payload)) + kind + payload
+
+
+def make_m4a(seconds, rate=44100, channels=2, moov_last=True):
+    mvhd = box(b'mvhd', b'\x00' * 12 + struct.pack('>II', 1000, int(seconds * 1000)) + b'\x00' * 80)
+    hdlr = box(b'hdlr', b'\x00' * 8 + b'soun' + b'\x00' * 13)
+    entry = box(b'mp4a', b'\x00' * 16 + struct.pack('>HHI', channels, 16, 0) + struct.pack('>I', rate << 16))
+    stsd = box(b'stsd', b'\x00' * 8 + entry)
+    trak = box(b'trak', box(b'mdia', hdlr + box(b'minf', box(b'stbl', stsd))))
+    moov = box(b'moov', mvhd + trak)
+    ftyp = box(b'ftyp', b'M4A \x00\x00\x00\x00')
+    mdat = box(b'mdat', b'\x00' * 5000)
+    return ftyp + (mdat + moov if moov_last else moov + mdat)
+
+
+def ebml(element_id, payload, unknown_size=False):
+    size = b'\x01\xff\xff\xff\xff\xff\xff\xff' if unknown_size else b'\x01' + len(payload).to_bytes(7, 'big')
+    return element_id + size + payload
+
+
+def make_webm(seconds=None, cluster_seconds=(0, 2), last_block_ms=980):
+    info = ebml(b'\x2a\xd7\xb1', (1000000).to_bytes(3, 'big'))
+    if seconds is not None:
+        info += ebml(b'\x44\x89', struct.pack('>d', seconds * 1000))
+    audio = ebml(b'\xb5', struct.pack('>d', 48000.0)) + ebml(b'\x9f', b'\x01')
+    track = ebml(b'\xae', ebml(b'\x83', b'\x02') + ebml(b'\x86', b'A_OPUS') + ebml(b'\xe1', audio))
+    clusters = b''
+    for start in cluster_seconds:
+        blocks = b''.join(ebml(b'\xa3', b'\x81' + struct.pack('>h', offset) + b'\x80' + b'\x00' * 50)
+                          for offset in (0, last_block_ms // 2, last_block_ms))
+        clusters += ebml(b'\x1f\x43\xb6\x75', ebml(b'\xe7', (start * 1000).to_bytes(2, 'big')) + blocks,
+                         unknown_size=True)
+    segment = ebml(b'\x15\x49\xa9\x66', info) + ebml(b'\x16\x54\xae\x6b', track) + clusters
+    header = ebml(b'\x1a\x45\xdf\xa3', ebml(b'\x42\x82', b'webm'))
+    return header + ebml(b'\x18\x53\x80\x67', segment, unknown_size=True)
+
+
+class AudioProbeTests(SimpleTestCase):
+    """Tests de probe_audio par conteneur"""
+
+    def probe(self, data):
+        return probe_audio(io.BytesIO(data))
+
+    def test_wav(self):
+        """Test WAV : durée d'après la taille des données"""
+        info = self.probe(make_wav(2.5, rate=16000, channels=2))
+        self.assertEqual((info.format, info.codec, info.duration), ('wav', 'pcm', 2.5))
+        self.assertEqual((info.sample_rate, info.channels), (16000, 2))
+
+    def test_flac(self):
+        """Test FLAC : durée d'après STREAMINFO"""
+        info = self.probe(make_flac(3))
+        self.assertEqual((info.format, info.duration, info.sample_rate, info.channels), ('flac', 3.0, 44100, 2))
+
+    def test_opus(self):
+        """Test OGG Opus : granule de la dernière page, pré-skip déduit"""
+        info = self.probe(make_opus(4))
+        self.assertEqual((info.format, info.codec, info.duration, info.channels), ('ogg', 'opus', 4.0, 1))
+
+    def test_mp3_cbr(self):
+        """Test MP3 sans en-tête VBR : estimation à débit constant"""
+        info = self.probe(make_mp3(frames=100))
+        self.assertEqual((info.format, info.sample_rate, info.channels), ('mp3', 44100, 1))
+        self.assertAlmostEqual(info.duration, 101 * 1152 / 44100, delta=0.05)
+
+    def test_mp3_xing(self):
+        """Test MP3 VBR : nombre de trames de l'en-tête Xing"""
+        info = self.probe(make_mp3(frames=10, xing_frames=1000))
+        self.assertAlmostEqual(info.duration, 1000 * 1152 / 44100, places=2)
+
+    def test_m4a_moov_at_end(self):
+        """Test M4A : boîte moov trouvée après les données"""
+        info = self.probe(make_m4a(7.5))
+        self.assertEqual((info.format, info.codec, info.duration), ('mp4', 'mp4a', 7.5))
+        self.assertEqual((info.sample_rate, info.channels), (44100, 2))
+
+    def test_webm_with_duration(self):
+        """Test WebM avec élément Duration"""
+        info = self.probe(make_webm(seconds=12))
+        self.assertEqual((info.format, info.codec, info.duration), ('webm', 'A_OPUS', 12.0))
+        self.assertEqual((info.sample_rate, info.channels), (48000, 1))
+
+    def test_webm_without_duration(self):
+        """Test WebM de MediaRecorder : durée d'après le dernier cluster"""
+        info = self.probe(make_webm(seconds=None, cluster_seconds=(0, 2, 4)))
+        self.assertEqual(info.duration, 4.98)
+
+    def test_unknown_content(self):
+        """Test qu'un contenu non reconnu retourne None"""
+        self.assertIsNone(self.probe(b'fake audio content' * 100))
+
+    def test_truncated_header(self):
+        """Test qu'un en-tête reconnu mais tronqué lève AudioProbeError"""
+        with self.assertRaises(AudioProbeError):
+            self.probe(make_flac(3)[:20])
+        with self.assertRaises(AudioProbeError):
+            self.probe(b'RIFF\x00\x00\x00\x00WAVEdata')
+
+    def test_position_restored(self):
+        """Test que la position du fichier est restaurée"""
+        buffer = io.BytesIO(make_wav(1))
+        buffer.seek(7)
+        probe_audio(buffer)
+        self.assertEqual(buffer.tell(), 7)
+
+
+class ProbeValidationTests(SimpleTestCase):
+    """Tests de validate_audio_file avec l'analyse des en-têtes"""
+
+    def test_duration_in_details(self):
+        """Test que durée et format sont remontés"""
+        result = validate_audio_file(SimpleUploadedFile("reve.wav", make_wav(2), content_type="audio/wav"))
+        self.assertTrue(result['valid'])
+        self.assertEqual(result['details']['duration_seconds'], 2.0)
+        self.assertEqual(result['details']['sample_rate'], 16000)
+        self.assertEqual(result['details']['container'], 'wav')
+
+    def test_too_long_rejected(self):
+        """Test qu'un enregistrement trop long est refusé sans appel distant"""
+        upload = SimpleUploadedFile("reve.mp3", make_mp3(frames=10, xing_frames=20000), content_type="audio/mpeg")
+        result = validate_audio_file(upload)
+        self.assertFalse(result['valid'])
+        self.assertIn('trop long', result['error'])
+
+    def test_corrupt_rejected(self):
+        """Test qu'un fichier corrompu est refusé"""
+        upload = SimpleUploadedFile("reve.flac", make_flac(3)[:20], content_type="audio/flac")
+        result = validate_audio_file(upload)
+        self.assertFalse(result['valid'])
+        self.assertIn('illisible', result['error'])
+
+    def test_unknown_content_lenient_by_default(self):
+        """Test qu'un contenu non reconnu reste accepté par défaut"""
+        upload = SimpleUploadedFile("reve.mp3", b'fake audio content' * 100, content_type="audio/mpeg")
+        self.assertTrue(validate_audio_file(upload)['valid'])
+
+    @override_settings(AUDIO_PROBE_STRICT=True)
+    def test_unknown_content_strict(self):
+        """Test du mode strict : contenu non reconnu refusé"""
+        upload = SimpleUploadedFile("reve.mp3", b'fake audio content' * 100, content_type="audio/mpeg")
+        self.assertFalse(validate_audio_file(upload)['valid'])
@@ -0,0 +1,126 @@
+# dreams/tests/test_audio_segments.py
+"""Tests pour la transcription par segments des enregistrements longs"""
+
+import shutil
+import tempfile
+import threading
+from unittest.mock import patch
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from dreams.audio import open_audio
+from dreams.audio_segments import split_audio, split_points, stitch_transcripts
+from dreams.utils import transcribe_audio
+from dreams.features.steps.test_audio_preprocess import make_pcm_wav, read_wav, tone
+
+RATE = 16000
+
+
+def speech_with_pauses(seconds, pause_every=7, pause=0.3):
+    """« Parole » continue avec une courte pause toutes les `pause_every` secondes"""
+    signal = tone(seconds, RATE)
+    for start in np.arange(pause_every, seconds, pause_every):
+        signal[int(start * RATE):int((start + pause) * RATE)] = 0
+    return signal
+
+
+class SplitPointsTests(SimpleTestCase):
+    """Tests du placement des coupures"""
+
+    def test_short_audio_single_segment(self):
+        """Test qu'un audio court n'est pas découpé (dernier segment trop court rattaché)"""
+        self.assertEqual(split_points(tone(70, RATE), RATE, 60), [(0, 70 * RATE)])
+
+    def test_cuts_on_silence_with_overlap(self):
+        """Test que les coupures tombent dans les pauses, avec recouvrement"""
+        samples = speech_with_pauses(150)
+        bounds = split_points(samples, RATE, 60, overlap_seconds=1.0)
+
+        self.assertEqual(len(bounds), 3)
+        self.assertEqual(bounds[0][0], 0)
+        self.assertEqual(bounds[-1][1], len(samples))
+        for (_, end), (begin, _) in zip(bounds, bounds[1:]):
+            self.assertEqual(end - begin, RATE)  # 1 s de recouvrement
+            self.assertLess(np.abs(samples[end - 80:end + 80]).max(), 1e-3)  # Coupure dans une pause
+
+    def test_split_audio_compressed_not_split(self):
+        """Test qu'un format compressé n'est pas découpé"""
+        with open_audio(b'ID3' + b'\x00' * 5000) as audio:
+            self.assertIsNone(split_audio(audio))
+
+    def test_split_audio_encodes_segments(self):
+        """Test que les segments sont des WAV de la même fréquence"""
+        with open_audio(make_pcm_wav(speech_with_pauses(150), RATE)) as audio:
+            segments = split_audio(audio)
+            self.assertEqual(audio.file.tell(), 0)
+
+        self.assertEqual(len(segments), 3)
+        self.assertEqual({read_wav(segment)[:2] for segment in segments}, {(1, RATE)})
+
+
+class StitchTests(SimpleTestCase):
+    """Tests du recollage des textes"""
+
+    def test_overlap_removed(self):
+        """Test que les mots répétés à la jonction sont retirés (casse et ponctuation ignorées)"""
+        texts = ["Je volais au-dessus de la forêt.", "La forêt brillait sous la lune", "lune rousse"]
+        self.assertEqual(stitch_transcripts(texts), "Je volais au-dessus de la forêt. brillait sous la lune rousse")
+
+    def test_no_overlap(self):
+        """Test des segments sans répétition"""
+        self.assertEqual(stitch_transcripts(["Je volais", "puis je tombais"]), "Je volais puis je tombais")
+
+    def test_single_short_word_kept(self):
+        """Test qu'un seul mot court commun n'est pas pris pour une répétition"""
+        self.assertEqual(stitch_transcripts(["un chat et", "et un chien"]), "un chat et et un chien")
+
+
+class SegmentedTranscriptionTests(SimpleTestCase):
+    """Tests de transcribe_audio sur un enregistrement long"""
+
+    def setUp(self):
+        self.cache_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(AI_CACHE_ROOT=self.cache_root)
+        self.settings_override.enable()
+        self.recording = SimpleUploadedFile("long.wav", make_pcm_wav(speech_with_pauses(150), RATE))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.cache_root, ignore_errors=True)
+
+    def test_segments_transcribed_in_parallel(self):
+        """Test que les segments partent en parallèle et que le texte est recollé"""
+        barrier = threading.Barrier(3, timeout=5)
+        texts = {"long_0.wav": "Je volais", "long_1.wav": "volais au-dessus", "long_2.wav": "de la mer"}
+
+        def fake_groq(audio, model):
+            barrier.wait()  # Bloquerait si les segments étaient transcrits l'un après l'autre
+            return texts[audio.filename]
+
+        with patch('dreams.utils._transcribe_with_groq', side_effect=fake_groq):
+            self.assertEqual(transcribe_audio(self.recording), "Je volais au-dessus de la mer")
+
+    def test_failed_segment_falls_back_to_single_call(self):
+        """Test qu'un segment en échec entraîne un appel unique sur tout l'audio"""
+        calls = []
+
+        def fake_groq(audio, model):
+            calls.append(audio.filename)
+            if audio.filename == "long_1.wav":
+                return None
+            return "Je volais" if audio.filename == "long.wav" else "morceau"
+
+        with patch('dreams.utils._transcribe_with_groq', side_effect=fake_groq):
+            self.assertEqual(transcribe_audio(self.recording), "Je volais")
+
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(calls[-1], "long.wav")
+
+    @override_settings(TRANSCRIPTION_CHUNK_SECONDS=0)
+    @patch('dreams.utils._transcribe_with_groq', return_value="Je volais")
+    def test_chunking_disabled(self, mock_groq):
+        """Test que TRANSCRIPTION_CHUNK_SECONDS=0 envoie tout en un appel"""
+        transcribe_audio(self.recording)
+        mock_groq.assert_called_once()
@@ -1,6 +1,15 @@
 # dreams/tests/test_export.py
 """Tests pour l'export des rêves"""
 
+import csv
+import io
+import json
+import os
+import zipfile
+from datetime import date
+
+from django.core.management import call_command
+from django.template.loader import get_template
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase, APIClient
@@ -8,7 +17,10 @@ from rest_framework import status
 from rest_framework.authtoken.models import Token
 
 from dreams.models import Dream
-from dreams.utils import export_dream_as_html
+from dreams.storage import BlobStore
+from dreams.renderers import DreamRenderer, get_renderer, register_renderer, _renderers
+from dreams.utils import export_dream_as_html, export_dream_file
+from dreams.features.steps.test_storage import BlobStorageTestMixin, PNG_BYTES
 
 User = get_user_model()
 
@@ -150,6 +162,38 @@ class DreamExportTests(TestCase):
         self.assertIn("Test minimal", content)
         self.assertEqual(response.status_code, 200)
 
+    def test_export_template_compiled_once(self):
+        """Test que le template d'export est compilé une seule fois (loader en cache)"""
+        renderer = get_renderer('html')
+        renderer.render(self.dream)
+        
+        self.assertIs(
+            get_template(renderer.template_name).template,
+            get_template(renderer.template_name).template
+        )
+    
+    def test_print_and_markdown_renderers(self):
+        """Test des renderers print et Markdown"""
+        printed = get_renderer('print').render(self.dream)
+        self.assertIn('@page', printed)
+        self.assertIn("magnifique jardin", printed)
+        
+        markdown = get_renderer('md').render(self.dream)
+        self.assertIn("> Je rêvais d'un magnifique jardin", markdown)
+        self.assertIn("😊 Heureux", markdown)
+        self.assertNotIn("base64", markdown)
+    
+    def test_register_custom_renderer(self):
+        """Test de l'ajout d'un renderer au registre"""
+        renderer = register_renderer(DreamRenderer('txt', 'dreams/export/dream.md', 'text/plain', 'txt'))
+        self.addCleanup(_renderers.pop, 'txt')
+        
+        response = export_dream_file(self.dream, 'txt')
+        
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertIn('.txt', response['Content-Disposition'])
+        self.assertIs(get_renderer('txt'), renderer)
+
 
 class DreamExportAPITests(APITestCase):
     """Tests pour l'API d'export"""
@@ -181,6 +225,17 @@ class DreamExportAPITests(APITestCase):
         self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
         self.assertIn('attachment', response['Content-Disposition'])
     
+    def test_export_api_formats(self):
+        """Test du choix du renderer via ?type="""
+        url = f'/api/dreams/{self.dream.dream_id}/export'
+        
+        response = self.client.get(url, {'type': 'md'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/markdown; charset=utf-8')
+        
+        response = self.client.get(url, {'type': 'docx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
     def test_export_api_nonexistent_dream(self):
         """Test export d'un rêve inexistant"""
         url = '/api/dreams/99999/export'
@@ -196,3 +251,86 @@ class DreamExportAPITests(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class DreamJournalExportTests(BlobStorageTestMixin, APITestCase):
+    """Tests de l'export du journal complet"""
+    
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        
+        image_key = BlobStore().put(PNG_BYTES, 'image/png')
+        self.dreams = []
+        for i, day in enumerate([date(2025, 1, 10), date(2025, 2, 10), date(2025, 3, 10)]):
+            dream = Dream.objects.create(
+                user=self.user,
+                transcription=f"Rêve numéro {i} du journal",
+                reformed_prompt=f"journal dream {i}",
+                image_key=image_key if i == 0 else None,
+                img_b64="data:image/png;base64,aGVsbG8=" if i == 1 else None,
+                privacy='private'
+            )
+            Dream.objects.filter(pk=dream.pk).update(date=day)
+            self.dreams.append(dream)
+    
+    def export(self, **params):
+        response = self.client.get('/api/dreams/export', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('attachment', response['Content-Disposition'])
+        return b''.join(response.streaming_content)
+    
+    def test_zip_archive(self):
+        """Test de l'archive ZIP : HTML, JSON et images par rêve"""
+        archive = zipfile.ZipFile(io.BytesIO(self.export(type='zip')))
+        names = archive.namelist()
+        
+        first = f"2025-01-10_{self.dreams[0].dream_id}"
+        self.assertIn(f"{first}/dream.html", names)
+        self.assertEqual(archive.read(f"{first}/image.png"), PNG_BYTES)
+        self.assertIn('src="image.png"', archive.read(f"{first}/dream.html").decode('utf-8'))
+        
+        # Image legacy décodée du base64
+        second = f"2025-02-10_{self.dreams[1].dream_id}"
+        self.assertEqual(archive.read(f"{second}/image.png"), b'hello')
+        
+        metadata = json.loads(archive.read(f"{second}/dream.json"))
+        self.assertEqual(metadata['transcription'], "Rêve numéro 1 du journal")
+        self.assertEqual(metadata['image_url'], 'image.png')
+        self.assertEqual(len([n for n in names if n.endswith('dream.json')]), 3)
+    
+    def test_json_export_with_date_range(self):
+        """Test de l'export JSON limité à une période"""
+        data = json.loads(self.export(type='json', start='2025-02-01', end='2025-03-31'))
+        
+        self.assertEqual([d['dream_id'] for d in data], [self.dreams[1].dream_id, self.dreams[2].dream_id])
+    
+    def test_csv_and_markdown_exports(self):
+        """Test des exports CSV et Markdown"""
+        rows = list(csv.reader(io.StringIO(self.export(type='csv').decode('utf-8-sig'))))
+        self.assertEqual(rows[0][0], 'dream_id')
+        self.assertEqual(len(rows), 4)
+        
+        markdown = self.export(type='md').decode('utf-8')
+        self.assertIn("> Rêve numéro 2 du journal", markdown)
+        self.assertIn("## 📅 10/01/2025", markdown)
+    
+    def test_invalid_parameters(self):
+        """Test des paramètres invalides"""
+        self.assertEqual(self.client.get('/api/dreams/export', {'type': 'pdf'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/dreams/export', {'start': '10/01/2025'}).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_management_command(self):
+        """Test de la commande export_dreams"""
+        output = os.path.join(self.blob_root, 'export.json')
+        
+        call_command('export_dreams', 'testuser', '--format', 'json', '--output', output, stdout=io.StringIO())
+        
+        with open(output, encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)), 3)
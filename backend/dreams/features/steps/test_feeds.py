@@ -0,0 +1,528 @@
+# dreams/tests/test_feeds.py
+"""Tests des feeds public et amis (compteurs sociaux et nombre de requêtes)"""
+
+import io
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from dreams.models import Dream, TimelineEntry
+from dreams.ranking import popularity_score
+from social.models import DreamLike, DreamComment, FriendRequest
+
+User = get_user_model()
+
+
+class FeedQueryTests(APITestCase):
+    """Tests des compteurs annotés des feeds"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='viewer',
+            email='viewer@example.com',
+            password='testpass123'
+        )
+        self.author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='testpass123'
+        )
+        self.fans = [
+            User.objects.create_user(username=f'fan{i}', email=f'fan{i}@example.com', password='testpass123')
+            for i in range(3)
+        ]
+        FriendRequest.objects.create(from_user=self.user, to_user=self.author, status='accepted')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_dream(self, likes=0, comments=0, privacy='public'):
+        dream = Dream.objects.create(
+            user=self.author,
+            transcription="Un rêve de test",
+            reformed_prompt="Prompt de test",
+            privacy=privacy
+        )
+        for fan in self.fans[:likes]:
+            DreamLike.objects.create(user=fan, dream=dream)
+        for i in range(comments):
+            DreamComment.objects.create(user=self.fans[0], dream=dream, content=f"Commentaire {i}")
+        return dream
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx)
+
+    def test_counts_and_user_liked(self):
+        """Test des compteurs et de user_liked dans le feed public"""
+        dream = self.create_dream(likes=2, comments=3)
+        DreamLike.objects.create(user=self.user, dream=dream)
+
+        response = self.client.get('/api/dreams/feed/public')
+
+        data = response.data['dreams'][0]
+        self.assertEqual(data['likes_count'], 3)
+        self.assertEqual(data['comments_count'], 3)
+        self.assertTrue(data['user_liked'])
+
+    def test_counts_without_interactions(self):
+        """Test d'un rêve sans like ni commentaire (0 et non None)"""
+        self.create_dream(privacy='friends_only')
+
+        response = self.client.get('/api/dreams/feed/friends')
+
+        data = response.data['dreams'][0]
+        self.assertEqual(data['likes_count'], 0)
+        self.assertEqual(data['comments_count'], 0)
+        self.assertFalse(data['user_liked'])
+
+    def test_popular_sort_by_likes(self):
+        """Test du tri par popularité sur le compteur annoté"""
+        quiet = self.create_dream(likes=0)
+        popular = self.create_dream(likes=3)
+        medium = self.create_dream(likes=1)
+
+        response = self.client.get('/api/dreams/feed/public?sort=popular')
+
+        ids = [d['dream_id'] for d in response.data['dreams']]
+        self.assertEqual(ids, [popular.dream_id, medium.dream_id, quiet.dream_id])
+
+    def test_query_count_independent_of_page_size(self):
+        """Test qu'il n'y a pas de N+1 : le nombre de requêtes ne dépend pas du nombre de rêves"""
+        for url in ('/api/dreams/feed/public', '/api/dreams/feed/friends', '/api/dreams/feed/public?sort=popular'):
+            Dream.objects.all().delete()
+            self.create_dream(likes=1, comments=1)
+            single = self.count_queries(url)
+
+            for _ in range(5):
+                self.create_dream(likes=2, comments=2)
+            many = self.count_queries(url)
+
+            self.assertEqual(single, many, url)
+
+
+class FeedCursorPaginationTests(APITestCase):
+    """Tests de la pagination par curseur (keyset)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='viewer',
+            email='viewer@example.com',
+            password='testpass123'
+        )
+        self.author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='testpass123'
+        )
+        FriendRequest.objects.create(from_user=self.author, to_user=self.user, status='accepted')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        # Trois rêves partagent le même created_at pour tester le départage par dream_id
+        base = timezone.now()
+        self.dreams = []
+        for i in range(7):
+            dream = Dream.objects.create(
+                user=self.author,
+                transcription=f"Rêve numéro {i} pour la pagination",
+                reformed_prompt="Prompt de test",
+                privacy='public'
+            )
+            created_at = base - timedelta(minutes=i if i < 4 else 4)
+            Dream.objects.filter(pk=dream.pk).update(created_at=created_at)
+            self.dreams.append(dream)
+
+    def walk(self, url, per_page=3):
+        """Parcourt toutes les pages en suivant next_cursor"""
+        ids, cursor, pages = [], '', 0
+        while True:
+            response = self.client.get(url, {'cursor': cursor, 'per_page': per_page})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [d['dream_id'] for d in response.data['dreams']]
+            pages += 1
+            cursor = response.data['pagination']['next_cursor']
+            self.assertEqual(response.data['pagination']['has_next'], cursor is not None)
+            if not cursor:
+                return ids, pages
+
+    def expected_order(self):
+        return list(Dream.objects.order_by('-created_at', '-dream_id').values_list('dream_id', flat=True))
+
+    def test_public_feed_walk(self):
+        """Test du parcours complet du feed public sans doublon ni trou"""
+        ids, pages = self.walk('/api/dreams/feed/public')
+
+        self.assertEqual(ids, self.expected_order())
+        self.assertEqual(pages, 3)
+
+    def test_friends_feed_walk(self):
+        """Test du parcours du feed amis"""
+        ids, _ = self.walk('/api/dreams/feed/friends', per_page=2)
+
+        self.assertEqual(ids, self.expected_order())
+
+    def test_dream_list_walk(self):
+        """Test du parcours de la liste des rêves de l'utilisateur"""
+        self.client.force_authenticate(user=self.author)
+
+        ids, _ = self.walk('/api/dreams/list', per_page=4)
+
+        self.assertEqual(ids, self.expected_order())
+
+    def test_no_count_query(self):
+        """Test que le mode curseur n'exécute pas de COUNT(*)"""
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/dreams/feed/public', {'cursor': ''})
+
+        self.assertFalse(any('COUNT(*)' in q['sql'] for q in ctx.captured_queries))
+
+    def test_invalid_cursor(self):
+        """Test d'un curseur falsifié"""
+        response = self.client.get('/api/dreams/feed/public', {'cursor': 'pas-un-curseur'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_popular_sort_rejected(self):
+        """Test que le tri par popularité reste en pagination classique"""
+        response = self.client.get('/api/dreams/feed/public', {'cursor': '', 'sort': 'popular'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_page_mode_unchanged(self):
+        """Test que la pagination par numéro de page reste le comportement par défaut"""
+        response = self.client.get('/api/dreams/feed/public')
+
+        self.assertEqual(response.data['pagination']['total_items'], 7)
+
+
+class DreamCounterCacheTests(APITestCase):
+    """Tests des compteurs likes_count_cache / comments_count_cache"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='viewer',
+            email='viewer@example.com',
+            password='testpass123'
+        )
+        self.author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.dream = Dream.objects.create(
+            user=self.author,
+            transcription="Un rêve très apprécié",
+            reformed_prompt="Prompt de test",
+            privacy='public'
+        )
+
+    def test_like_toggle_updates_cache(self):
+        """Test du like puis unlike via l'API"""
+        url = f'/api/social/dream/{self.dream.dream_id}/like/'
+
+        response = self.client.post(url)
+        self.dream.refresh_from_db()
+        self.assertEqual(response.data['total_likes'], 1)
+        self.assertEqual(self.dream.likes_count_cache, 1)
+
+        response = self.client.post(url)
+        self.dream.refresh_from_db()
+        self.assertEqual(response.data['total_likes'], 0)
+        self.assertEqual(self.dream.likes_count_cache, 0)
+
+    def test_comment_add_and_delete_updates_cache(self):
+        """Test des commentaires ajoutés puis supprimés"""
+        self.client.post(f'/api/social/dream/{self.dream.dream_id}/comment/', {'content': 'Superbe'})
+        comment = DreamComment.objects.create(user=self.author, dream=self.dream, content="Merci")
+        self.dream.refresh_from_db()
+        self.assertEqual(self.dream.comments_count_cache, 2)
+
+        comment.delete()
+        self.dream.refresh_from_db()
+        self.assertEqual(self.dream.comments_count_cache, 1)
+
+    def test_reconcile_command_repairs_drift(self):
+        """Test de la commande de réparation des compteurs"""
+        DreamLike.objects.create(user=self.user, dream=self.dream)
+        Dream.objects.filter(pk=self.dream.pk).update(likes_count_cache=42, comments_count_cache=3)
+
+        call_command('reconcile_dream_counters', stdout=io.StringIO())
+
+        self.dream.refresh_from_db()
+        self.assertEqual(self.dream.likes_count_cache, 1)
+        self.assertEqual(self.dream.comments_count_cache, 0)
+
+    def test_popular_sort_uses_score(self):
+        """Test du tri par popularité sur le score précalculé"""
+        other = Dream.objects.create(
+            user=self.author,
+            transcription="Un rêve moins apprécié",
+            reformed_prompt="Prompt de test",
+            privacy='public'
+        )
+        DreamLike.objects.create(user=self.user, dream=self.dream)
+
+        response = self.client.get('/api/dreams/feed/public', {'sort': 'popular'})
+
+        ids = [d['dream_id'] for d in response.data['dreams']]
+        self.assertEqual(ids, [self.dream.dream_id, other.dream_id])
+
+
+class PopularityRankingTests(APITestCase):
+    """Tests du score de popularité (dreams/ranking.py)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='viewer',
+            email='viewer@example.com',
+            password='testpass123'
+        )
+        # Le feed public exclut les rêves du lecteur
+        self.author = User.objects.create_user(
+            username='ranked_author',
+            email='ranked@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_dream(self, age_hours=0):
+        dream = Dream.objects.create(
+            user=self.author,
+            transcription="Un rêve à classer",
+            reformed_prompt="Prompt de test",
+            privacy='public'
+        )
+        if age_hours:
+            Dream.objects.filter(pk=dream.pk).update(created_at=timezone.now() - timedelta(hours=age_hours))
+        return dream
+
+    def test_score_decays_with_age(self):
+        """Test qu'à engagement égal un rêve plus récent est mieux classé"""
+        now = timezone.now()
+
+        self.assertGreater(popularity_score(5, 0, 0, now), popularity_score(5, 0, 0, now - timedelta(days=1)))
+        self.assertGreater(popularity_score(5, 2, 0, now), popularity_score(5, 0, 0, now))
+
+    def test_new_dream_has_score(self):
+        """Test du score initial à la création"""
+        dream = self.create_dream()
+
+        self.assertGreater(dream.popularity_score, 0)
+
+    def test_social_events_refresh_score(self):
+        """Test de la mise à jour du score sur like/commentaire"""
+        dream = self.create_dream()
+        initial = Dream.objects.get(pk=dream.pk).popularity_score
+
+        DreamLike.objects.create(user=self.user, dream=dream)
+        DreamComment.objects.create(user=self.user, dream=dream, content="Bravo")
+
+        self.assertGreater(Dream.objects.get(pk=dream.pk).popularity_score, initial)
+
+    def test_refresh_command(self):
+        """Test du recalcul en masse (vues, dates modifiées)"""
+        old = self.create_dream(age_hours=48)
+        fresh = self.create_dream()
+        Dream.objects.filter(pk=old.pk).update(popularity_score=1e9)
+
+        call_command('refresh_popularity_scores', stdout=io.StringIO())
+
+        response = self.client.get('/api/dreams/feed/public', {'sort': 'popular'})
+        ids = [d['dream_id'] for d in response.data['dreams']]
+        self.assertEqual(ids, [fresh.dream_id, old.dream_id])
+
+
+class FriendsTimelineTests(APITestCase):
+    """Tests de la timeline amis matérialisée (fan-out à l'écriture)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='viewer',
+            email='viewer@example.com',
+            password='testpass123'
+        )
+        self.author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def create_dream(self, privacy='public'):
+        return Dream.objects.create(
+            user=self.author,
+            transcription="Un rêve partagé entre amis",
+            reformed_prompt="Prompt de test",
+            privacy=privacy
+        )
+
+    def timeline_ids(self):
+        return set(TimelineEntry.objects.filter(owner=self.user).values_list('dream_id', flat=True))
+
+    def test_publish_fans_out_to_friends(self):
+        """Test du fan-out à la publication (hors rêves privés)"""
+        FriendRequest.objects.create(from_user=self.author, to_user=self.user, status='accepted')
+
+        public = self.create_dream('public')
+        friends_only = self.create_dream('friends_only')
+        self.create_dream('private')
+
+        self.assertEqual(self.timeline_ids(), {public.dream_id, friends_only.dream_id})
+
+    def test_accept_backfills_and_remove_prunes(self):
+        """Test du back-fill à l'acceptation et de la purge à la suppression"""
+        dream = self.create_dream('public')
+        fr = FriendRequest.objects.create(from_user=self.author, to_user=self.user, status='pending')
+        self.assertEqual(self.timeline_ids(), set())
+
+        self.client.post(f'/api/social/respond/{fr.id}/accept/')
+        self.assertEqual(self.timeline_ids(), {dream.dream_id})
+
+        self.client.post(f'/api/social/remove-friend/{self.author.username}/')
+        self.assertEqual(self.timeline_ids(), set())
+
+    def test_privacy_change_updates_timeline(self):
+        """Test du retrait puis de la réinsertion lors d'un changement de privacy"""
+        FriendRequest.objects.create(from_user=self.author, to_user=self.user, status='accepted')
+        dream = self.create_dream('public')
+
+        dream.privacy = 'private'
+        dream.save()
+        self.assertEqual(self.timeline_ids(), set())
+
+        dream.privacy = 'friends_only'
+        dream.save()
+        self.assertEqual(self.timeline_ids(), {dream.dream_id})
+
+    def test_feed_reads_timeline(self):
+        """Test que le feed amis renvoie les rêves de la timeline du plus récent au plus ancien"""
+        FriendRequest.objects.create(from_user=self.author, to_user=self.user, status='accepted')
+        older = self.create_dream('public')
+        newer = self.create_dream('friends_only')
+        self.create_dream('private')
+
+        response = self.client.get('/api/dreams/feed/friends')
+
+        self.assertEqual([d['dream_id'] for d in response.data['dreams']], [newer.dream_id, older.dream_id])
+
+
+class PublicFeedCacheTests(TransactionTestCase):
+    """Tests du cache partagé des pages du feed public (hors transaction)"""
+
+    def setUp(self):
+        caches['feeds'].clear()
+        self.author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='testpass123'
+        )
+        self.readers = [
+            User.objects.create_user(username=f'reader{i}', email=f'reader{i}@example.com', password='testpass123')
+            for i in range(2)
+        ]
+        self.dreams = [
+            Dream.objects.create(
+                user=self.author,
+                transcription=f"Rêve public numéro {i}",
+                reformed_prompt="Prompt de test",
+                privacy='public'
+            )
+            for i in range(3)
+        ]
+        self.client = APIClient()
+
+    def tearDown(self):
+        caches['feeds'].clear()
+
+    def get_feed(self, user, **params):
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/dreams/feed/public', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data, len(ctx)
+
+    def test_page_shared_between_readers(self):
+        """Test que la page est réutilisée et user_liked propre à chaque lecteur"""
+        DreamLike.objects.create(user=self.readers[1], dream=self.dreams[0])
+
+        first, cold_queries = self.get_feed(self.readers[0])
+        second, warm_queries = self.get_feed(self.readers[1])
+
+        self.assertLess(warm_queries, cold_queries)
+        self.assertEqual([d['dream_id'] for d in first['dreams']], [d['dream_id'] for d in second['dreams']])
+        liked = {d['dream_id']: d['user_liked'] for d in second['dreams']}
+        self.assertTrue(liked[self.dreams[0].dream_id])
+        self.assertFalse(any(d['user_liked'] for d in first['dreams']))
+        self.assertEqual(second['pagination']['total_items'], 3)
+
+    def test_reader_own_dreams_excluded(self):
+        """Test que l'auteur ne voit pas ses propres rêves dans la page partagée"""
+        self.get_feed(self.readers[0])
+
+        data, _ = self.get_feed(self.author)
+
+        self.assertEqual(data['dreams'], [])
+        self.assertEqual(data['pagination']['total_items'], 0)
+
+    def test_invalidation_on_events(self):
+        """Test de l'invalidation : nouveau rêve, like, changement de privacy"""
+        self.get_feed(self.readers[0])
+
+        new_dream = Dream.objects.create(
+            user=self.author,
+            transcription="Rêve publié après la mise en cache",
+            reformed_prompt="Prompt de test",
+            privacy='public'
+        )
+        data, _ = self.get_feed(self.readers[0])
+        self.assertIn(new_dream.dream_id, [d['dream_id'] for d in data['dreams']])
+
+        DreamLike.objects.create(user=self.readers[1], dream=new_dream)
+        data, _ = self.get_feed(self.readers[0])
+        counts = {d['dream_id']: d['likes_count'] for d in data['dreams']}
+        self.assertEqual(counts[new_dream.dream_id], 1)
+
+        new_dream.privacy = 'private'
+        new_dream.save()
+        data, _ = self.get_feed(self.readers[0])
+        self.assertNotIn(new_dream.dream_id, [d['dream_id'] for d in data['dreams']])
+
+    def test_invalidation_on_delete_and_profile_change(self):
+        """Test de l'invalidation : suppression en masse, renommage puis suppression de l'auteur"""
+        self.get_feed(self.readers[0])
+
+        Dream.objects.filter(pk=self.dreams[0].pk).delete()
+        data, _ = self.get_feed(self.readers[0])
+        self.assertNotIn(self.dreams[0].dream_id, [d['dream_id'] for d in data['dreams']])
+
+        self.author.username = 'renamed'
+        self.author.save()
+        data, _ = self.get_feed(self.readers[0])
+        self.assertEqual({d['user']['username'] for d in data['dreams']}, {'renamed'})
+
+        self.author.delete()
+        data, _ = self.get_feed(self.readers[0])
+        self.assertEqual(data['dreams'], [])
+
+    def test_pagination_matches_paginator(self):
+        """Test de la pagination recomposée (pages, page hors limites)"""
+        data, _ = self.get_feed(self.readers[0], per_page=2, page=2)
+        self.assertEqual(len(data['dreams']), 1)
+        self.assertEqual(data['pagination']['total_pages'], 2)
+        self.assertFalse(data['pagination']['has_next'])
+
+        data, _ = self.get_feed(self.readers[0], per_page=2, page=9)
+        self.assertEqual(len(data['dreams']), 1)
@@ -0,0 +1,48 @@
+# dreams/tests/test_http_client.py
+"""Tests pour les clients HTTP partagés des appels d'IA"""
+
+from unittest.mock import patch
+from django.test import SimpleTestCase, override_settings
+
+from dreams import http_client
+
+
+class HttpClientTests(SimpleTestCase):
+    """Tests de la session et du client Groq réutilisés"""
+
+    def setUp(self):
+        http_client.reset_clients()
+
+    def tearDown(self):
+        http_client.reset_clients()
+
+    def test_session_shared_by_process(self):
+        """Test qu'une seule session (pool keep-alive) est créée"""
+        self.assertIs(http_client.get_session(), http_client.get_session())
+
+    @override_settings(AI_HTTP_POOL_MAXSIZE=4, AI_HTTP_RETRIES=3)
+    def test_pool_and_retry_policy_from_settings(self):
+        """Test des limites de pool et de la politique de retry configurées"""
+        adapter = http_client.get_session().get_adapter('https://image.pollinations.ai/')
+
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(adapter.max_retries.total, 3)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+        self.assertNotIn('POST', adapter.max_retries.allowed_methods)
+
+    @override_settings(AI_HTTP_CONNECT_TIMEOUT=2, AI_HTTP_READ_TIMEOUT=12)
+    def test_default_timeout_applied(self):
+        """Test que chaque appel a un timeout (connexion, lecture) par défaut"""
+        with patch('requests.Session.request') as mock_request:
+            http_client.get('https://image.pollinations.ai/prompt/test')
+            http_client.post('https://api.groq.com/x', timeout=10)
+
+        self.assertEqual(mock_request.call_args_list[0].kwargs['timeout'], (2.0, 12.0))
+        self.assertEqual(mock_request.call_args_list[1].kwargs['timeout'], 10)
+
+    def test_groq_client_reused(self):
+        """Test que le client Groq est construit une seule fois par clé"""
+        first = http_client.get_groq_client('test-key')
+
+        self.assertIs(http_client.get_groq_client('test-key'), first)
+        self.assertIsNot(http_client.get_groq_client('other-key'), first)
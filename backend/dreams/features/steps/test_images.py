@@ -2,14 +2,32 @@
 """Tests pour la génération d'images"""
 
 import base64
+import io
 from unittest.mock import patch, MagicMock
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
 
+from dreams.models import Dream
+from dreams.images import IMAGE_SIZES, generate_image_variants
+from dreams.storage import BlobStore
 from dreams.utils import (
     generate_image_base64,
     generate_artistic_placeholder,
     generate_pollinations_image
 )
+from dreams.features.steps.test_storage import BlobStorageTestMixin
+
+User = get_user_model()
+
+
+def make_png(width=1024, height=1024):
+    """Helper : crée une vraie image PNG"""
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (102, 126, 234)).save(buffer, 'PNG')
+    return buffer.getvalue()
 
 
 class ArtisticPlaceholderTests(TestCase):
@@ -125,17 +143,18 @@ class ImageGenerationIntegrationTests(TestCase):
         mock_placeholder.assert_called_once_with("test prompt")
 
 
+@override_settings(POLLINATIONS_BACKOFF_BASE=0)
 class PollinationsTests(TestCase):
     """Tests pour l'API Pollinations (avec mocks)"""
     
-    @patch('dreams.utils.requests.get')
+    @patch('dreams.utils.http_client.get')
     def test_generate_pollinations_image_success(self, mock_get):
         """Test génération Pollinations réussie"""
         # Simuler une réponse image PNG valide
         fake_image_data = b'\x89PNG\r\n\x1a\n' + b'fake png data' * 100
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.content = fake_image_data
+        mock_response.iter_content.return_value = [fake_image_data]
         mock_get.return_value = mock_response
         
         result = generate_pollinations_image("test prompt")
@@ -148,24 +167,117 @@ class PollinationsTests(TestCase):
         self.assertIn('pollinations.ai', called_url)
         self.assertIn('test%20prompt', called_url)
     
-    @patch('dreams.utils.requests.get')
+    @patch('dreams.utils.http_client.get')
     def test_generate_pollinations_image_failure(self, mock_get):
         """Test échec Pollinations"""
         mock_response = MagicMock()
         mock_response.status_code = 500
-        mock_response.content = b'error'
+        mock_response.iter_content.return_value = [b'error']
         mock_get.return_value = mock_response
         
         with self.assertRaises(Exception):
             generate_pollinations_image("test prompt")
     
-    @patch('dreams.utils.requests.get')
+    @patch('dreams.utils.http_client.get')
+    def test_generate_pollinations_image_alternate_url(self, mock_get):
+        """Test qu'un échec sur la première URL passe à l'URL alternative"""
+        failed = MagicMock(status_code=503)
+        ok = MagicMock(status_code=200)
+        ok.iter_content.return_value = [b'\xff\xd8\xff\xe0' + b'fake jpeg data' * 100]
+        mock_get.side_effect = [failed, ok]
+        
+        result = generate_pollinations_image("test prompt")
+        
+        self.assertTrue(result.startswith("data:image/jpeg;base64,"))
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertIn('image.pollinations.ai', mock_get.call_args_list[1][0][0])
+        failed.close.assert_called_once()
+    
+    @patch('dreams.utils.http_client.get')
     def test_generate_pollinations_image_small_response(self, mock_get):
         """Test réponse trop petite de Pollinations"""
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_response.content = b'tiny'  # Moins de 1000 bytes
+        mock_response.iter_content.return_value = [b'tiny']  # Moins de 1000 bytes
         mock_get.return_value = mock_response
         
         with self.assertRaises(Exception):
             generate_pollinations_image("test prompt")
+
+
+class ImageVariantsTests(BlobStorageTestMixin, TestCase):
+    """Tests pour les miniatures WebP"""
+    
+    def setUp(self):
+        super().setUp()
+        self.store = BlobStore()
+        self.key = self.store.put(make_png(), 'image/png')
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+    
+    def test_generate_variants_all_sizes(self):
+        """Test génération des miniatures à chaque largeur"""
+        from PIL import Image
+        variants = generate_image_variants(self.key)
+        
+        self.assertEqual(set(variants), set(IMAGE_SIZES))
+        for size, key in variants.items():
+            self.assertTrue(key.endswith('.webp'))
+            with self.store.open(key) as f, Image.open(f) as img:
+                self.assertEqual(img.format, 'WEBP')
+                self.assertEqual(img.width, IMAGE_SIZES[size])
+    
+    def test_no_upscaling(self):
+        """Test qu'une petite image n'est pas agrandie"""
+        small_key = self.store.put(make_png(300, 200), 'image/png')
+        
+        variants = generate_image_variants(small_key)
+        
+        self.assertEqual(set(variants), {'small'})
+    
+    def test_svg_and_missing_images_skipped(self):
+        """Test placeholder SVG et clé inconnue"""
+        svg_key = self.store.put(b'<svg></svg>', 'image/svg+xml')
+        
+        self.assertEqual(generate_image_variants(svg_key), {})
+        self.assertEqual(generate_image_variants('0' * 64 + '.png'), {})
+    
+    def test_feed_size_parameter(self):
+        """Test du paramètre size= sur le feed public"""
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        variants = generate_image_variants(self.key)
+        Dream.objects.create(
+            user=other,
+            transcription="Rêve public avec miniatures",
+            reformed_prompt="public dream",
+            image_key=self.key,
+            image_variants=variants,
+            privacy='public'
+        )
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        
+        small = client.get('/api/dreams/feed/public?size=small').data['dreams'][0]
+        original = client.get('/api/dreams/feed/public').data['dreams'][0]
+        unknown = client.get('/api/dreams/feed/public?size=huge').data['dreams'][0]
+        
+        self.assertTrue(small['image_url'].endswith(variants['small']))
+        self.assertTrue(original['image_url'].endswith(self.key))
+        self.assertTrue(unknown['image_url'].endswith(self.key))
+    
+    def test_backfill_command(self):
+        """Test de la commande de génération des miniatures existantes"""
+        dream = Dream.objects.create(
+            user=self.user,
+            transcription="Rêve sans miniatures",
+            reformed_prompt="dream",
+            image_key=self.key
+        )
+        
+        call_command('generate_dream_thumbnails', stdout=io.StringIO())
+        
+        dream.refresh_from_db()
+        self.assertEqual(set(dream.image_variants), set(IMAGE_SIZES))
@@ -0,0 +1,222 @@
+# dreams/tests/test_jobs.py
+"""Tests pour la file d'attente de génération asynchrone"""
+
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from dreams.models import Dream, DreamJob
+from dreams.jobs import (
+    enqueue_dream_job, claim_next_job, process_job, purge_finished_jobs, run_worker, serialize_job
+)
+from dreams.features.steps.test_storage import BlobStorageTestMixin
+
+User = get_user_model()
+
+EMOTION = {'emotion': 'heureux', 'confidence': 0.8, 'emoji': '😊', 'color': '#10b981'}
+
+
+class JobMediaTestMixin(BlobStorageTestMixin):
+    """Isole les fichiers audio des tâches dans un répertoire temporaire"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.media_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.media_override.enable()
+
+    def tearDown(self):
+        self.media_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        super().tearDown()
+
+    def create_test_audio_file(self, filename="test.mp3"):
+        return SimpleUploadedFile(filename, b'fake audio content' * 1000, content_type="audio/mpeg")
+
+
+@patch('dreams.pipeline.analyze_dream_emotion', return_value=EMOTION)
+@patch('dreams.pipeline.generate_image_base64', return_value="data:image/png;base64,dGVzdGltYWdl")
+@patch('dreams.pipeline.rephrase_text', return_value="Prompt reformulé")
+@patch('dreams.pipeline.transcribe_audio', return_value="Transcription de test assez longue")
+class DreamJobWorkerTests(JobMediaTestMixin, TestCase):
+    """Tests du worker"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def test_generate_job_completes(self, *mocks):
+        """Test d'une tâche de preview traitée par le worker"""
+        job = enqueue_dream_job(self.user, 'generate', self.create_test_audio_file())
+        audio_path = job.audio.path
+        self.assertTrue(os.path.exists(audio_path))
+
+        processed = run_worker(once=True)
+
+        job.refresh_from_db()
+        self.assertEqual(processed, 1)
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.result['transcription'], "Transcription de test assez longue")
+        self.assertEqual(job.result['emotion']['emotion'], 'heureux')
+        self.assertEqual(set(job.completed_stages), {'transcription', 'rephrase', 'emotion', 'image'})
+        self.assertTrue(all(step['status'] == 'done' for step in serialize_job(job)['progress']))
+        # L'audio est supprimé après traitement
+        self.assertFalse(os.path.exists(audio_path))
+        self.assertFalse(Dream.objects.exists())
+
+    def test_result_keeps_image_key_not_base64(self, *mocks):
+        """Test que l'image du résultat est stockée en blob, seule sa clé reste en base"""
+        job = enqueue_dream_job(self.user, 'generate', self.create_test_audio_file())
+
+        run_worker(once=True)
+
+        job.refresh_from_db()
+        key = job.result['image_key']
+        self.assertNotIn('image', job.result)
+        self.assertNotIn('img_b64', job.result['preview_data'])
+        self.assertEqual(job.result['preview_data']['image_key'], key)
+        self.assertEqual(job.result['image_url'], reverse('dream_image', args=[key]))
+
+    def test_finished_jobs_purged(self, *mocks):
+        """Test que les anciennes tâches terminées sont supprimées, pas celles en cours"""
+        old = enqueue_dream_job(self.user, 'generate', self.create_test_audio_file())
+        pending = enqueue_dream_job(self.user, 'generate', self.create_test_audio_file())
+        DreamJob.objects.filter(job_id=old.job_id).update(
+            status='done', finished_at=timezone.now() - timedelta(days=2)
+        )
+
+        self.assertEqual(purge_finished_jobs(), 1)
+        self.assertEqual(list(DreamJob.objects.values_list('job_id', flat=True)), [pending.job_id])
+
+    @patch('dreams.utils.analyze_dream_emotion', return_value=EMOTION)
+    def test_create_job_saves_dream(self, *mocks):
+        """Test d'une tâche de création qui sauvegarde le rêve"""
+        job = enqueue_dream_job(self.user, 'create', self.create_test_audio_file())
+
+        run_worker(once=True)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        dream = Dream.objects.get(dream_id=job.result['dream_id'])
+        self.assertEqual(dream.user, self.user)
+        self.assertEqual(dream.privacy, 'private')
+
+    def test_failed_job_records_stage(self, mock_transcribe, mock_rephrase, *mocks):
+        """Test d'une tâche en échec"""
+        mock_rephrase.side_effect = RuntimeError("Groq indisponible")
+        job = enqueue_dream_job(self.user, 'generate', self.create_test_audio_file())
+
+        run_worker(once=True)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.stage, 'rephrase')
+        self.assertIn("Groq indisponible", job.error)
+        progress = {step['stage']: step['status'] for step in serialize_job(job)['progress']}
+        self.assertEqual(progress['transcription'], 'done')
+        self.assertEqual(progress['rephrase'], 'failed')
+        self.assertEqual(progress['image'], 'pending')
+
+    def test_job_claimed_only_once(self, *mocks):
+        """Test qu'une tâche n'est réclamée que par un seul worker"""
+        enqueue_dream_job(self.user, 'generate', self.create_test_audio_file())
+
+        first = claim_next_job('worker-1')
+        second = claim_next_job('worker-2')
+
+        self.assertIsNotNone(first)
+        self.assertIsNone(second)
+        self.assertEqual(first.worker, 'worker-1')
+        self.assertEqual(first.attempts, 1)
+
+    def test_stale_job_requeued(self, *mocks):
+        """Test qu'une tâche abandonnée (worker tué) est reprise"""
+        job = enqueue_dream_job(self.user, 'generate', self.create_test_audio_file())
+        claim_next_job('dead-worker')
+        DreamJob.objects.filter(job_id=job.job_id).update(started_at=timezone.now() - timedelta(hours=1))
+
+        reclaimed = claim_next_job('worker-2')
+
+        self.assertEqual(reclaimed.job_id, job.job_id)
+        self.assertEqual(reclaimed.attempts, 2)
+        process_job(reclaimed)
+        reclaimed.refresh_from_db()
+        self.assertEqual(reclaimed.status, 'done')
+
+
+class DreamJobAPITests(JobMediaTestMixin, APITestCase):
+    """Tests des APIs asynchrones"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    @patch('dreams.pipeline.transcribe_audio')
+    def test_generate_async_returns_job(self, mock_transcribe):
+        """Test que le POST asynchrone répond immédiatement avec un job_id"""
+        response = self.client.post('/api/dreams/generate?async=1', {
+            'audio': self.create_test_audio_file()
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertIn('job_id', response.data)
+        self.assertIn(response.data['job_id'], response.data['status_url'])
+        mock_transcribe.assert_not_called()
+
+        job = DreamJob.objects.get(job_id=response.data['job_id'])
+        self.assertEqual(job.kind, 'generate')
+        self.assertEqual(job.status, 'pending')
+
+    def test_create_async_form_field(self):
+        """Test du mode asynchrone via le champ de formulaire"""
+        response = self.client.post('/api/dreams/create', {
+            'audio': self.create_test_audio_file(),
+            'async': 'true'
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(DreamJob.objects.get().kind, 'create')
+
+    def test_job_status_endpoint(self):
+        """Test du polling de statut"""
+        job = enqueue_dream_job(self.user, 'generate', self.create_test_audio_file())
+
+        response = self.client.get(f'/api/dreams/jobs/{job.job_id}')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertEqual([step['stage'] for step in response.data['progress']],
+                         ['transcription', 'rephrase', 'emotion', 'image'])
+        self.assertIsNone(response.data['result'])
+
+    def test_job_status_other_user_404(self):
+        """Test qu'on ne peut pas suivre la tâche d'un autre utilisateur"""
+        job = enqueue_dream_job(self.other, 'generate', self.create_test_audio_file())
+
+        response = self.client.get(f'/api/dreams/jobs/{job.job_id}')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
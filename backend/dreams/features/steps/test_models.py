@@ -85,3 +85,15 @@ class DreamModelTests(TestCase):
         self.assertEqual(dream.privacy, 'private')  # Valeur par défaut
         self.assertIsNone(dream.emotion)  # Peut être null
         self.assertIsNone(dream.emotion_confidence)
+    
+    def test_create_dream_updates_user_stats(self):
+        """Test que la création d'un rêve met à jour les stats de l'auteur"""
+        for _ in range(2):
+            Dream.objects.create(
+                user=self.user,
+                transcription="Test minimal",
+                reformed_prompt="test"
+            )
+        
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.dreams_count, 2)
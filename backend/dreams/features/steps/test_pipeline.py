@@ -0,0 +1,144 @@
+# dreams/tests/test_pipeline.py
+"""Tests pour l'orchestration du pipeline de génération"""
+
+import threading
+from unittest.mock import patch
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from dreams.models import Dream
+from dreams.pipeline import generate_dream, create_dream
+from dreams.utils import Stage, run_stages, PipelineStageError, emotion_data_from_values
+from dreams.features.steps.test_storage import BlobStorageTestMixin
+
+User = get_user_model()
+
+EMOTION = {'emotion': 'heureux', 'confidence': 0.8, 'emoji': '😊', 'color': '#10b981'}
+
+
+class RunStagesTests(TestCase):
+    """Tests de l'orchestrateur d'étapes"""
+
+    def test_independent_stages_run_concurrently(self):
+        """Test que deux étapes indépendantes tournent en même temps"""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait_for_sibling(results):
+            barrier.wait()  # Bloquerait (timeout) si les étapes étaient séquentielles
+            return results['source'] * 2
+
+        results, timings = run_stages([
+            Stage('source', lambda r: 21),
+            Stage('left', wait_for_sibling, after=['source']),
+            Stage('right', wait_for_sibling, after=['source']),
+        ])
+
+        self.assertEqual(results['left'], 42)
+        self.assertEqual(results['right'], 42)
+        self.assertEqual(set(timings), {'source', 'left', 'right'})
+
+    def test_dependencies_respected(self):
+        """Test de l'ordre imposé par les dépendances"""
+        events = []
+
+        run_stages([
+            Stage('b', lambda r: r['a'] + 1, after=['a']),
+            Stage('a', lambda r: 1),
+        ], on_stage=lambda name, event: events.append((name, event)))
+
+        self.assertLess(events.index(('a', 'done')), events.index(('b', 'start')))
+
+    def test_inline_stage_runs_in_calling_thread(self):
+        """Test que les étapes inline (base de données) restent dans le thread appelant"""
+        results, _ = run_stages([Stage('db', lambda r: threading.get_ident(), inline=True)])
+
+        self.assertEqual(results['db'], threading.get_ident())
+
+    def test_stage_error_reports_stage(self):
+        """Test qu'une erreur indique l'étape en cause"""
+        def fail(results):
+            raise RuntimeError("boom")
+
+        with self.assertRaises(PipelineStageError) as ctx:
+            run_stages([Stage('ok', lambda r: 1), Stage('broken', fail, after=['ok'])])
+
+        self.assertEqual(ctx.exception.stage, 'broken')
+        self.assertIn("boom", str(ctx.exception))
+
+    def test_unresolvable_dependencies(self):
+        """Test d'une dépendance inexistante"""
+        with self.assertRaises(ValueError):
+            run_stages([Stage('orphan', lambda r: 1, after=['missing'])])
+
+
+@patch('dreams.pipeline.analyze_dream_emotion', return_value=EMOTION)
+@patch('dreams.pipeline.generate_image_base64', return_value="data:image/png;base64,dGVzdGltYWdl")
+@patch('dreams.pipeline.rephrase_text', return_value="Prompt reformulé")
+@patch('dreams.pipeline.transcribe_audio', return_value="Transcription de test assez longue")
+class DreamPipelineTests(BlobStorageTestMixin, TestCase):
+    """Tests des pipelines de génération"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def test_generate_reports_timings(self, *mocks):
+        """Test des durées par étape et de l'émotion dans preview_data"""
+        result = generate_dream(b'audio')
+
+        self.assertEqual(set(result['timings']), {'transcription', 'rephrase', 'emotion', 'image'})
+        self.assertEqual(result['preview_data']['emotion'], 'heureux')
+        self.assertEqual(result['preview_data']['emotion_confidence'], 0.8)
+
+    @patch('dreams.utils.analyze_dream_emotion')
+    def test_create_reuses_emotion(self, mock_save_emotion, *mocks):
+        """Test que la sauvegarde ne relance pas l'analyse émotionnelle"""
+        result = create_dream(self.user, b'audio')
+
+        mock_save_emotion.assert_not_called()
+        dream = Dream.objects.get(dream_id=result['dream_id'])
+        self.assertEqual(dream.emotion, 'heureux')
+        self.assertEqual(dream.emotion_confidence, 0.8)
+
+
+class DreamSaveEmotionReuseTests(BlobStorageTestMixin, APITestCase):
+    """Tests de la réutilisation de l'émotion de la preview"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    @patch('dreams.utils.analyze_dream_emotion')
+    def test_save_with_preview_emotion(self, mock_emotion):
+        """Test sauvegarde avec l'émotion déjà calculée"""
+        response = self.client.post('/api/dreams/save', {
+            'transcription': 'Transcription de test pour sauvegarde',
+            'reformed_prompt': 'Test prompt for save',
+            'img_b64': 'data:image/png;base64,dGVzdGltYWdl',
+            'emotion': 'mystérieux',
+            'emotion_confidence': 0.9
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        mock_emotion.assert_not_called()
+        dream = Dream.objects.get(dream_id=response.data['dream_id'])
+        self.assertEqual(dream.emotion, 'mystérieux')
+        self.assertEqual(dream.emotion_emoji, '🔮')
+
+    def test_emotion_data_from_values_validation(self):
+        """Test validation des émotions reçues du client"""
+        self.assertIsNone(emotion_data_from_values('inconnue', 0.9))
+        self.assertEqual(emotion_data_from_values('triste', 7)['confidence'], 1.0)
+        self.assertEqual(emotion_data_from_values('triste', 'abc')['confidence'], 0.5)
@@ -0,0 +1,100 @@
+# dreams/tests/test_retry.py
+"""Tests pour le moteur de tentatives à budget (retry, backoff, hedging)"""
+
+import random
+import threading
+import time
+from django.test import SimpleTestCase
+
+from dreams.retry import RetryBudgetExceeded, AttemptCancelled, backoff_delay, call_with_retries
+
+
+def succeed(value):
+    return lambda timeout, cancelled: value
+
+
+def fail(message):
+    def attempt(timeout, cancelled):
+        raise ValueError(message)
+    return attempt
+
+
+class RetryEngineTests(SimpleTestCase):
+    """Tests de call_with_retries"""
+
+    def test_first_success_wins(self):
+        """Test que les tentatives suivantes ne sont pas lancées après un succès"""
+        calls = []
+
+        def tracked(timeout, cancelled):
+            calls.append(timeout)
+            return 'image'
+
+        result = call_with_retries([tracked, fail("jamais appelée")], deadline=5, attempt_timeout=2)
+
+        self.assertEqual(result, 'image')
+        self.assertEqual(calls, [2])
+
+    def test_failures_then_success(self):
+        """Test du passage aux tentatives suivantes après des échecs"""
+        result = call_with_retries([fail("503"), fail("trop petite"), succeed('image')],
+                                   deadline=5, attempt_timeout=2, backoff_base=0.01)
+
+        self.assertEqual(result, 'image')
+
+    def test_all_failures_raise_with_errors(self):
+        """Test que l'échec de toutes les tentatives lève RetryBudgetExceeded"""
+        with self.assertRaises(RetryBudgetExceeded) as ctx:
+            call_with_retries([fail("a"), fail("b")], deadline=5, attempt_timeout=2, backoff_base=0.01)
+
+        self.assertEqual([str(e) for e in ctx.exception.errors], ["a", "b"])
+
+    def test_deadline_bounds_total_time(self):
+        """Test que l'échéance globale borne la durée, même si une tentative bloque"""
+        def slow(timeout, cancelled):
+            cancelled.wait(5)
+            raise AttemptCancelled()
+
+        started = time.monotonic()
+        with self.assertRaises(RetryBudgetExceeded):
+            call_with_retries([slow, succeed('trop tard')], deadline=0.2, attempt_timeout=30)
+
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_attempt_timeout_bounded_by_deadline(self):
+        """Test que le timeout d'une tentative ne dépasse pas le budget restant"""
+        timeouts = []
+
+        def tracked(timeout, cancelled):
+            timeouts.append(timeout)
+            return 'image'
+
+        call_with_retries([tracked], deadline=3, attempt_timeout=30)
+
+        self.assertLessEqual(timeouts[0], 3)
+
+    def test_hedged_request_wins_and_cancels_slow_one(self):
+        """Test du hedging : la seconde URL part en parallèle et la première est annulée"""
+        slow_cancelled = threading.Event()
+
+        def slow(timeout, cancelled):
+            cancelled.wait(5)
+            slow_cancelled.set()
+            raise AttemptCancelled()
+
+        started = time.monotonic()
+        result = call_with_retries([slow, succeed('image alternative')], deadline=5, attempt_timeout=5,
+                                   hedge_after=0.05)
+
+        self.assertEqual(result, 'image alternative')
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertTrue(slow_cancelled.wait(1))
+
+    def test_backoff_delay_has_jitter_and_cap(self):
+        """Test du backoff exponentiel avec jitter complet, plafonné"""
+        rng = random.Random(42)
+        delays = [backoff_delay(failures, 0.5, 4.0, rng) for failures in range(1, 8) for _ in range(20)]
+
+        self.assertTrue(all(0 <= delay <= 4.0 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+        self.assertLessEqual(max(backoff_delay(1, 0.5, 4.0, rng) for _ in range(20)), 0.5)
@@ -0,0 +1,197 @@
+# dreams/tests/test_storage.py
+"""Tests pour le stockage des images adressé par contenu"""
+
+import base64
+import hashlib
+import shutil
+import tempfile
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from dreams.models import Dream
+from dreams.storage import BlobStore, decode_data_uri, store_data_uri, blob_as_data_uri
+from dreams.utils import save_in_db, export_dream_as_html
+
+User = get_user_model()
+
+PNG_BYTES = b'\x89PNG\r\n\x1a\n' + b'fake png payload' * 10
+PNG_DATA_URI = "data:image/png;base64," + base64.b64encode(PNG_BYTES).decode('utf-8')
+PNG_KEY = hashlib.sha256(PNG_BYTES).hexdigest() + '.png'
+
+
+class BlobStorageTestMixin:
+    """Isole le stockage des blobs dans un répertoire temporaire"""
+
+    def setUp(self):
+        super().setUp()
+        self.blob_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(DREAM_BLOB_ROOT=self.blob_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.blob_root, ignore_errors=True)
+        super().tearDown()
+
+
+class BlobStoreTests(BlobStorageTestMixin, TestCase):
+    """Tests du backend de stockage local"""
+
+    def test_put_returns_content_hash_key(self):
+        """Test que la clé est le SHA-256 du contenu"""
+        key = BlobStore().put(PNG_BYTES, 'image/png')
+
+        self.assertEqual(key, PNG_KEY)
+        self.assertTrue(BlobStore().exists(key))
+        self.assertEqual(BlobStore().read(key), PNG_BYTES)
+
+    def test_put_is_deduplicated(self):
+        """Test que deux images identiques partagent le même fichier"""
+        store = BlobStore()
+        first = store.put(PNG_BYTES, 'image/png')
+        second = store.put(PNG_BYTES, 'image/png')
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(list(store.root.rglob('*.png'))), 1)
+
+    def test_path_is_sharded(self):
+        """Test du découpage en sous-répertoires"""
+        path = BlobStore().path(PNG_KEY)
+
+        self.assertEqual(path.parent.name, PNG_KEY[2:4])
+        self.assertEqual(path.parent.parent.name, PNG_KEY[:2])
+
+    def test_invalid_key_rejected(self):
+        """Test qu'une clé arbitraire ne permet pas de sortir du stockage"""
+        with self.assertRaises(ValueError):
+            BlobStore().path('../../etc/passwd')
+        self.assertFalse(BlobStore().exists('../../etc/passwd'))
+
+    def test_unsupported_content_type(self):
+        """Test refus d'un type non image"""
+        with self.assertRaises(ValueError):
+            BlobStore().put(b'data', 'text/html')
+
+    def test_decode_data_uri_invalid(self):
+        """Test décodage de data URI invalides"""
+        self.assertIsNone(decode_data_uri(''))
+        self.assertIsNone(decode_data_uri('test'))
+        self.assertIsNone(decode_data_uri('data:image/png;base64,!!!'))
+        self.assertIsNone(decode_data_uri('data:text/html;base64,dGVzdA=='))
+
+    def test_data_uri_round_trip(self):
+        """Test stockage puis reconstruction d'un data URI"""
+        key = store_data_uri(PNG_DATA_URI)
+
+        self.assertEqual(blob_as_data_uri(key), PNG_DATA_URI)
+
+
+class BlobStorageDreamTests(BlobStorageTestMixin, TestCase):
+    """Tests de l'intégration du stockage avec les rêves"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    @patch('dreams.utils.analyze_dream_emotion')
+    def test_save_in_db_stores_blob(self, mock_emotion):
+        """Test que save_in_db écrit l'image dans le stockage"""
+        mock_emotion.return_value = {'emotion': 'heureux', 'confidence': 0.8, 'emoji': '😊', 'color': '#10b981'}
+
+        dream = save_in_db(self.user, "Un rêve de test assez long", "test prompt", PNG_DATA_URI)
+
+        self.assertEqual(dream.image_key, PNG_KEY)
+        self.assertIsNone(dream.img_b64)
+        self.assertEqual(dream.image_url, f'/images/{PNG_KEY}')
+        self.assertTrue(dream.has_image)
+
+    @patch('dreams.utils.analyze_dream_emotion')
+    def test_save_in_db_keeps_undecodable_legacy(self, mock_emotion):
+        """Test qu'une image non décodable reste en legacy"""
+        mock_emotion.return_value = {'emotion': 'neutre', 'confidence': 0.5, 'emoji': '😐', 'color': '#6b7280'}
+
+        dream = save_in_db(self.user, "Un rêve de test assez long", "test prompt", "not-a-data-uri")
+
+        self.assertIsNone(dream.image_key)
+        self.assertEqual(dream.image_url, "not-a-data-uri")
+
+    def test_export_inlines_blob_image(self):
+        """Test que l'export HTML reste autonome (image inline)"""
+        dream = Dream.objects.create(
+            user=self.user,
+            transcription="Rêve avec image stockée",
+            reformed_prompt="stored image",
+            image_key=store_data_uri(PNG_DATA_URI),
+        )
+
+        content = export_dream_as_html(dream, self.user).content.decode('utf-8')
+
+        self.assertIn(PNG_DATA_URI, content)
+
+
+class DreamImageViewTests(BlobStorageTestMixin, APITestCase):
+    """Tests du service des images par URL"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.key = store_data_uri(PNG_DATA_URI)
+        self.client = APIClient()
+
+    def test_image_served_with_cache_headers(self):
+        """Test service de l'image avec ETag et Cache-Control"""
+        response = self.client.get(f'/api/dreams/images/{self.key}')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['ETag'], f'"{self.key.split(".")[0]}"')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(b''.join(response.streaming_content), PNG_BYTES)
+
+    def test_image_not_modified(self):
+        """Test réponse 304 avec If-None-Match"""
+        etag = f'"{self.key.split(".")[0]}"'
+        response = self.client.get(f'/api/dreams/images/{self.key}', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_unknown_image_404(self):
+        """Test image inexistante"""
+        response = self.client.get(f'/api/dreams/images/{"0" * 64}.png')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_public_feed_returns_image_url(self):
+        """Test que le feed renvoie une URL courte et non le base64"""
+        Dream.objects.create(
+            user=self.other,
+            transcription="Rêve public avec image",
+            reformed_prompt="public dream",
+            image_key=self.key,
+            privacy='public'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get('/api/dreams/feed/public')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        dream_data = response.data['dreams'][0]
+        self.assertNotIn('img_b64', dream_data)
+        self.assertTrue(dream_data['image_url'].endswith(f'/images/{self.key}'))
+        self.assertTrue(dream_data['image_url'].startswith('http'))
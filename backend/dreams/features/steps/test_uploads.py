@@ -0,0 +1,179 @@
+# dreams/tests/test_uploads.py
+"""Tests pour l'envoi par segments pendant la dictée"""
+
+import os
+from datetime import timedelta
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from dreams.models import DreamUpload, DreamUploadSegment
+from dreams.uploads import create_upload, purge_stale_uploads
+from dreams.features.steps.test_jobs import JobMediaTestMixin, EMOTION
+from dreams.features.steps.test_audio_probe import make_wav
+
+User = get_user_model()
+
+SEGMENT_TEXTS = {
+    b'segment zero': "Je volais au-dessus",
+    b'segment un': "d'une forêt",
+    b'segment deux': "de cristal",
+    b'segment vite': "Je courais vite",
+    b'segment repete': "vite vite vers la mer",
+}
+
+
+def fake_transcribe(audio_file, fallback=True):
+    # Contenu inconnu : échec Groq (None, pas de texte de secours par segment)
+    return SEGMENT_TEXTS.get(audio_file.read().rsplit(b'|', 1)[-1])
+
+
+def segment(content):
+    # WAV d'une seconde (durée lisible dans les en-têtes), marqueur du texte à la fin
+    return SimpleUploadedFile("segment.wav", make_wav(1) + b'|' + content, content_type="audio/wav")
+
+
+@patch('dreams.pipeline.analyze_dream_emotion', return_value=EMOTION)
+@patch('dreams.pipeline.generate_image_base64', return_value="data:image/png;base64,dGVzdGltYWdl")
+@patch('dreams.pipeline.rephrase_text', return_value="Prompt reformulé")
+@patch('dreams.uploads.transcribe_audio', side_effect=fake_transcribe)
+class DreamUploadAPITests(JobMediaTestMixin, APITestCase):
+    """Tests des APIs d'envoi par segments"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def open_upload(self):
+        response = self.client.post('/api/dreams/generate/uploads')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def send(self, upload, index, content):
+        url = upload['segment_url'].replace('{index}', str(index))
+        return self.client.put(url, {'audio': segment(content)}, format='multipart')
+
+    def test_segments_then_finish(self, mock_transcribe, *mocks):
+        """Test du parcours complet : segments transcrits dès réception puis recollés"""
+        upload = self.open_upload()
+        for index, content in enumerate([b'segment zero', b'segment un', b'segment deux']):
+            response = self.send(upload, index, content)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            self.assertEqual(response.data['received'], index + 1)
+
+        paths = [s.audio.path for s in DreamUploadSegment.objects.all()]
+        response = self.client.post(upload['finish_url'], {'segment_count': 3}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['transcription'], "Je volais au-dessus d'une forêt de cristal")
+        self.assertEqual(response.data['prompt'], "Prompt reformulé")
+        # Envoi et fichiers supprimés une fois la preview générée
+        self.assertFalse(DreamUpload.objects.exists())
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+
+    def test_boundary_words_kept(self, *mocks):
+        """Test que les mots répétés entre deux segments sont conservés (pas de recouvrement)"""
+        upload = self.open_upload()
+        self.send(upload, 0, b'segment vite')
+        self.send(upload, 1, b'segment repete')
+
+        response = self.client.post(upload['finish_url'], {'segment_count': 2}, format='json')
+
+        self.assertEqual(response.data['transcription'], "Je courais vite vite vite vers la mer")
+
+    def test_unknown_duration_rejected(self, *mocks):
+        """Test qu'un segment sans durée lisible est refusé (limite de durée inapplicable)"""
+        upload = self.open_upload()
+        response = self.client.put(upload['segment_url'].replace('{index}', '0'), {
+            'audio': SimpleUploadedFile("segment.webm", b'fake audio content' * 100, content_type="audio/webm")
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Durée', response.data['error'])
+
+    def test_resent_segment_replaces_previous(self, *mocks):
+        """Test qu'un segment renvoyé (nouvel essai) remplace le précédent"""
+        upload = self.open_upload()
+        self.send(upload, 0, b'segment un')
+        self.send(upload, 0, b'segment zero')
+
+        response = self.client.post(upload['finish_url'], {'segment_count': 1}, format='json')
+
+        self.assertEqual(response.data['transcription'], "Je volais au-dessus")
+
+    def test_failed_segment_single_fallback(self, mock_transcribe, *mocks):
+        """Test qu'un segment non transcrit donne un seul texte de secours, pas un par segment"""
+        upload = self.open_upload()
+        self.send(upload, 0, b'segment zero')
+        self.send(upload, 1, b'segment perdu')
+
+        with patch('dreams.uploads.transcribe_audio_fallback', return_value="Texte de secours") as mock_fallback:
+            response = self.client.post(upload['finish_url'], {'segment_count': 2}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['transcription'], "Texte de secours")
+        mock_fallback.assert_called_once()
+        for call in mock_transcribe.call_args_list:
+            self.assertFalse(call.kwargs['fallback'])
+
+    def test_missing_segment_rejected(self, *mocks):
+        """Test que finish refuse un envoi incomplet"""
+        upload = self.open_upload()
+        self.send(upload, 0, b'segment zero')
+        self.send(upload, 2, b'segment deux')
+
+        response = self.client.post(upload['finish_url'], {'segment_count': 3}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('[1]', response.data['details'][0])
+        self.assertTrue(DreamUpload.objects.exists())  # Le client peut renvoyer le segment manquant
+
+    @patch('dreams.utils.MAX_AUDIO_DURATION_MINUTES', 1)
+    @patch('dreams.uploads.MAX_AUDIO_DURATION_MINUTES', 1)
+    def test_total_duration_limited(self, *mocks):
+        """Test que la durée maximale s'applique à l'enregistrement entier"""
+        upload = self.open_upload()
+        url = upload['segment_url']
+        for index in range(2):
+            response = self.client.put(url.replace('{index}', str(index)), {
+                'audio': SimpleUploadedFile("segment.wav", make_wav(40), content_type="audio/wav")
+            }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('trop long', response.data['error'])
+
+    def test_invalid_segment_rejected(self, *mocks):
+        """Test qu'un segment invalide est refusé"""
+        upload = self.open_upload()
+        response = self.client.put(upload['segment_url'].replace('{index}', '0'), {
+            'audio': SimpleUploadedFile("segment.txt", b'texte', content_type="text/plain")
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_user_upload_not_found(self, *mocks):
+        """Test qu'un envoi n'est accessible qu'à son propriétaire"""
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        upload = create_upload(other)
+
+        response = self.client.post(f'/api/dreams/generate/uploads/{upload.upload_id}/finish',
+                                    {'segment_count': 1}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stale_uploads_purged(self, *mocks):
+        """Test que les envois abandonnés sont supprimés"""
+        upload = create_upload(self.user)
+        DreamUpload.objects.filter(pk=upload.pk).update(created_at=timezone.now() - timedelta(days=1))
+
+        self.assertEqual(purge_stale_uploads(), 1)
+        self.assertFalse(DreamUpload.objects.exists())
@@ -0,0 +1,108 @@
+# backend/dreams/feed_cache.py
+"""
+Cache des pages du feed public.
+
+Les pages sont presque identiques pour tous les lecteurs : on met en cache
+la partie partagée et on recompose la page par lecteur.
+
+- un index ordonné (dream_id, auteur) par tri, limité à FEED_CACHE_WINDOW
+  rêves : les rêves du lecteur en sont retirés puis la page est découpée
+- le rendu de chaque rêve (compteurs compris) par taille d'image
+- `user_liked` est superposé à partir d'une petite requête sur les likes
+  du lecteur pour les rêves de la page
+
+Toutes les clés portent un numéro de version : création, changement de
+privacy ou suppression d'un rêve, like, commentaire et modification du
+profil d'un auteur l'incrémentent (invalidation globale,
+`invalidate_public_feed`, voir aussi dreams/signals.py). Le backend est le cache `feeds` de
+settings.CACHES : il doit être partagé par tous les process qui lisent ou
+modifient des rêves (fichiers par défaut, Redis sur plusieurs machines).
+
+Le cache est ignoré dans une transaction en cours (ATOMIC_REQUESTS, tests) :
+seul un état validé est partagé.
+"""
+import time
+from typing import Callable, Dict, Iterable, List, Set
+
+from django.core.cache import caches
+from django.db import connection, transaction
+
+FEED_CACHE_ALIAS = 'feeds'
+
+# Nombre de rêves indexés par tri (au-delà : requête classique)
+FEED_CACHE_WINDOW = 1000
+
+_VERSION_KEY = 'feed:public:version'
+
+
+def _cache():
+    return caches[FEED_CACHE_ALIAS]
+
+
+def feed_cache_enabled() -> bool:
+    return not connection.in_atomic_block
+
+
+def current_version() -> int:
+    version = _cache().get(_VERSION_KEY)
+    if version is None:
+        # Initialisé à l'horodatage : pas de réutilisation d'une ancienne version après éviction
+        _cache().add(_VERSION_KEY, int(time.time() * 1000), None)
+        version = _cache().get(_VERSION_KEY)
+    return version
+
+
+def _key(version: int, *parts) -> str:
+    return 'feed:public:%s:%s' % (version, ':'.join(str(p) for p in parts))
+
+
+def invalidate_public_feed() -> None:
+    """
+    Rend obsolètes toutes les pages en cache (nouvelle version)
+
+    La version vit dans le cache `feeds` : avec un backend local au process
+    (LocMemCache), seul le worker ayant traité l'écriture la verrait, et un
+    rêve passé en privé resterait listé ailleurs jusqu'à FEED_CACHE_TIMEOUT.
+    """
+    def bump():
+        try:
+            _cache().incr(_VERSION_KEY)
+        except ValueError:
+            _cache().set(_VERSION_KEY, int(time.time() * 1000), None)
+
+    bump()
+    # Une lecture concurrente a pu remettre en cache l'état d'avant le commit
+    transaction.on_commit(bump)
+
+
+def get_or_build(parts: tuple, build: Callable[[], object], version: int = None):
+    """Valeur partagée en cache, construite par `build` si absente"""
+    version = version if version is not None else current_version()
+    key = _key(version, *parts)
+    value = _cache().get(key)
+    if value is None:
+        value = build()
+        _cache().set(key, value)
+    return value
+
+
+def get_or_build_many(parts: tuple, ids: Iterable[int], build: Callable[[List[int]], Dict[int, dict]],
+                      version: int = None) -> Dict[int, dict]:
+    """Valeurs par identifiant, seules les absentes sont construites (en un appel)"""
+    version = version if version is not None else current_version()
+    keys = {dream_id: _key(version, *parts, dream_id) for dream_id in ids}
+    found = _cache().get_many(keys.values())
+
+    values = {dream_id: found[key] for dream_id, key in keys.items() if key in found}
+    missing = [dream_id for dream_id in keys if dream_id not in values]
+    if missing:
+        built = build(missing)
+        _cache().set_many({keys[dream_id]: value for dream_id, value in built.items()})
+        values.update(built)
+    return values
+
+
+def liked_dream_ids(user, dream_ids: Iterable[int]) -> Set[int]:
+    """Rêves de la page likés par le lecteur (superposition de user_liked)"""
+    from social.models import DreamLike
+    return set(DreamLike.objects.filter(user=user, dream_id__in=list(dream_ids)).values_list('dream_id', flat=True))
@@ -0,0 +1,130 @@
+# backend/dreams/http_client.py
+"""
+Clients HTTP partagés pour les appels sortants (Groq, Pollinations, HuggingFace).
+
+Une session `requests` par process, avec un pool de connexions keep-alive
+par hôte : les étapes du pipeline ne repaient plus DNS + handshake TLS à
+chaque appel. Le client Groq est construit une seule fois, sur un pool
+httpx aux mêmes limites.
+
+Réglages (settings, lus à la création des clients) :
+- AI_HTTP_CONNECT_TIMEOUT / AI_HTTP_READ_TIMEOUT : timeouts par défaut (s)
+- AI_HTTP_POOL_MAXSIZE : connexions gardées ouvertes par hôte
+- AI_HTTP_RETRIES : nouvelles tentatives sur erreur de connexion et sur
+  429/5xx pour les requêtes idempotentes (GET), avec backoff exponentiel
+"""
+import threading
+from typing import Optional, Tuple, Union
+
+import httpx
+import requests
+from django.conf import settings
+from groq import Groq
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = 'DreamShare/1.0'
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+Timeout = Union[float, Tuple[float, float]]
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_groq_clients = {}
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def default_timeout() -> Tuple[float, float]:
+    """(connexion, lecture) en secondes"""
+    return (float(_setting('AI_HTTP_CONNECT_TIMEOUT', 5)), float(_setting('AI_HTTP_READ_TIMEOUT', 30)))
+
+
+def _retry_policy() -> Retry:
+    retries = int(_setting('AI_HTTP_RETRIES', 2))
+    return Retry(
+        total=retries,
+        connect=retries,
+        read=0,  # Une lecture interrompue peut avoir été traitée : pas de renvoi automatique
+        status=retries,
+        backoff_factor=0.5,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    pool_size = int(_setting('AI_HTTP_POOL_MAXSIZE', 10))
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=pool_size, max_retries=_retry_policy())
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+def get_session() -> requests.Session:
+    """Session partagée par le process (pool de connexions thread-safe)"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def request(method: str, url: str, timeout: Optional[Timeout] = None, **kwargs) -> requests.Response:
+    return get_session().request(method, url, timeout=timeout or default_timeout(), **kwargs)
+
+
+def get(url: str, timeout: Optional[Timeout] = None, **kwargs) -> requests.Response:
+    return request('GET', url, timeout=timeout, **kwargs)
+
+
+def post(url: str, timeout: Optional[Timeout] = None, **kwargs) -> requests.Response:
+    return request('POST', url, timeout=timeout, **kwargs)
+
+
+def get_groq_client(api_key: str) -> Groq:
+    """Client Groq réutilisé (un par clé d'API), sur un pool httpx keep-alive"""
+    client = _groq_clients.get(api_key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _groq_clients.get(api_key)
+        if client is None:
+            connect, read = default_timeout()
+            pool_size = int(_setting('AI_HTTP_POOL_MAXSIZE', 10))
+            timeout = httpx.Timeout(read, connect=connect)
+            client = Groq(
+                api_key=api_key,
+                timeout=timeout,
+                max_retries=int(_setting('AI_HTTP_RETRIES', 2)),
+                http_client=httpx.Client(
+                    timeout=timeout,
+                    limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                ),
+            )
+            _groq_clients[api_key] = client
+    return client
+
+
+def reset_clients() -> None:
+    """Ferme les sessions et clients (tests, changement de réglages)"""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        for client in _groq_clients.values():
+            try:
+                client.close()
+            except Exception:
+                pass
+        _groq_clients.clear()
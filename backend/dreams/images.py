@@ -0,0 +1,58 @@
+# backend/dreams/images.py
+"""
+Dérivés (miniatures WebP) des images de rêves.
+
+Les miniatures sont stockées dans le même stockage adressé par contenu que
+l'original (voir storage.py) et référencées par Dream.image_variants.
+"""
+import io
+from typing import Dict, Optional
+
+from .storage import BlobStore, get_blob_store
+
+# Tailles disponibles via le paramètre `size=` des feeds (largeur en px)
+IMAGE_SIZES = {
+    'small': 256,
+    'medium': 512,
+}
+WEBP_QUALITY = 80
+
+
+def resolve_image_size(size: Optional[str]) -> Optional[str]:
+    """Normalise le paramètre `size=` (None = image originale)."""
+    return size if size in IMAGE_SIZES else None
+
+
+def generate_image_variants(image_key: str, store: Optional[BlobStore] = None) -> Dict[str, str]:
+    """Génère les miniatures WebP d'une image stockée. Retourne {taille: clé}."""
+    try:
+        from PIL import Image
+    except ImportError:
+        print("⚠️ Pillow non installé, pas de miniatures")
+        return {}
+
+    store = store or get_blob_store()
+    # Les placeholders SVG sont vectoriels : pas de miniature
+    if not image_key or image_key.endswith('.svg') or not store.exists(image_key):
+        return {}
+
+    variants = {}
+    try:
+        with store.open(image_key) as f, Image.open(f) as img:
+            img.load()
+            img = img.convert('RGBA' if img.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+            for size, width in IMAGE_SIZES.items():
+                if img.width <= width:
+                    continue  # Pas d'agrandissement : l'original suffit
+                height = max(1, round(img.height * width / img.width))
+                thumbnail = img.resize((width, height), Image.LANCZOS)
+
+                buffer = io.BytesIO()
+                thumbnail.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+                variants[size] = store.put(buffer.getvalue(), 'image/webp')
+    except Exception as e:
+        print(f"❌ Erreur génération miniatures pour {image_key}: {e}")
+        return {}
+
+    return variants
@@ -0,0 +1,211 @@
+# backend/dreams/jobs.py
+"""
+File d'attente des générations de rêves, stockée en base (sans broker).
+
+Les vues créent un DreamJob et répondent immédiatement ; le worker
+(`python manage.py run_dream_worker`) réclame les tâches une par une et
+exécute le pipeline (voir pipeline.py) en enregistrant chaque étape.
+"""
+import os
+import socket
+import time
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import DreamJob
+from .pipeline import GENERATE_STAGES, CREATE_STAGES, generate_dream, create_dream
+from .storage import store_data_uri
+from .utils import PipelineStageError
+
+JOB_STAGES = {
+    'generate': GENERATE_STAGES,
+    'create': CREATE_STAGES,
+}
+
+# Une tâche "running" sans nouvelles depuis ce délai est considérée abandonnée
+# (worker tué) et remise en file, dans la limite de JOB_MAX_ATTEMPTS
+JOB_STALE_AFTER = timedelta(minutes=getattr(settings, 'DREAM_JOB_STALE_MINUTES', 10))
+JOB_MAX_ATTEMPTS = getattr(settings, 'DREAM_JOB_MAX_ATTEMPTS', 3)
+# Tâches terminées ou en échec supprimées après ce délai (le client a eu le temps de lire le résultat)
+JOB_RETENTION = timedelta(hours=getattr(settings, 'DREAM_JOB_RETENTION_HOURS', 24))
+JOB_PURGE_INTERVAL = 3600
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Côté API
+# ──────────────────────────────────────────────────────────────────────────────
+def enqueue_dream_job(user, kind: str, audio_file) -> DreamJob:
+    """Crée une tâche en attente avec une copie de l'audio."""
+    if kind not in JOB_STAGES:
+        raise ValueError(f"Type de tâche inconnu : {kind}")
+
+    job = DreamJob(user=user, kind=kind)
+    job.audio.save(os.path.basename(getattr(audio_file, 'name', 'audio.wav')), audio_file, save=False)
+    job.save()
+    print(f"📥 Tâche {kind} en file: {job.job_id}")
+    return job
+
+
+def serialize_job(job: DreamJob) -> dict:
+    """Statut d'une tâche avec la progression étape par étape."""
+    stages = JOB_STAGES[job.kind]
+    # Les étapes lancées avant job.stage et non terminées tournent encore
+    last_started = stages.index(job.stage) if job.stage in stages else -1
+    progress = []
+    for index, stage in enumerate(stages):
+        if stage in job.completed_stages:
+            stage_status = 'done'
+        elif job.status == 'running' and index <= last_started:
+            stage_status = 'running'
+        elif stage == job.stage and job.status == 'failed':
+            stage_status = 'failed'
+        else:
+            stage_status = 'pending'
+        progress.append({'stage': stage, 'status': stage_status})
+
+    return {
+        'job_id': str(job.job_id),
+        'kind': job.kind,
+        'status': job.status,
+        'stage': job.stage,
+        'progress': progress,
+        'result': job.result if job.status == 'done' else None,
+        'error': job.error or None,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Côté worker
+# ──────────────────────────────────────────────────────────────────────────────
+def claim_next_job(worker_id: str) -> Optional[DreamJob]:
+    """Réclame la plus ancienne tâche disponible (UPDATE conditionnel, sans verrou)."""
+    stale_before = timezone.now() - JOB_STALE_AFTER
+    # Tâches abandonnées trop souvent : échec définitif
+    DreamJob.objects.filter(
+        status='running', started_at__lt=stale_before, attempts__gte=JOB_MAX_ATTEMPTS
+    ).update(status='failed', error="Abandonnée par le worker", finished_at=timezone.now())
+
+    candidates = DreamJob.objects.filter(
+        Q(status='pending') | Q(status='running', started_at__lt=stale_before),
+        attempts__lt=JOB_MAX_ATTEMPTS
+    ).order_by('created_at').values_list('job_id', 'status', 'attempts')[:10]
+
+    for job_id, job_status, attempts in candidates:
+        claimed = DreamJob.objects.filter(
+            job_id=job_id, status=job_status, attempts=attempts
+        ).update(
+            status='running', worker=worker_id, attempts=attempts + 1,
+            started_at=timezone.now(), stage='', completed_stages=[]
+        )
+        if claimed:
+            return DreamJob.objects.get(job_id=job_id)
+    return None
+
+
+def process_job(job: DreamJob) -> DreamJob:
+    """Exécute le pipeline d'une tâche réclamée et enregistre le résultat."""
+    def on_stage(stage, event):
+        # job.stage = dernière étape lancée (plusieurs peuvent tourner en parallèle)
+        if event == 'start':
+            job.stage = stage
+        else:
+            job.completed_stages = job.completed_stages + [stage]
+        # started_at sert aussi de battement de cœur pour la détection des tâches abandonnées
+        job.started_at = timezone.now()
+        job.save(update_fields=['stage', 'completed_stages', 'started_at'])
+
+    print(f"⚙️ Traitement de la tâche {job.kind} {job.job_id}")
+    try:
+        with job.audio.open('rb') as audio_file:
+            if job.kind == 'create':
+                result = create_dream(job.user, audio_file, on_stage=on_stage)
+            else:
+                result = generate_dream(audio_file, on_stage=on_stage)
+
+        job.result = compact_result(result)
+        job.status = 'done'
+        print(f"✅ Tâche terminée: {job.job_id}")
+    except Exception as e:
+        print(f"❌ Erreur tâche {job.job_id}: {e}")
+        if isinstance(e, PipelineStageError):
+            job.stage = e.stage
+        job.error = str(e)
+        job.status = 'failed'
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'stage', 'completed_stages', 'result', 'error', 'finished_at'])
+    _discard_audio(job)
+    return job
+
+
+def compact_result(result: dict) -> dict:
+    """Résultat à enregistrer : l'image part dans le stockage des blobs, seule sa clé reste en base."""
+    result = dict(result)
+    image = result.pop('image', None)
+    image_key = store_data_uri(image) if image else None
+    if image_key:
+        result['image_key'] = image_key
+        result.setdefault('image_url', reverse('dream_image', args=[image_key]))
+    elif image and not result.get('image_url'):
+        result['image_url'] = image  # Non décodable (placeholder SVG...) : conservé tel quel
+
+    if 'preview_data' in result:
+        preview = dict(result['preview_data'])
+        if image_key:
+            preview.pop('img_b64', None)
+            preview['image_key'] = image_key
+        result['preview_data'] = preview
+    return result
+
+
+def _discard_audio(job: DreamJob) -> None:
+    if job.audio:
+        try:
+            job.audio.delete(save=True)
+        except Exception as e:
+            print(f"⚠️ Suppression audio impossible pour {job.job_id}: {e}")
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def purge_finished_jobs() -> int:
+    """Supprime les tâches terminées ou en échec depuis plus de JOB_RETENTION. Retourne le nombre supprimé."""
+    expired = DreamJob.objects.filter(status__in=('done', 'failed'), finished_at__lt=timezone.now() - JOB_RETENTION)
+    count = 0
+    for job in expired.iterator():
+        _discard_audio(job)  # Tâche abandonnée : l'audio peut être encore là
+        job.delete()
+        count += 1
+    if count:
+        print(f"🧹 {count} tâche(s) terminée(s) supprimée(s)")
+    return count
+
+
+def run_worker(poll_interval: float = 2.0, once: bool = False, worker_id: Optional[str] = None) -> int:
+    """Boucle du worker. Avec once=True, vide la file puis s'arrête."""
+    worker_id = worker_id or default_worker_id()
+    processed = 0
+    last_purge = 0.0
+    while True:
+        # Ménage des anciennes tâches, au plus une fois par JOB_PURGE_INTERVAL
+        if not last_purge or time.monotonic() - last_purge >= JOB_PURGE_INTERVAL:
+            purge_finished_jobs()
+            last_purge = time.monotonic()
+
+        job = claim_next_job(worker_id)
+        if job:
+            process_job(job)
+            processed += 1
+            continue
+        if once:
+            return processed
+        time.sleep(poll_interval)
@@ -0,0 +1,75 @@
+"""
+Mesure le coût de l'analyse des en-têtes audio sur de gros fichiers
+Compare avec une lecture complète du fichier (coût minimal d'un décodage)
+"""
+
+import os
+import struct
+import tempfile
+import time
+import wave
+
+from django.core.management.base import BaseCommand
+
+from dreams.audio_probe import probe_audio
+
+
+class Command(BaseCommand):
+    help = "Mesure le temps d'analyse des en-têtes audio (ms par fichier)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=int, default=10, help='Taille des fichiers générés')
+        parser.add_argument('--iterations', type=int, default=200, help="Nombre d'analyses par format")
+
+    def handle(self, *args, **options):
+        size = options['size_mb'] * 1024 * 1024
+        iterations = options['iterations']
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            files = {
+                'wav': self._write_wav(os.path.join(tmp_dir, 'long.wav'), size),
+                'mp3': self._write_mp3(os.path.join(tmp_dir, 'long.mp3'), size),
+            }
+            self.stdout.write(f'⏱️ {iterations} analyses par fichier de {options["size_mb"]} Mo...')
+
+            for name, path in files.items():
+                with open(path, 'rb') as f:
+                    info = probe_audio(f)
+                    probe_ms = self._measure(lambda: probe_audio(f), iterations)
+                    full_ms = self._measure(lambda: self._read_all(f), max(iterations // 20, 1))
+                self.stdout.write(
+                    f'  {name:<4} {info.duration:>8.1f}s  en-têtes {probe_ms:.3f} ms  lecture complète {full_ms:.1f} ms'
+                )
+
+        self.stdout.write(self.style.SUCCESS('✅ Terminé !'))
+
+    @staticmethod
+    def _write_wav(path: str, size: int) -> str:
+        with wave.open(path, 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(b'\x00' * size)
+        return path
+
+    @staticmethod
+    def _write_mp3(path: str, size: int) -> str:
+        # Trames MPEG-1 Layer III 128 kbit/s 44,1 kHz mono, débit constant
+        frame = b'\xff\xfb\x90\xc4' + b'\x00' * 413
+        with open(path, 'wb') as f:
+            f.write(b'ID3\x03\x00\x00' + struct.pack('>I', 0))
+            f.write(frame * (size // len(frame)))
+        return path
+
+    @staticmethod
+    def _read_all(f):
+        f.seek(0)
+        while f.read(1024 * 1024):
+            pass
+
+    @staticmethod
+    def _measure(func, iterations: int) -> float:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - started) * 1000 / iterations
@@ -0,0 +1,54 @@
+"""
+Mesure le coût de rendu d'un export par renderer
+Compare avec l'ancien fonctionnement (template recompilé à chaque export)
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import Context, Template
+from django.template.loader import get_template
+
+from dreams.models import Dream
+from dreams.renderers import get_renderer, renderer_names
+
+
+class Command(BaseCommand):
+    help = "Mesure le temps de rendu des exports de rêves (ms par export)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Nombre de rendus par renderer')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        
+        # Rêve non sauvegardé : pas d'accès base ni image, seul le rendu est mesuré
+        dream = Dream(
+            transcription="Je volais au-dessus d'une ville de verre " * 20,
+            reformed_prompt="flying above a glass city at dawn",
+            privacy='public',
+            emotion='heureux',
+            emotion_emoji='😊',
+        )
+        
+        self.stdout.write(f'⏱️ {iterations} rendus par renderer...')
+        
+        for name in renderer_names():
+            renderer = get_renderer(name)
+            renderer.render(dream)  # Premier rendu : chargement et compilation du template
+            self.stdout.write(f'  {name:<8} {self._measure(lambda: renderer.render(dream), iterations):.3f} ms/export')
+        
+        # Référence : parsing du template à chaque export (ancien export_dream_as_html)
+        html = get_renderer('html')
+        source = get_template(html.template_name).template.source
+        baseline = self._measure(lambda: Template(source).render(Context(html.context(dream))), iterations)
+        self.stdout.write(f'  {"html (recompilé)":<8} {baseline:.3f} ms/export')
+        
+        self.stdout.write(self.style.SUCCESS('✅ Terminé !'))
+
+    @staticmethod
+    def _measure(func, iterations: int) -> float:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - started) * 1000 / iterations
@@ -0,0 +1,46 @@
+"""
+Exporte le journal de rêves d'un utilisateur (zip, json, csv ou md)
+Exemple : python manage.py export_dreams alice --format zip --start 2025-01-01 --output alice.zip
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from dreams.export import EXPORTERS, InvalidExportRequest, parse_export_range, export_journal, export_filename
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Exporte le journal de rêves d'un utilisateur dans un fichier"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help="Nom de l'utilisateur")
+        parser.add_argument('--format', choices=list(EXPORTERS), default='zip', help="Format d'export")
+        parser.add_argument('--start', help='Date de début incluse (AAAA-MM-JJ)')
+        parser.add_argument('--end', help='Date de fin incluse (AAAA-MM-JJ)')
+        parser.add_argument('--output', help='Fichier de sortie (par défaut : nom généré dans le répertoire courant)')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"Utilisateur introuvable : {options['username']}")
+        
+        try:
+            start, end = parse_export_range(options['start'], options['end'])
+        except InvalidExportRequest as e:
+            raise CommandError(str(e))
+        
+        output = options['output'] or export_filename(user, options['format'])
+        self.stdout.write(f'📦 Export des rêves de {user.username}...')
+        
+        written = 0
+        with open(output, 'wb') as f:
+            for chunk in export_journal(user, options['format'], start, end):
+                f.write(chunk)
+                written += len(chunk)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Terminé ! {output} ({written} octets).')
+        )
@@ -0,0 +1,40 @@
+"""
+Génère les miniatures WebP des rêves existants
+À exécuter après la migration 0010 (ou avec --force pour tout régénérer)
+"""
+
+from django.core.management.base import BaseCommand
+
+from dreams.feed_cache import invalidate_public_feed
+from dreams.models import Dream
+from dreams.images import generate_image_variants
+
+
+class Command(BaseCommand):
+    help = 'Génère les miniatures WebP des images de rêves'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Régénérer même si des miniatures existent')
+
+    def handle(self, *args, **options):
+        self.stdout.write('🖼️ Génération des miniatures...')
+        
+        dreams = Dream.objects.exclude(image_key__isnull=True).exclude(image_key='')
+        if not options['force']:
+            dreams = dreams.filter(image_variants={})
+        
+        dreams_updated = 0
+        for dream in dreams.only('dream_id', 'image_key', 'image_variants').iterator(chunk_size=100):
+            variants = generate_image_variants(dream.image_key)
+            if variants:
+                Dream.objects.filter(dream_id=dream.dream_id).update(image_variants=variants)
+                dreams_updated += 1
+                self.stdout.write(f'  ✓ Rêve #{dream.dream_id}: {", ".join(variants)}')
+        
+        # URLs des miniatures du feed public modifiées (update() ne passe pas par Dream.save)
+        if dreams_updated:
+            invalidate_public_feed()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Terminé ! {dreams_updated} rêves mis à jour.')
+        )
@@ -0,0 +1,39 @@
+"""
+Éviction du cache disque des résultats d'IA (entrées expirées puis les moins récentes
+au-delà de la taille maximale). À lancer périodiquement (cron).
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dreams.ai_cache import cache_names, get_cache
+
+
+class Command(BaseCommand):
+    help = "Purge le cache disque des résultats d'IA (TTL et taille maximale)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cache', choices=cache_names(), help='Limiter à un cache (défaut: tous)')
+        parser.add_argument('--clear', action='store_true', help='Vider entièrement le cache')
+
+    def handle(self, *args, **options):
+        names = [options['cache']] if options['cache'] else cache_names()
+
+        for name in names:
+            try:
+                cache = get_cache(name)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+            if options['clear']:
+                removed = cache.clear()
+                self.stdout.write(f'🗑️ {name}: {removed} entrées supprimées')
+                continue
+
+            expired, evicted = cache.prune()
+            stats = cache.stats()
+            self.stdout.write(
+                f'🧹 {name}: {expired} expirées, {evicted} évincées '
+                f'({stats["entries"]} restantes, {stats["bytes"] / 1024:.1f} Ko)'
+            )
+
+        self.stdout.write(self.style.SUCCESS('✅ Cache purgé.'))
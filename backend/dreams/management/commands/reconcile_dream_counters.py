@@ -0,0 +1,56 @@
+"""
+Répare les compteurs dénormalisés des rêves (likes_count_cache, comments_count_cache)
+À exécuter après un import de données ou périodiquement pour corriger les dérives
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from dreams.models import Dream
+from social.models import DreamLike, DreamComment
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les compteurs de likes et commentaires des rêves qui ont dérivé'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Afficher les dérives sans les corriger')
+        parser.add_argument('--batch-size', type=int, default=500, help='Nombre de rêves mis à jour par requête')
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔢 Vérification des compteurs...')
+        
+        likes = DreamLike.objects.filter(dream=OuterRef('pk')).order_by().values('dream').annotate(total=Count('pk')).values('total')
+        comments = DreamComment.objects.filter(dream=OuterRef('pk')).order_by().values('dream').annotate(total=Count('pk')).values('total')
+        
+        # Seuls les rêves dont le cache diffère du décompte réel sont chargés
+        drifted = Dream.objects.annotate(
+            actual_likes=Coalesce(Subquery(likes, output_field=IntegerField()), 0),
+            actual_comments=Coalesce(Subquery(comments, output_field=IntegerField()), 0),
+        ).filter(
+            ~Q(likes_count_cache=F('actual_likes')) | ~Q(comments_count_cache=F('actual_comments'))
+        ).only('dream_id', 'likes_count_cache', 'comments_count_cache')
+        
+        batch, dreams_fixed = [], 0
+        for dream in drifted.iterator(chunk_size=options['batch_size']):
+            self.stdout.write(
+                f'  ✗ Rêve #{dream.dream_id}: likes {dream.likes_count_cache} → {dream.actual_likes}, '
+                f'commentaires {dream.comments_count_cache} → {dream.actual_comments}'
+            )
+            dream.likes_count_cache = dream.actual_likes
+            dream.comments_count_cache = dream.actual_comments
+            batch.append(dream)
+            dreams_fixed += 1
+            
+            if len(batch) >= options['batch_size'] and not options['dry_run']:
+                Dream.objects.bulk_update(batch, ['likes_count_cache', 'comments_count_cache'])
+                batch = []
+        
+        if batch and not options['dry_run']:
+            Dream.objects.bulk_update(batch, ['likes_count_cache', 'comments_count_cache'])
+        
+        verb = 'à corriger' if options['dry_run'] else 'corrigés'
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Terminé ! {dreams_fixed} rêves {verb}.')
+        )
@@ -0,0 +1,48 @@
+"""
+Recalcule le score de popularité de tous les rêves
+Scores initiaux calculés par la migration 0015 ; à exécuter périodiquement (cron) pour intégrer les vues
+"""
+
+from django.core.management.base import BaseCommand
+
+from dreams.feed_cache import invalidate_public_feed
+from dreams.models import Dream
+from dreams.ranking import score_for_dream
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les scores de popularité des rêves (tri sort=popular)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Nombre de rêves mis à jour par requête')
+
+    def handle(self, *args, **options):
+        self.stdout.write('📈 Calcul des scores de popularité...')
+        
+        dreams = Dream.objects.only(
+            'dream_id', 'likes_count_cache', 'comments_count_cache', 'views_count', 'created_at', 'popularity_score'
+        )
+        
+        batch, dreams_updated = [], 0
+        for dream in dreams.iterator(chunk_size=options['batch_size']):
+            score = score_for_dream(dream)
+            if score == dream.popularity_score:
+                continue
+            dream.popularity_score = score
+            batch.append(dream)
+            dreams_updated += 1
+            
+            if len(batch) >= options['batch_size']:
+                Dream.objects.bulk_update(batch, ['popularity_score'])
+                batch = []
+        
+        if batch:
+            Dream.objects.bulk_update(batch, ['popularity_score'])
+        
+        # Ordre du tri 'popular' modifié
+        if dreams_updated:
+            invalidate_public_feed()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Terminé ! {dreams_updated} scores mis à jour.')
+        )
@@ -0,0 +1,26 @@
+"""
+Worker de génération des rêves (file d'attente en base, voir dreams/jobs.py)
+À lancer à côté du serveur web : python manage.py run_dream_worker
+"""
+
+from django.core.management.base import BaseCommand
+
+from dreams.jobs import run_worker, default_worker_id
+
+
+class Command(BaseCommand):
+    help = 'Traite les tâches de génération de rêves en attente'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Vider la file puis quitter')
+        parser.add_argument('--interval', type=float, default=2.0, help='Intervalle de polling en secondes')
+
+    def handle(self, *args, **options):
+        worker_id = default_worker_id()
+        self.stdout.write(f'👷 Worker {worker_id} démarré...')
+        
+        processed = run_worker(poll_interval=options['interval'], once=options['once'], worker_id=worker_id)
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Worker arrêté. {processed} tâches traitées.')
+        )
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.11 on 2026-10-17 15:51
+# Extraction des images base64 vers le stockage adressé par contenu
+
+from django.db import migrations, models
+
+
+def extract_images_to_blob_store(apps, schema_editor):
+    """Déplace les images base64 existantes vers le stockage adressé par contenu"""
+    from dreams.storage import store_data_uri
+
+    Dream = apps.get_model('dreams', 'Dream')
+    dreams = Dream.objects.filter(image_key__isnull=True).exclude(img_b64__isnull=True).exclude(img_b64='')
+
+    for dream in dreams.only('dream_id', 'img_b64').iterator(chunk_size=100):
+        image_key = store_data_uri(dream.img_b64)
+        if image_key:
+            # Les data URI non décodables restent en legacy
+            Dream.objects.filter(dream_id=dream.dream_id).update(image_key=image_key, img_b64=None)
+
+
+def restore_images_from_blob_store(apps, schema_editor):
+    """Réinjecte les images du stockage dans img_b64 (migration inverse)"""
+    from dreams.storage import blob_as_data_uri
+
+    Dream = apps.get_model('dreams', 'Dream')
+    for dream in Dream.objects.exclude(image_key__isnull=True).only('dream_id', 'image_key').iterator(chunk_size=100):
+        data_uri = blob_as_data_uri(dream.image_key)
+        if data_uri:
+            Dream.objects.filter(dream_id=dream.dream_id).update(img_b64=data_uri)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dreams', '0008_alter_dream_options_alter_dream_date_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dream',
+            name='image_key',
+            field=models.CharField(blank=True, help_text="SHA-256 + extension de l'image dans le stockage des rêves", max_length=80, null=True, verbose_name="Clé de l'image"),
+        ),
+        migrations.AlterField(
+            model_name='dream',
+            name='img_b64',
+            field=models.TextField(blank=True, help_text='Legacy - remplacé par image_key (stockage adressé par contenu)', null=True, verbose_name='Image en base64'),
+        ),
+        migrations.RunPython(
+            extract_images_to_blob_store,
+            restore_images_from_blob_store
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-17 15:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dreams', '0009_dream_image_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dream',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, help_text="Clés des miniatures WebP par taille (ex: {'small': '<sha>.webp'})", verbose_name="Miniatures de l'image"),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.11 on 2026-10-17 15:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('dreams', '0010_dream_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DreamJob',
+            fields=[
+                ('job_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('generate', 'Génération (preview)'), ('create', 'Génération + sauvegarde')], max_length=20, verbose_name='Type de tâche')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminé'), ('failed', 'Échoué')], default='pending', max_length=20, verbose_name='Statut')),
+                ('stage', models.CharField(blank=True, default='', max_length=30, verbose_name='Étape en cours')),
+                ('completed_stages', models.JSONField(blank=True, default=list, verbose_name='Étapes terminées')),
+                ('audio', models.FileField(blank=True, upload_to='dream_jobs/', verbose_name='Fichier audio')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Résultat')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Erreur')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Nombre de tentatives')),
+                ('worker', models.CharField(blank=True, default='', max_length=100, verbose_name='Worker')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créée le')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Démarrée le')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Terminée le')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dream_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Tâche de génération',
+                'verbose_name_plural': 'Tâches de génération',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='dreams_drea_status_752140_idx')],
+            },
+        ),
+    ]
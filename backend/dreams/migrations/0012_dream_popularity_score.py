@@ -0,0 +1,22 @@
+# Generated by Django 4.2.11 on 2026-10-17 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dreams', '0011_dreamjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dream',
+            name='popularity_score',
+            field=models.FloatField(default=0, help_text="Score 'hot' (engagement + fraîcheur) pour le tri par popularité, voir dreams/ranking.py", verbose_name='Score de popularité'),
+        ),
+        migrations.AddIndex(
+            model_name='dream',
+            index=models.Index(fields=['privacy', '-popularity_score'], name='dreams_drea_privacy_222309_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.11 on 2026-10-17 19:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_timelines(apps, schema_editor):
+    """Construit les timelines amis à partir des amitiés et rêves existants"""
+    Friendship = apps.get_model('social', 'Friendship')
+    Dream = apps.get_model('dreams', 'Dream')
+    TimelineEntry = apps.get_model('dreams', 'TimelineEntry')
+    
+    friendships = Friendship.objects.values_list('user_id', 'friend_id')
+    for owner_id, friend_id in friendships.iterator():
+        dreams = Dream.objects.filter(
+            user_id=friend_id, privacy__in=('public', 'friends_only')
+        ).values_list('dream_id', 'created_at')
+        TimelineEntry.objects.bulk_create([
+            TimelineEntry(owner_id=owner_id, dream_id=dream_id, created_at=created_at)
+            for dream_id, created_at in dreams
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('social', '0005_friendship'),
+        ('dreams', '0012_dream_popularity_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(verbose_name='Date du rêve')),
+                ('dream', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='dreams.dream', verbose_name='Rêve')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL, verbose_name='Lecteur')),
+            ],
+            options={
+                'verbose_name': 'Entrée de timeline',
+                'verbose_name_plural': 'Entrées de timeline',
+                'ordering': ['-created_at'],
+                'unique_together': {('owner', 'dream')},
+                'indexes': [models.Index(fields=['owner', '-created_at', '-dream'], name='dreams_time_owner_i_6883a6_idx')],
+            },
+        ),
+        migrations.RunPython(populate_timelines, migrations.RunPython.noop),
+    ]
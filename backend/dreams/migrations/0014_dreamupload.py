@@ -0,0 +1,51 @@
+# Generated by Django 4.2.11 on 2026-10-17 21:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('dreams', '0013_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DreamUpload',
+            fields=[
+                ('upload_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dream_uploads', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Envoi par segments',
+                'verbose_name_plural': 'Envois par segments',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DreamUploadSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField(verbose_name='Position')),
+                ('audio', models.FileField(upload_to='dream_uploads/', verbose_name='Fichier audio')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='Taille (octets)')),
+                ('duration', models.FloatField(blank=True, null=True, verbose_name='Durée (s)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Reçu le')),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='dreams.dreamupload', verbose_name='Envoi')),
+            ],
+            options={
+                'verbose_name': 'Segment audio',
+                'verbose_name_plural': 'Segments audio',
+                'ordering': ['upload', 'index'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dreamuploadsegment',
+            constraint=models.UniqueConstraint(fields=('upload', 'index'), name='unique_upload_segment_index'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Migration pour calculer le score de popularité des rêves existants
+
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# Copie figée de dreams/ranking.py au moment de la migration (ne pas importer le code courant)
+POPULARITY_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+POPULARITY_DECAY_SECONDS = 45000
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+VIEW_WEIGHT = 0.1
+
+
+def popularity_score(likes, comments, views, created_at):
+    engagement = LIKE_WEIGHT * likes + COMMENT_WEIGHT * comments + VIEW_WEIGHT * views
+    age = (created_at - POPULARITY_EPOCH).total_seconds()
+    return round(math.log10(1 + max(engagement, 0)) + age / POPULARITY_DECAY_SECONDS, 7)
+
+
+def populate_popularity_scores(apps, schema_editor):
+    """Calcule popularity_score (ajouté à 0 par la migration 0012) pour les rêves existants"""
+    Dream = apps.get_model('dreams', 'Dream')
+    DreamLike = apps.get_model('social', 'DreamLike')
+    DreamComment = apps.get_model('social', 'DreamComment')
+    
+    # Décomptes réels : les compteurs en cache ne sont initialisés qu'à la migration 0016
+    likes = DreamLike.objects.filter(dream=OuterRef('pk')).order_by().values('dream').annotate(total=Count('pk')).values('total')
+    comments = DreamComment.objects.filter(dream=OuterRef('pk')).order_by().values('dream').annotate(total=Count('pk')).values('total')
+    dreams = Dream.objects.annotate(
+        actual_likes=Coalesce(Subquery(likes, output_field=IntegerField()), 0),
+        actual_comments=Coalesce(Subquery(comments, output_field=IntegerField()), 0),
+    ).only('dream_id', 'views_count', 'created_at')
+    
+    batch = []
+    for dream in dreams.iterator(chunk_size=500):
+        dream.popularity_score = popularity_score(
+            dream.actual_likes, dream.actual_comments, dream.views_count, dream.created_at
+        )
+        batch.append(dream)
+        if len(batch) >= 500:
+            Dream.objects.bulk_update(batch, ['popularity_score'])
+            batch = []
+    if batch:
+        Dream.objects.bulk_update(batch, ['popularity_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0005_friendship'),
+        ('dreams', '0014_dreamupload'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_popularity_scores, migrations.RunPython.noop),
+    ]
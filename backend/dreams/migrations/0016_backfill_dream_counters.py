@@ -0,0 +1,33 @@
+# Migration pour initialiser les compteurs dénormalisés des rêves existants
+
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_dream_counters(apps, schema_editor):
+    """Remplit likes_count_cache et comments_count_cache à partir des likes et commentaires réels"""
+    Dream = apps.get_model('dreams', 'Dream')
+    DreamLike = apps.get_model('social', 'DreamLike')
+    DreamComment = apps.get_model('social', 'DreamComment')
+    
+    # Même sous-requête que la commande reconcile_dream_counters
+    likes = DreamLike.objects.filter(dream=OuterRef('pk')).order_by().values('dream').annotate(total=Count('pk')).values('total')
+    comments = DreamComment.objects.filter(dream=OuterRef('pk')).order_by().values('dream').annotate(total=Count('pk')).values('total')
+    
+    Dream.objects.update(
+        likes_count_cache=Coalesce(Subquery(likes, output_field=IntegerField()), 0),
+        comments_count_cache=Coalesce(Subquery(comments, output_field=IntegerField()), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0005_friendship'),
+        ('dreams', '0015_backfill_popularity_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_dream_counters, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
+from django.urls import reverse
 from django.core.validators import MinLengthValidator, MaxLengthValidator
 
 class Dream(models.Model):
@@ -56,7 +59,22 @@ class Dream(models.Model):
         blank=True, 
         null=True,
         verbose_name="Image en base64",
-        help_text="Image générée du rêve en format base64"
+        help_text="Legacy - remplacé par image_key (stockage adressé par contenu)"
+    )
+    
+    image_key = models.CharField(
+        max_length=80,
+        blank=True,
+        null=True,
+        verbose_name="Clé de l'image",
+        help_text="SHA-256 + extension de l'image dans le stockage des rêves"
+    )
+    
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Miniatures de l'image",
+        help_text="Clés des miniatures WebP par taille (ex: {'small': '<sha>.webp'})"
     )
     
     # Métadonnées
@@ -129,6 +147,12 @@ class Dream(models.Model):
         default=0,
         verbose_name="Cache du nombre de commentaires"
     )
+    
+    popularity_score = models.FloatField(
+        default=0,
+        verbose_name="Score de popularité",
+        help_text="Score 'hot' (engagement + fraîcheur) pour le tri par popularité, voir dreams/ranking.py"
+    )
 
     class Meta:
         verbose_name = "Rêve"
@@ -138,6 +162,7 @@ class Dream(models.Model):
             models.Index(fields=['-created_at']),
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['privacy', '-created_at']),
+            models.Index(fields=['privacy', '-popularity_score']),
             models.Index(fields=['emotion']),
         ]
 
@@ -149,8 +174,21 @@ class Dream(models.Model):
         # Si c'est une nouvelle création
         is_new = self.pk is None
         
+        # Score initial : un nouveau rêve se classe d'abord par sa fraîcheur
+        if is_new:
+            from .ranking import score_for_dream
+            self.popularity_score = score_for_dream(self)
+        
         super().save(*args, **kwargs)
         
+        # Fan-out dans les timelines des amis (création ou changement de privacy)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'privacy' in update_fields:
+            from .timeline import sync_dream_timeline
+            from .feed_cache import invalidate_public_feed
+            sync_dream_timeline(self)
+            invalidate_public_feed()
+        
         # Mettre à jour les stats utilisateur si nouveau rêve
         if is_new and hasattr(self.user, 'update_stats'):
             self.user.update_stats()
@@ -182,12 +220,8 @@ class Dream(models.Model):
         
         # Rêve amis seulement : vérifier l'amitié
         if self.privacy == 'friends_only':
-            from social.models import FriendRequest
-            return FriendRequest.objects.filter(
-                models.Q(from_user=self.user, to_user=user) |
-                models.Q(from_user=user, to_user=self.user),
-                status='accepted'
-            ).exists()
+            from social.friends import are_friends
+            return are_friends(user, self.user)
         
         return False
     
@@ -200,9 +234,185 @@ class Dream(models.Model):
         """Le rêve est-il public ?"""
         return self.privacy == 'public'
     
+    def get_image_url(self, request=None, size=None):
+        """URL de l'image (absolue si request fournie), ou data URI legacy si pas encore migrée"""
+        if self.image_key:
+            # Miniature demandée si disponible, sinon l'original
+            key = (self.image_variants or {}).get(size) or self.image_key
+            url = reverse('dream_image', args=[key])
+            return request.build_absolute_uri(url) if request else url
+        return self.img_b64 or None
+    
+    @property
+    def image_url(self):
+        """URL relative de l'image"""
+        return self.get_image_url()
+    
+    @property
+    def has_image(self):
+        """Le rêve a-t-il une image ?"""
+        return bool(self.image_key or self.img_b64)
+    
+    def image_data_uri(self):
+        """Image en data URI (pour les exports HTML autonomes)"""
+        if self.image_key:
+            from .storage import blob_as_data_uri
+            return blob_as_data_uri(self.image_key) or self.img_b64
+        return self.img_b64
+    
     @property
     def emotion_display(self):
         """Affichage formaté de l'émotion"""
         if self.emotion and self.emotion_emoji:
             return f"{self.emotion_emoji} {self.emotion.capitalize()}"
         return self.emotion or "Non analysé"
+
+
+class TimelineEntry(models.Model):
+    """
+    Timeline matérialisée du feed amis : une ligne par (lecteur, rêve d'un ami visible).
+    Alimentée à l'écriture (fan-out), voir dreams/timeline.py
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name="Lecteur"
+    )
+    
+    dream = models.ForeignKey(
+        Dream,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name="Rêve"
+    )
+    
+    # Copie de dream.created_at : le tri se fait sur l'index de la timeline
+    created_at = models.DateTimeField(verbose_name="Date du rêve")
+
+    class Meta:
+        verbose_name = "Entrée de timeline"
+        verbose_name_plural = "Entrées de timeline"
+        ordering = ['-created_at']
+        unique_together = ('owner', 'dream')
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-dream']),
+        ]
+
+    def __str__(self):
+        return f"Rêve #{self.dream_id} dans la timeline de {self.owner_id}"
+
+
+class DreamJob(models.Model):
+    """
+    Tâche de génération de rêve exécutée par le worker (file d'attente en base)
+    """
+    KIND_CHOICES = [
+        ('generate', 'Génération (preview)'),
+        ('create', 'Génération + sauvegarde'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('done', 'Terminé'),
+        ('failed', 'Échoué'),
+    ]
+    
+    # UUID : l'identifiant est exposé au client pour le polling
+    job_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='dream_jobs',
+        verbose_name="Utilisateur"
+    )
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Type de tâche")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Statut")
+    stage = models.CharField(max_length=30, blank=True, default='', verbose_name="Étape en cours")
+    completed_stages = models.JSONField(default=list, blank=True, verbose_name="Étapes terminées")
+    
+    # Audio conservé le temps du traitement, supprimé ensuite
+    audio = models.FileField(upload_to='dream_jobs/', blank=True, verbose_name="Fichier audio")
+    
+    result = models.JSONField(blank=True, null=True, verbose_name="Résultat")
+    error = models.TextField(blank=True, default='', verbose_name="Erreur")
+    
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Nombre de tentatives")
+    worker = models.CharField(max_length=100, blank=True, default='', verbose_name="Worker")
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créée le")
+    started_at = models.DateTimeField(blank=True, null=True, verbose_name="Démarrée le")
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name="Terminée le")
+
+    class Meta:
+        verbose_name = "Tâche de génération"
+        verbose_name_plural = "Tâches de génération"
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Tâche {self.kind} {self.job_id} ({self.status})"
+    
+    @property
+    def is_finished(self):
+        return self.status in ('done', 'failed')
+
+
+class DreamUpload(models.Model):
+    """
+    Enregistrement envoyé par segments pendant la dictée (voir uploads.py)
+    """
+    # UUID : l'identifiant est exposé au client pour l'envoi des segments
+    upload_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='dream_uploads',
+        verbose_name="Utilisateur"
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
+
+    class Meta:
+        verbose_name = "Envoi par segments"
+        verbose_name_plural = "Envois par segments"
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Envoi {self.upload_id}"
+
+
+class DreamUploadSegment(models.Model):
+    """
+    Segment audio autonome (fichier complet) d'un envoi, transcrit dès réception
+    """
+    upload = models.ForeignKey(
+        DreamUpload,
+        on_delete=models.CASCADE,
+        related_name='segments',
+        verbose_name="Envoi"
+    )
+    
+    index = models.PositiveIntegerField(verbose_name="Position")
+    audio = models.FileField(upload_to='dream_uploads/', verbose_name="Fichier audio")
+    size = models.PositiveIntegerField(default=0, verbose_name="Taille (octets)")
+    duration = models.FloatField(blank=True, null=True, verbose_name="Durée (s)")
+    
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Reçu le")
+
+    class Meta:
+        verbose_name = "Segment audio"
+        verbose_name_plural = "Segments audio"
+        ordering = ['upload', 'index']
+        constraints = [
+            models.UniqueConstraint(fields=['upload', 'index'], name='unique_upload_segment_index'),
+        ]
+
+    def __str__(self):
+        return f"Segment {self.index} de {self.upload_id}"
@@ -0,0 +1,73 @@
+# backend/dreams/pagination.py
+"""
+Pagination par curseur (keyset) pour les feeds et la liste des rêves.
+
+Plutôt qu'un OFFSET + COUNT(*) (Paginator), on filtre sur la clé
+(created_at, dream_id) du dernier rêve renvoyé : le coût d'une page ne
+dépend pas de sa profondeur et s'appuie sur les index `-created_at`.
+Le curseur est opaque pour le client (base64 url-safe).
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.db.models import Q
+
+CURSOR_MAX_PER_PAGE = 100
+
+
+class InvalidCursor(ValueError):
+    """Curseur illisible ou falsifié"""
+
+
+def wants_cursor(request) -> bool:
+    """Mode curseur demandé ? (?cursor=..., vide pour la première page)"""
+    return 'cursor' in request.GET
+
+
+def encode_cursor(created_at: datetime, dream_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), dream_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, dream_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(dream_id)
+    except Exception:
+        raise InvalidCursor("Curseur de pagination invalide")
+
+
+def paginate_by_cursor(queryset, cursor: Optional[str], per_page: int) -> Tuple[list, Optional[str]]:
+    """
+    Retourne (rêves de la page, curseur suivant ou None).
+    Les rêves sont triés du plus récent au plus ancien.
+    """
+    per_page = max(1, min(per_page, CURSOR_MAX_PER_PAGE))
+    queryset = queryset.order_by('-created_at', '-dream_id')
+
+    if cursor:
+        created_at, dream_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, dream_id__lt=dream_id)
+        )
+
+    # Un élément de plus pour savoir s'il reste une page, sans COUNT(*)
+    items = list(queryset[:per_page + 1])
+    if len(items) <= per_page:
+        return items, None
+
+    items = items[:per_page]
+    last = items[-1]
+    return items, encode_cursor(last.created_at, last.dream_id)
+
+
+def cursor_pagination_data(next_cursor: Optional[str], per_page: int) -> dict:
+    """Bloc `pagination` des réponses en mode curseur"""
+    return {
+        'next_cursor': next_cursor,
+        'has_next': next_cursor is not None,
+        'per_page': max(1, min(per_page, CURSOR_MAX_PER_PAGE)),
+    }
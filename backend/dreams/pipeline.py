@@ -0,0 +1,99 @@
+# backend/dreams/pipeline.py
+"""
+Pipeline de génération d'un rêve à partir d'un fichier audio.
+
+Utilisé en synchrone par les vues et en asynchrone par le worker
+(voir jobs.py). Les étapes qui ne dépendent que de la transcription
+(reformulation, émotion) tournent en parallèle via `run_stages` ;
+`on_stage(stage, event)` est appelé avec 'start' puis 'done' pour suivre
+la progression.
+"""
+from typing import Callable, Optional
+
+from .utils import (
+    transcribe_audio, rephrase_text, generate_image_base64, save_in_db, analyze_dream_emotion,
+    Stage, run_stages
+)
+
+# Étapes de chaque pipeline, dans l'ordre de lancement
+GENERATE_STAGES = ['transcription', 'rephrase', 'emotion', 'image']
+CREATE_STAGES = ['transcription', 'rephrase', 'emotion', 'image', 'save']
+
+
+def _analysis_stages(transcribe: Callable[[], str]) -> list:
+    """Étapes communes : transcription → (reformulation ∥ émotion) → image."""
+    return [
+        Stage('transcription', lambda r: transcribe()),
+        Stage('rephrase', lambda r: rephrase_text(r['transcription']), after=['transcription']),
+        Stage('emotion', lambda r: analyze_dream_emotion(r['transcription']), after=['transcription']),
+        Stage('image', lambda r: generate_image_base64(r['rephrase']), after=['rephrase']),
+    ]
+
+
+def _log_results(results: dict, timings: dict) -> None:
+    print(f"Transcription: {results['transcription']}")
+    print(f"Prompt reformulé: {results['rephrase']}")
+    print(f"Émotion détectée: {results['emotion'].get('emotion')} {results['emotion'].get('emoji')}")
+    print(f"⏱️ Durées par étape: {timings}")
+
+
+def generate_dream(audio_file, on_stage: Optional[Callable[[str, str], None]] = None) -> dict:
+    """Génère un rêve SANS le sauvegarder (preview)."""
+    return generate_dream_from(lambda: transcribe_audio(audio_file), on_stage)
+
+
+def generate_dream_from(transcribe: Callable[[], str], on_stage: Optional[Callable[[str, str], None]] = None) -> dict:
+    """Preview dont la transcription est fournie par `transcribe` (ex: envoi par segments, voir uploads.py)."""
+    results, timings = run_stages(_analysis_stages(transcribe), on_stage)
+    _log_results(results, timings)
+
+    transcription = results['transcription']
+    prompt = results['rephrase']
+    emotion_data = results['emotion']
+    img_b64 = results['image']
+
+    return {
+        "message": "Rêve généré (preview)",
+        "transcription": transcription,
+        "prompt": prompt,
+        "image": img_b64,
+        "emotion": emotion_data,
+        # Données nécessaires pour la sauvegarde ultérieure
+        "preview_data": {
+            "transcription": transcription,
+            "reformed_prompt": prompt,
+            "img_b64": img_b64,
+            # Réutilisées à la sauvegarde (pas de seconde analyse)
+            "emotion": emotion_data.get('emotion'),
+            "emotion_confidence": emotion_data.get('confidence'),
+        },
+        "timings": timings
+    }
+
+
+def create_dream(user, audio_file, on_stage: Optional[Callable[[str, str], None]] = None, request=None) -> dict:
+    """Génère ET sauvegarde un rêve (privé par défaut)."""
+    stages = _analysis_stages(lambda: transcribe_audio(audio_file)) + [
+        # Accès base : exécutée dans le thread appelant
+        Stage('save', lambda r: save_in_db(
+            user=user,
+            transcription=r['transcription'],
+            reformed_prompt=r['rephrase'],
+            img_b64=r['image'],
+            privacy="private",
+            emotion_data=r['emotion']
+        ), after=['image', 'emotion'], inline=True),
+    ]
+    results, timings = run_stages(stages, on_stage)
+    _log_results(results, timings)
+
+    dream = results['save']
+    return {
+        "message": "Success",
+        "dream_id": dream.dream_id,
+        "transcription": results['transcription'],
+        "prompt": results['rephrase'],
+        "image": results['image'],
+        "image_url": dream.get_image_url(request),
+        "timings": timings
+    }
@@ -0,0 +1,53 @@
+# backend/dreams/ranking.py
+"""
+Score de popularité des rêves (tri `sort=popular` des feeds).
+
+Score "hot" décroissant avec l'âge, stocké dans la colonne indexée
+`Dream.popularity_score` :
+
+    score = log10(1 + likes + 2·commentaires + 0.1·vues) + âge_en_secondes / DECAY
+
+Le terme temporel dépend de la date de création (et non de l'instant
+présent) : un rêve plus récent part avec un avantage fixe, donc le score
+n'a pas besoin d'être recalculé quand le temps passe. Il est mis à jour à
+chaque like/commentaire (social/signals.py) et recalculé en masse par
+`manage.py refresh_popularity_scores` (vues, dérives) ; les rêves antérieurs au
+score sont initialisés par la migration 0015.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.utils import timezone
+
+# Origine de l'échelle de temps du score
+POPULARITY_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+# 12h30 de fraîcheur valent un facteur 10 d'engagement
+POPULARITY_DECAY_SECONDS = 45000
+
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+VIEW_WEIGHT = 0.1
+
+
+def popularity_score(likes: int, comments: int, views: int, created_at: datetime = None) -> float:
+    """Score de popularité d'un rêve à partir de ses compteurs et de sa date de création"""
+    engagement = LIKE_WEIGHT * likes + COMMENT_WEIGHT * comments + VIEW_WEIGHT * views
+    age = ((created_at or timezone.now()) - POPULARITY_EPOCH).total_seconds()
+    return round(math.log10(1 + max(engagement, 0)) + age / POPULARITY_DECAY_SECONDS, 7)
+
+
+def score_for_dream(dream) -> float:
+    return popularity_score(dream.likes_count_cache, dream.comments_count_cache,
+                            dream.views_count, dream.created_at)
+
+
+def refresh_popularity(dream_id: int) -> None:
+    """Recalcule le score d'un rêve après un événement social"""
+    from .models import Dream
+    
+    dream = Dream.objects.filter(dream_id=dream_id).only(
+        'likes_count_cache', 'comments_count_cache', 'views_count', 'created_at'
+    ).first()
+    if dream is not None:
+        Dream.objects.filter(dream_id=dream_id).update(popularity_score=score_for_dream(dream))
@@ -0,0 +1,95 @@
+# backend/dreams/renderers.py
+"""
+Rendu des rêves exportés (registre de renderers).
+
+Chaque renderer s'appuie sur un template fichier de
+`dreams/templates/dreams/export/`, chargé par `get_template` : avec le
+loader en cache de Django, il est lu et compilé une seule fois par
+process au lieu d'être re-parsé à chaque export.
+
+Renderers fournis : `html` (page autonome), `print` (HTML prêt pour
+l'impression / la conversion PDF) et `md` (Markdown). D'autres formats
+peuvent être ajoutés avec `register_renderer`.
+"""
+from datetime import datetime
+from typing import Dict, Optional
+
+from django.template.loader import get_template
+
+PRIVACY_LABELS = {
+    'private': '🔒 Privé',
+    'friends_only': '👥 Amis seulement',
+    'public': '🌍 Public'
+}
+
+
+def format_dream_date(dream) -> str:
+    if dream.date:
+        try:
+            return dream.date.strftime('%d/%m/%Y')
+        except:
+            return str(dream.date)
+    return 'Date inconnue'
+
+
+class DreamRenderer:
+    """
+    Renderer d'export basé sur un template.
+    `inline_image` : image embarquée en data URI par défaut (fichier autonome),
+    sinon URL de l'image.
+    """
+    def __init__(self, name: str, template_name: str, content_type: str, extension: str,
+                 inline_image: bool = True):
+        self.name = name
+        self.template_name = template_name
+        self.content_type = content_type
+        self.extension = extension
+        self.inline_image = inline_image
+
+    def context(self, dream, image_src: Optional[str] = None) -> dict:
+        if image_src is None:
+            if self.inline_image:
+                image_src = dream.image_data_uri() or ''
+            else:
+                image_src = dream.image_url if dream.image_key else ''
+        transcription = dream.transcription or ''
+        return {
+            'dream_date': format_dream_date(dream),
+            'privacy_label': PRIVACY_LABELS.get(dream.privacy, '🔒 Privé'),
+            'transcription': transcription,
+            'transcription_quote': '\n'.join(f'> {line}' for line in transcription.splitlines()),
+            'reformed_prompt': dream.reformed_prompt or '',
+            'emotion_display': dream.emotion_display if dream.emotion else '',
+            'has_image': dream.has_image,
+            'image_data': image_src,
+            'export_date': datetime.now().strftime('%d/%m/%Y à %H:%M'),
+        }
+
+    def render(self, dream, image_src: Optional[str] = None) -> str:
+        """`image_src` remplace la source par défaut (ex: chemin relatif dans une archive)"""
+        return get_template(self.template_name).render(self.context(dream, image_src))
+
+
+_renderers: Dict[str, DreamRenderer] = {}
+
+
+def register_renderer(renderer: DreamRenderer) -> DreamRenderer:
+    _renderers[renderer.name] = renderer
+    return renderer
+
+
+def get_renderer(name: str) -> DreamRenderer:
+    try:
+        return _renderers[name]
+    except KeyError:
+        raise ValueError(f"Format d'export invalide. Utilisez: {', '.join(_renderers)}")
+
+
+def renderer_names():
+    return list(_renderers)
+
+
+register_renderer(DreamRenderer('html', 'dreams/export/dream.html', 'text/html; charset=utf-8', 'html'))
+register_renderer(DreamRenderer('print', 'dreams/export/dream_print.html', 'text/html; charset=utf-8', 'html'))
+register_renderer(DreamRenderer('md', 'dreams/export/dream.md', 'text/markdown; charset=utf-8', 'md',
+                                inline_image=False))
@@ -0,0 +1,110 @@
+# backend/dreams/retry.py
+"""
+Moteur de tentatives à budget pour les appels distants lents (Pollinations).
+
+`call_with_retries` enchaîne des tentatives (une fonction par URL/essai)
+sous une échéance globale :
+- backoff exponentiel avec jitter complet entre deux échecs, jamais au-delà
+  du budget restant (pas de `time.sleep` fixe)
+- chaque tentative reçoit un timeout borné par le temps restant
+- hedging optionnel : si une tentative n'a pas répondu après `hedge_after`
+  secondes, la suivante démarre en parallèle ; la première réponse valide
+  l'emporte et les autres sont annulées (événement `cancelled` à vérifier
+  pendant le téléchargement, tentatives pas encore démarrées abandonnées)
+
+Une tentative signale une réponse invalide en levant une exception.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, List, Optional
+
+# Tentative : f(timeout en secondes, événement d'annulation) → valeur
+Attempt = Callable[[float, threading.Event], Any]
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='dream-retry')
+
+
+class RetryBudgetExceeded(Exception):
+    """Toutes les tentatives ont échoué ou l'échéance est dépassée"""
+
+    def __init__(self, message: str, errors: List[BaseException]):
+        super().__init__(message)
+        self.errors = errors
+
+
+class AttemptCancelled(Exception):
+    """Tentative interrompue : une autre a déjà réussi"""
+
+
+def backoff_delay(failures: int, base: float, cap: float, rng: random.Random = random) -> float:
+    """Backoff exponentiel avec jitter complet : uniforme dans [0, min(cap, base·2^n)]"""
+    return rng.uniform(0, min(cap, base * (2 ** max(failures - 1, 0))))
+
+
+def call_with_retries(attempts: List[Attempt], deadline: float, attempt_timeout: float,
+                      backoff_base: float = 0.5, backoff_max: float = 4.0,
+                      hedge_after: Optional[float] = None,
+                      message: str = "Toutes les tentatives ont échoué") -> Any:
+    """
+    Exécute `attempts` dans l'ordre jusqu'au premier succès, en `deadline`
+    secondes au plus. Lève RetryBudgetExceeded sinon.
+    """
+    start = time.monotonic()
+    end = start + deadline
+    cancelled = threading.Event()
+    pending = {}
+    errors: List[BaseException] = []
+    next_index = 0
+    next_launch = start  # Prochaine tentative autorisée (backoff ou hedging)
+
+    def launch():
+        nonlocal next_index
+        timeout = max(min(attempt_timeout, end - time.monotonic()), 0.1)
+        future = _executor.submit(attempts[next_index], timeout, cancelled)
+        pending[future] = next_index
+        next_index += 1
+
+    try:
+        while True:
+            now = time.monotonic()
+            if now >= end:
+                break
+
+            can_launch = next_index < len(attempts) and now >= next_launch
+            if can_launch and (not pending or hedge_after is not None):
+                launch()
+                if hedge_after is not None:
+                    next_launch = now + hedge_after
+
+            if not pending:
+                if next_index >= len(attempts):
+                    break  # Plus rien à tenter
+                # Attente du backoff, bornée par l'échéance
+                time.sleep(max(min(next_launch, end) - time.monotonic(), 0))
+                continue
+
+            # Réveil au premier résultat, à la prochaine tentative de hedging ou à l'échéance
+            wake = end
+            if hedge_after is not None and next_index < len(attempts):
+                wake = min(wake, next_launch)
+            done, _ = wait(list(pending), timeout=max(wake - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    print(f"❌ Tentative {index + 1}/{len(attempts)} échouée: {e}")
+                    errors.append(e)
+                    # Échec : la tentative suivante attend le backoff (même en hedging)
+                    next_launch = time.monotonic() + backoff_delay(len(errors), backoff_base, backoff_max)
+
+        elapsed = time.monotonic() - start
+        raise RetryBudgetExceeded(f"{message} ({len(errors)} échecs en {elapsed:.1f}s)", errors)
+    finally:
+        # Les perdantes s'arrêtent au prochain contrôle, les non démarrées sont abandonnées
+        cancelled.set()
+        for future in pending:
+            future.cancel()
@@ -65,7 +65,7 @@ class DreamListSerializer(serializers.ModelSerializer):
     
     def get_has_image(self, obj):
         """Le rêve a-t-il une image ?"""
-        return bool(obj.img_b64)
+        return obj.has_image
     
     def get_truncated_transcription(self, obj):
         """Transcription tronquée pour les listes"""
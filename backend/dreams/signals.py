@@ -0,0 +1,34 @@
+"""
+Invalidation du cache du feed public (dreams/feed_cache.py) sur les
+événements qui ne passent pas par Dream.save :
+
+- suppression d'un rêve, y compris en masse (`queryset.delete()`) ou en
+  cascade à la suppression de son auteur
+- modification du profil d'un auteur (nom et email figurent dans les pages
+  en cache)
+
+Création et changement de privacy sont gérés par Dream.save, likes et
+commentaires par social/signals.py.
+"""
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .feed_cache import invalidate_public_feed
+from .models import Dream
+
+# Champs utilisateur repris dans les pages du feed public
+FEED_USER_FIELDS = {'username', 'email'}
+
+
+@receiver(post_delete, sender=Dream)
+def dream_deleted(sender, instance, **kwargs):
+    invalidate_public_feed()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Nouvel utilisateur : aucun rêve en cache. Connexion, stats : champs non affichés
+    if created or (update_fields is not None and not FEED_USER_FIELDS & set(update_fields)):
+        return
+    invalidate_public_feed()
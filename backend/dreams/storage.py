@@ -0,0 +1,146 @@
+# backend/dreams/storage.py
+"""
+Stockage des images de rêves, adressé par contenu.
+
+Chaque image est enregistrée sur le disque sous le SHA-256 de ses octets
+(`<sha256>.<ext>`), ce qui déduplique automatiquement les images identiques
+et permet de les servir avec un ETag stable et un cache long.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+from django.conf import settings
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Types MIME supportés
+# ──────────────────────────────────────────────────────────────────────────────
+MIME_TO_EXT = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+    'image/svg+xml': 'svg',
+}
+EXT_TO_MIME = {ext: mime for mime, ext in MIME_TO_EXT.items()}
+
+BLOB_KEY_RE = re.compile(r'^[0-9a-f]{64}\.(png|jpg|gif|webp|svg)$')
+DATA_URI_RE = re.compile(r'^data:(?P<mime>[\w.+-]+/[\w.+-]+);base64,(?P<data>.*)$', re.DOTALL)
+
+
+class BlobStore:
+    """Backend de stockage local (système de fichiers) adressé par SHA-256."""
+
+    def __init__(self, root=None):
+        self._root = root
+
+    @property
+    def root(self) -> Path:
+        # Lu à chaque accès pour respecter override_settings dans les tests
+        return Path(self._root or settings.DREAM_BLOB_ROOT)
+
+    def path(self, key: str) -> Path:
+        """Chemin disque d'un blob (répertoires shardés sur 2 niveaux)."""
+        if not is_valid_key(key):
+            raise ValueError(f"Clé de blob invalide : {key}")
+        return self.root / key[:2] / key[2:4] / key
+
+    def exists(self, key: str) -> bool:
+        return is_valid_key(key) and self.path(key).is_file()
+
+    def put(self, data: bytes, content_type: str) -> str:
+        """Enregistre les octets et retourne leur clé (idempotent)."""
+        ext = MIME_TO_EXT.get(content_type)
+        if ext is None:
+            raise ValueError(f"Type d'image non supporté : {content_type}")
+
+        key = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+        target = self.path(key)
+        if target.is_file():
+            return key  # Déjà stocké : déduplication
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Écriture atomique : fichier temporaire puis renommage
+        fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, target)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return key
+
+    def open(self, key: str):
+        return open(self.path(key), 'rb')
+
+    def read(self, key: str) -> bytes:
+        with self.open(key) as f:
+            return f.read()
+
+    def delete(self, key: str) -> None:
+        try:
+            self.path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def get_blob_store() -> BlobStore:
+    """Store configuré par settings.DREAM_BLOB_ROOT."""
+    return BlobStore()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────────
+def is_valid_key(key: str) -> bool:
+    return bool(key) and bool(BLOB_KEY_RE.match(key))
+
+
+def content_type_for_key(key: str) -> str:
+    return EXT_TO_MIME.get(key.rsplit('.', 1)[-1], 'application/octet-stream')
+
+
+def etag_for_key(key: str) -> str:
+    """Le hash du contenu fait office d'ETag."""
+    return key.split('.', 1)[0]
+
+
+def decode_data_uri(data_uri: str) -> Optional[Tuple[str, bytes]]:
+    """Décode un data URI base64 en (mime, octets), ou None si invalide."""
+    if not data_uri:
+        return None
+    match = DATA_URI_RE.match(data_uri.strip())
+    if not match or match.group('mime') not in MIME_TO_EXT:
+        return None
+    try:
+        data = base64.b64decode(match.group('data'), validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    if not data:
+        return None
+    return match.group('mime'), data
+
+
+def store_data_uri(data_uri: str, store: Optional[BlobStore] = None) -> Optional[str]:
+    """Stocke l'image d'un data URI et retourne sa clé (None si non décodable)."""
+    decoded = decode_data_uri(data_uri)
+    if decoded is None:
+        return None
+    mime, data = decoded
+    return (store or get_blob_store()).put(data, mime)
+
+
+def blob_as_data_uri(key: str, store: Optional[BlobStore] = None) -> Optional[str]:
+    """Reconstruit le data URI d'un blob (export HTML autonome, migration inverse)."""
+    store = store or get_blob_store()
+    if not store.exists(key):
+        return None
+    encoded = base64.b64encode(store.read(key)).decode('utf-8')
+    return f"data:{content_type_for_key(key)};base64,{encoded}"
@@ -0,0 +1,68 @@
+# backend/dreams/streaming.py
+"""
+Réponses JSON en streaming pour les longues listes (journal, messages).
+
+Au lieu de construire toute la liste de dicts puis de la rendre d'un
+bloc, les éléments sont lus par `.iterator(chunk_size=...)` et émis
+au fil de l'eau : la mémoire du worker reste bornée par un lot.
+
+Opt-in par endpoint avec `?stream=1`.
+"""
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+# Lignes lues par aller-retour DB / éléments par morceau HTTP
+STREAM_CHUNK_SIZE = 500
+STREAM_BATCH_SIZE = 50
+
+
+def wants_stream(request) -> bool:
+    """Réponse en streaming demandée ? (?stream=1)"""
+    return request.GET.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def _dumps(value) -> str:
+    # Même encodage des dates/décimaux que le JSONRenderer de DRF
+    return json.dumps(value, cls=JSONEncoder, ensure_ascii=False)
+
+
+def iter_json_array(items: Iterable, serialize: Callable[[Any], Any],
+                    batch_size: int = STREAM_BATCH_SIZE) -> Iterator[str]:
+    """Émet un tableau JSON par morceaux de `batch_size` éléments"""
+    yield '['
+    batch, first = [], True
+    for item in items:
+        batch.append(_dumps(serialize(item)))
+        if len(batch) >= batch_size:
+            yield ('' if first else ',') + ','.join(batch)
+            batch, first = [], False
+    if batch:
+        yield ('' if first else ',') + ','.join(batch)
+    yield ']'
+
+
+def streaming_json_response(queryset, serialize: Callable[[Any], Any], key: Optional[str] = None,
+                            extra: Optional[Dict[str, Any]] = None,
+                            chunk_size: int = STREAM_CHUNK_SIZE) -> StreamingHttpResponse:
+    """
+    Réponse JSON streamée sur `queryset.iterator()`.
+
+    Sans `key` : tableau JSON nu. Avec `key` : objet {key: [...], **extra}
+    (les valeurs de `extra` doivent être calculées avant l'appel).
+    """
+    items = queryset.iterator(chunk_size=chunk_size)
+
+    def generate():
+        if key is None:
+            yield from iter_json_array(items, serialize)
+            return
+        yield '{' + _dumps(key) + ':'
+        yield from iter_json_array(items, serialize)
+        for name, value in (extra or {}).items():
+            yield ',' + _dumps(name) + ':' + _dumps(value)
+        yield '}'
+
+    return StreamingHttpResponse(generate(), content_type='application/json')
@@ -15,6 +15,18 @@ Organisation:
 - features/steps/test_apis.py : Tests des APIs REST
 - features/steps/test_security.py : Tests de sécurité
 - features/steps/test_export.py : Tests d'export HTML
+- features/steps/test_storage.py : Tests du stockage des images
+- features/steps/test_jobs.py : Tests de la génération asynchrone
+- features/steps/test_pipeline.py : Tests de l'orchestration du pipeline
+- features/steps/test_feeds.py : Tests des feeds public et amis
+- features/steps/test_ai_cache.py : Tests des caches de résultats d'IA
+- features/steps/test_http_client.py : Tests des clients HTTP partagés
+- features/steps/test_retry.py : Tests du moteur de retries
+- features/steps/test_audio.py : Tests de la lecture des fichiers audio
+- features/steps/test_audio_probe.py : Tests de la lecture des en-têtes audio
+- features/steps/test_audio_preprocess.py : Tests du prétraitement audio
+- features/steps/test_audio_segments.py : Tests de la transcription par segments
+- features/steps/test_uploads.py : Tests de l'envoi par segments
 """
 
 # Import des tests modulaires depuis features/steps
@@ -26,3 +38,15 @@ from .features.steps.test_images import *
 from .features.steps.test_apis import *
 from .features.steps.test_security import *
 from .features.steps.test_export import *
+from .features.steps.test_storage import *
+from .features.steps.test_jobs import *
+from .features.steps.test_pipeline import *
+from .features.steps.test_feeds import *
+from .features.steps.test_ai_cache import *
+from .features.steps.test_http_client import *
+from .features.steps.test_retry import *
+from .features.steps.test_audio import *
+from .features.steps.test_audio_probe import *
+from .features.steps.test_audio_preprocess import *
+from .features.steps.test_audio_segments import *
+from .features.steps.test_uploads import *
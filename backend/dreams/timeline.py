@@ -0,0 +1,51 @@
+# backend/dreams/timeline.py
+"""
+Timeline amis matérialisée (fan-out à l'écriture).
+
+Quand un rêve `public` ou `friends_only` est publié, une entrée est écrite
+dans la timeline de chaque ami de l'auteur. Le feed amis devient une
+lecture par plage sur l'index (owner, -created_at) au lieu d'un
+`user__id__in=<tous les amis>` trié à chaque requête.
+
+Synchronisation :
+- création / changement de privacy d'un rêve  → sync_dream_timeline (Dream.save)
+- amitié acceptée / supprimée                  → sync_friendship_timelines (social/signals.py)
+"""
+from django.db.models import Q
+
+TIMELINE_PRIVACIES = ('public', 'friends_only')
+
+
+def sync_dream_timeline(dream) -> None:
+    """Aligne les entrées d'un rêve sur les amis actuels de son auteur"""
+    from social.friends import get_friend_ids
+    from .models import TimelineEntry
+    
+    owners = get_friend_ids(dream.user) if dream.privacy in TIMELINE_PRIVACIES else frozenset()
+    
+    TimelineEntry.objects.filter(dream=dream).exclude(owner_id__in=owners).delete()
+    if owners:
+        TimelineEntry.objects.bulk_create([
+            TimelineEntry(owner_id=owner_id, dream=dream, created_at=dream.created_at)
+            for owner_id in owners
+        ], ignore_conflicts=True)
+
+
+def sync_friendship_timelines(a_id: int, b_id: int, friends: bool) -> None:
+    """Back-fill (amitié acceptée) ou purge (amitié supprimée) des timelines de a et b"""
+    from .models import Dream, TimelineEntry
+    
+    if not friends:
+        TimelineEntry.objects.filter(
+            Q(owner_id=a_id, dream__user_id=b_id) | Q(owner_id=b_id, dream__user_id=a_id)
+        ).delete()
+        return
+    
+    dreams = Dream.objects.filter(
+        user_id__in=(a_id, b_id), privacy__in=TIMELINE_PRIVACIES
+    ).values_list('dream_id', 'user_id', 'created_at')
+    
+    TimelineEntry.objects.bulk_create([
+        TimelineEntry(owner_id=b_id if user_id == a_id else a_id, dream_id=dream_id, created_at=created_at)
+        for dream_id, user_id, created_at in dreams.iterator()
+    ], ignore_conflicts=True)
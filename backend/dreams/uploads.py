@@ -0,0 +1,187 @@
+# backend/dreams/uploads.py
+"""
+Envoi d'un enregistrement par segments pendant la dictée.
+
+Le navigateur redémarre son MediaRecorder toutes les quelques secondes :
+chaque segment est un fichier audio complet (en-têtes compris), envoyé dès
+qu'il est prêt. Le serveur le valide, le stocke et lance aussitôt sa
+transcription en arrière-plan ; le résultat atterrit dans le cache de
+transcription (voir ai_cache.py). À la fin de l'enregistrement, `finish`
+ne transcrit plus que ce qui manque (le dernier segment, en général),
+met les textes bout à bout puis enchaîne la suite du pipeline (reformulation,
+émotion, image).
+
+Les transcriptions d'arrière-plan ne touchent pas à la base : seulement le
+stockage des fichiers et le cache disque.
+"""
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from .ai_cache import SingleFlight
+from .models import DreamUpload, DreamUploadSegment
+from .pipeline import generate_dream_from
+from .utils import (
+    transcribe_audio, transcribe_audio_fallback, validate_audio_complete,
+    MAX_AUDIO_SIZE_MB, MAX_AUDIO_DURATION_MINUTES
+)
+
+UPLOAD_MAX_SEGMENTS = getattr(settings, 'DREAM_UPLOAD_MAX_SEGMENTS', 120)
+# Envoi jamais terminé (onglet fermé) : segments supprimés après ce délai
+UPLOAD_STALE_AFTER = timedelta(minutes=getattr(settings, 'DREAM_UPLOAD_STALE_MINUTES', 30))
+UPLOAD_MAX_WORKERS = getattr(settings, 'TRANSCRIPTION_MAX_WORKERS', 4)
+
+# Transcription d'arrière-plan et `finish` sur le même segment : un seul appel
+_segment_flights = SingleFlight()
+
+_upload_executor = None
+_upload_executor_lock = threading.Lock()
+
+
+class UploadError(ValueError):
+    """Segment ou envoi refusé (message destiné au client)"""
+
+    def __init__(self, message: str, details=None):
+        super().__init__(message)
+        self.details = details or []
+
+
+def _get_upload_executor() -> ThreadPoolExecutor:
+    """Pool des transcriptions de segments (distinct des pools pipeline et transcription)."""
+    global _upload_executor
+    with _upload_executor_lock:
+        if _upload_executor is None:
+            _upload_executor = ThreadPoolExecutor(
+                max_workers=UPLOAD_MAX_WORKERS, thread_name_prefix="dream-upload"
+            )
+        return _upload_executor
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Segments
+# ──────────────────────────────────────────────────────────────────────────────
+def create_upload(user) -> DreamUpload:
+    """Ouvre un envoi par segments (et fait le ménage des envois abandonnés)."""
+    purge_stale_uploads()
+    upload = DreamUpload.objects.create(user=user)
+    print(f"📥 Envoi par segments ouvert: {upload.upload_id}")
+    return upload
+
+
+def add_segment(upload: DreamUpload, index: int, audio_file) -> DreamUploadSegment:
+    """Valide et stocke un segment, puis lance sa transcription. Un renvoi remplace le segment."""
+    if index >= UPLOAD_MAX_SEGMENTS:
+        raise UploadError(f"Trop de segments. Maximum: {UPLOAD_MAX_SEGMENTS}")
+
+    validation = validate_audio_complete(audio_file)
+    if not validation['valid']:
+        raise UploadError("Fichier audio invalide", validation['errors'])
+
+    # Limites de taille et de durée appliquées à l'enregistrement entier
+    size = audio_file.size or 0
+    duration = validation['details'].get('duration_seconds')
+    if duration is None:
+        # Sans durée lue dans les en-têtes, la limite de durée ne pourrait pas être appliquée
+        raise UploadError("Durée du segment illisible", ["Format audio non reconnu (WebM, OGG, MP3, M4A, WAV ou FLAC attendu)"])
+    totals = upload.segments.exclude(index=index).aggregate(size=Sum('size'), duration=Sum('duration'))
+    if (totals['size'] or 0) + size > MAX_AUDIO_SIZE_MB * 1024 * 1024:
+        raise UploadError(f'Enregistrement trop volumineux. Maximum autorisé: {MAX_AUDIO_SIZE_MB}MB')
+    if (totals['duration'] or 0) + duration > MAX_AUDIO_DURATION_MINUTES * 60:
+        raise UploadError(f'Enregistrement trop long. Maximum autorisé: {MAX_AUDIO_DURATION_MINUTES} minutes')
+
+    for previous in upload.segments.filter(index=index):
+        _delete_segment(previous)
+
+    extension = os.path.splitext(getattr(audio_file, 'name', '') or '')[1].lower() or '.webm'
+    segment = DreamUploadSegment(upload=upload, index=index, size=size, duration=duration)
+    # Nom unique par envoi : un segment renvoyé ne partage pas la transcription en cours de l'ancien
+    segment.audio.save(f"{upload.upload_id}_{index}_{uuid.uuid4().hex[:8]}{extension}", audio_file, save=False)
+    segment.save()
+
+    _get_upload_executor().submit(_transcribe_in_background, segment.audio.storage, segment.audio.name)
+    return segment
+
+
+def transcribe_segment(storage, name: str) -> Optional[str]:
+    """Transcription d'un segment stocké (cache de transcription, appels concurrents regroupés).
+
+    None si Groq échoue : pas de texte de secours par segment (voir finish_upload).
+    """
+    def compute():
+        with storage.open(name, 'rb') as audio_file:
+            return transcribe_audio(audio_file, fallback=False)
+    return _segment_flights.do(name, compute)
+
+
+def _transcribe_in_background(storage, name: str) -> None:
+    # En cas d'échec, `finish` refera la transcription
+    try:
+        if transcribe_segment(storage, name):
+            print(f"🎙️ Segment transcrit: {name}")
+        else:
+            print(f"⚠️ Segment non transcrit: {name}")
+    except Exception as e:
+        print(f"❌ Erreur transcription segment {name}: {e}")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Fin de l'enregistrement
+# ──────────────────────────────────────────────────────────────────────────────
+def finish_upload(upload: DreamUpload, segment_count: int, on_stage=None) -> dict:
+    """Recolle les transcriptions des segments et génère la preview ; l'envoi est ensuite supprimé."""
+    segments = list(upload.segments.order_by('index'))
+    received = [segment.index for segment in segments]
+    if segment_count < 1 or received != list(range(segment_count)):
+        missing = sorted(set(range(segment_count)) - set(received))
+        raise UploadError("Segments manquants", [f"Segments manquants: {missing}"] if missing else [])
+
+    files = [(segment.audio.storage, segment.audio.name) for segment in segments]
+
+    def transcribe():
+        futures = [_get_upload_executor().submit(transcribe_segment, storage, name) for storage, name in files]
+        texts = [future.result() for future in futures]
+        if not all(texts):
+            # Un seul texte de secours pour tout l'enregistrement, pas un par segment
+            print("⚠️ Segment non transcrit, utilisation du fallback")
+            return transcribe_audio_fallback(segments[0].audio)
+        # Segments consécutifs sans recouvrement (MediaRecorder redémarré) : simple concaténation,
+        # stitch_transcripts retirerait des mots réellement répétés à la jonction
+        return ' '.join(text.strip() for text in texts)
+
+    try:
+        return generate_dream_from(transcribe, on_stage)
+    finally:
+        discard_upload(upload)
+
+
+def _delete_segment(segment: DreamUploadSegment) -> None:
+    try:
+        segment.audio.delete(save=False)
+    except Exception as e:
+        print(f"⚠️ Suppression audio impossible pour {segment}: {e}")
+    segment.delete()
+
+
+def discard_upload(upload: DreamUpload) -> None:
+    for segment in upload.segments.all():
+        _delete_segment(segment)
+    upload.delete()
+
+
+def purge_stale_uploads() -> int:
+    """Supprime les envois jamais terminés. Retourne le nombre supprimé."""
+    stale = DreamUpload.objects.filter(created_at__lt=timezone.now() - UPLOAD_STALE_AFTER)
+    count = 0
+    for upload in stale:
+        discard_upload(upload)
+        count += 1
+    if count:
+        print(f"🧹 {count} envoi(s) par segments abandonné(s) supprimé(s)")
+    return count
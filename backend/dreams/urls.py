@@ -6,8 +6,12 @@ urlpatterns = [
     path("", views.home_page, name="home"),                     # petite home safe
     path("create", views.DreamCreateAPIView.as_view(), name="create_dream"),  # Ancienne API (sauvegarde automatique)
     path("generate", views.DreamGenerateAPIView.as_view(), name="generate_dream"),  # Nouvelle API (preview)
+    path("generate/uploads", views.DreamUploadCreateAPIView.as_view(), name="dream_upload"),  # Preview par segments : ouverture
+    path("generate/uploads/<uuid:upload_id>/segments/<int:index>", views.DreamUploadSegmentAPIView.as_view(), name="dream_upload_segment"),  # Envoi d'un segment
+    path("generate/uploads/<uuid:upload_id>/finish", views.DreamUploadFinishAPIView.as_view(), name="dream_upload_finish"),  # Fin : transcription + preview
     path("save", views.DreamSaveAPIView.as_view(), name="save_dream"),  # Sauvegarder
     path("list", views.DreamListAPIView.as_view(), name="list_dreams"),  # Lister
+    path("jobs/<uuid:job_id>", views.DreamJobStatusAPIView.as_view(), name="dream_job_status"),  # Suivi génération asynchrone
     
     # 🆕 Feed social
     path("feed/public", views.PublicDreamsFeedAPIView.as_view(), name="public_feed"),  # Feed public
@@ -16,6 +20,10 @@ urlpatterns = [
     # 🆕 Gestion privacy
     path("<int:dream_id>/privacy", views.DreamUpdatePrivacyAPIView.as_view(), name="update_dream_privacy"),  # Changer privacy
     
+    # 🆕 Images (stockage adressé par contenu)
+    path("images/<str:key>", views.dream_image, name="dream_image"),  # Servir une image
+    
     # 🆕 Export
     path("<int:dream_id>/export", views.DreamExportAPIView.as_view(), name="export_dream"),  # Exporter en HTML
+    path("export", views.DreamJournalExportAPIView.as_view(), name="export_journal"),  # Exporter tout le journal
 ]
\ No newline at end of file
@@ -3,19 +3,34 @@ import base64
 import io
 import os
 import tempfile
-import requests
 import re
 import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-from typing import Tuple, Union
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
 from datetime import datetime
 
 from dotenv import load_dotenv
 from groq import Groq
 
+from django.conf import settings
 from django.http import HttpResponse
-from django.template import Template, Context
+from . import http_client
+from .audio import AudioSource, open_audio, sha256_file
+from .audio_probe import probe_audio, AudioProbeError
+from .audio_preprocess import PREPROCESS_VERSION, prepared_audio, preprocessing_enabled
+from .audio_segments import split_audio, stitch_transcripts
+from .retry import call_with_retries, AttemptCancelled
 from .models import Dream
+from .storage import store_data_uri, blob_as_data_uri
+from .ai_cache import (
+    transcription_cache, transcription_cache_key, llm_cache, llm_cache_key, prompt_version, cached_call,
+    image_cache, image_cache_key, image_flights
+)
+from .images import generate_image_variants
+from .renderers import get_renderer, format_dream_date
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Chargement .env
@@ -69,14 +84,46 @@ def validate_audio_file(audio_file) -> dict:
                 }
             }
         
+        details = {
+            'file_size_mb': round(file_size / (1024 * 1024), 2) if file_size else 'unknown',
+            'file_extension': file_ext,
+            'filename': filename
+        }
+        
+        # Analyser les en-têtes : durée et format réels, sans décoder le fichier
+        try:
+            with open_audio(audio_file) as audio:
+                info = probe_audio(audio.file)
+        except AudioProbeError as e:
+            details['probe_error'] = str(e)
+            return {'valid': False, 'error': 'Fichier audio illisible ou corrompu', 'details': details}
+        
+        if info is None:
+            if getattr(settings, 'AUDIO_PROBE_STRICT', False):
+                return {
+                    'valid': False,
+                    'error': f'Contenu audio non reconnu. Formats autorisés: {", ".join(ALLOWED_AUDIO_FORMATS)}',
+                    'details': details
+                }
+        else:
+            details.update({
+                'container': info.format,
+                'codec': info.codec,
+                'duration_seconds': info.duration,
+                'sample_rate': info.sample_rate,
+                'channels': info.channels,
+            })
+            if info.duration and info.duration > MAX_AUDIO_DURATION_MINUTES * 60:
+                return {
+                    'valid': False,
+                    'error': f'Enregistrement trop long. Maximum autorisé: {MAX_AUDIO_DURATION_MINUTES} minutes',
+                    'details': {**details, 'max_duration_minutes': MAX_AUDIO_DURATION_MINUTES}
+                }
+        
         return {
             'valid': True,
             'error': None,
-            'details': {
-                'file_size_mb': round(file_size / (1024 * 1024), 2) if file_size else 'unknown',
-                'file_extension': file_ext,
-                'filename': filename
-            }
+            'details': details
         }
         
     except Exception as e:
@@ -112,7 +159,8 @@ def _require(val: str, name: str) -> str:
     return val
 
 def _groq_client() -> Groq:
-    return Groq(api_key=_require(GROQ_API_KEY, "GROQ_API_KEY"))
+    # Client partagé : connexions keep-alive réutilisées entre les appels
+    return http_client.get_groq_client(_require(GROQ_API_KEY, "GROQ_API_KEY"))
 
 def _to_filename_and_bytes(obj: Union[bytes, io.BufferedIOBase, "InMemoryUploadedFile", "TemporaryUploadedFile", str]) -> Tuple[str, bytes]:
     """Normalise l'input audio en (filename, bytes)."""
@@ -153,79 +201,127 @@ def _to_filename_and_bytes(obj: Union[bytes, io.BufferedIOBase, "InMemoryUploade
 # ──────────────────────────────────────────────────────────────────────────────
 # 1) Speech-to-Text (Groq Whisper)
 # ──────────────────────────────────────────────────────────────────────────────
-def transcribe_audio(audio_file) -> str:
-    """Transcrit l'audio en texte avec Groq Whisper v0.4.2."""
+def transcribe_audio(audio_file, fallback: bool = True) -> Optional[str]:
+    """Transcrit l'audio en texte avec Groq Whisper (en cache par contenu audio + modèle).
+
+    Si Groq échoue : texte de secours, ou None avec `fallback=False` (segments d'un envoi).
+    """
+    model = _require(GROQ_WHISPER_MODEL, "GROQ_WHISPER_MODEL")
+
+    # Lecture en flux : ni copie complète en mémoire ni fichier temporaire supplémentaire
+    with open_audio(audio_file) as audio:
+        # ♻️ Même enregistrement (nouvel essai, doublon) : pas de nouvel envoi à Groq
+        preprocessing = PREPROCESS_VERSION if preprocessing_enabled() else ''
+        cache_key = transcription_cache_key(sha256_file(audio.file), model, preprocessing)
+        cached = transcription_cache.get(cache_key)
+        if cached is not None:
+            print(f"♻️ Transcription trouvée en cache ({cache_key[:12]})")
+            return cached['text']
+
+        # 🎚️ WAV PCM ramené en mono 16 kHz sans silences : moins d'octets à envoyer
+        with prepared_audio(audio) as prepared:
+            # ✂️ Enregistrement long : segments transcrits en parallèle, sinon un seul appel
+            text = _transcribe_segmented(prepared, model) or _transcribe_with_groq(prepared, model)
+
+    if not text:
+        # Le fallback n'est pas mis en cache : Groq sera retenté au prochain essai
+        if not fallback:
+            print("⚠️ Toutes les méthodes Groq ont échoué")
+            return None
+        print("⚠️ Toutes les méthodes Groq ont échoué, utilisation du fallback")
+        return transcribe_audio_fallback(audio_file)
+
+    transcription_cache.set(cache_key, {'text': text, 'model': model})
+    return text
+
+TRANSCRIPTION_MAX_WORKERS = getattr(settings, 'TRANSCRIPTION_MAX_WORKERS', 4)
+
+_transcription_executor = None
+_transcription_executor_lock = threading.Lock()
+
+def _get_transcription_executor() -> ThreadPoolExecutor:
+    """Pool dédié aux segments (la transcription tourne déjà dans le pool du pipeline)."""
+    global _transcription_executor
+    with _transcription_executor_lock:
+        if _transcription_executor is None:
+            _transcription_executor = ThreadPoolExecutor(
+                max_workers=TRANSCRIPTION_MAX_WORKERS, thread_name_prefix="dream-transcription"
+            )
+        return _transcription_executor
+
+def _transcribe_segmented(audio: AudioSource, model: str) -> Optional[str]:
+    """Transcription par segments en parallèle ; None si l'audio n'est pas découpable ou si un segment échoue."""
+    segments = split_audio(audio)
+    if not segments:
+        return None
+
+    print(f"✂️ Transcription en {len(segments)} segments")
+    stem = Path(audio.filename).stem
+    futures = [
+        _get_transcription_executor().submit(
+            _transcribe_with_groq, AudioSource(f"{stem}_{index}.wav", io.BytesIO(data), len(data), None), model
+        )
+        for index, data in enumerate(segments)
+    ]
+    texts = [future.result() for future in futures]
+
+    if not all(texts):
+        print("⚠️ Segment non transcrit, nouvel essai en un seul appel")
+        return None
+    return stitch_transcripts(texts)
+
+def _transcribe_with_groq(audio: AudioSource, model: str) -> Optional[str]:
+    """Appel Groq Whisper (API moderne puis directe), None si tout échoue."""
     client = _groq_client()
-    filename, content = _to_filename_and_bytes(audio_file)
     
     try:
-        # Pour groq v0.4.2, utiliser l'API directe
-        import tempfile
-        import os
+        # Tentative 1: API moderne si disponible
+        if hasattr(client, 'audio') and hasattr(client.audio, 'transcriptions'):
+            try:
+                audio.file.seek(0)
+                resp = client.audio.transcriptions.create(
+                    model=model,
+                    file=(audio.filename, audio.file),
+                )
+                text = getattr(resp, "text", None)
+                if text:
+                    return text.strip()
+            except Exception as e:
+                print(f"❌ API moderne échouée: {e}")
         
-        # Créer un fichier temporaire
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as tmp_file:
-            tmp_file.write(content)
-            tmp_file.flush()
-            
-            # Ouvrir le fichier en mode lecture binaire
-            with open(tmp_file.name, 'rb') as audio_file_obj:
-                # Tentative 1: API moderne si disponible
-                if hasattr(client, 'audio') and hasattr(client.audio, 'transcriptions'):
-                    try:
-                        resp = client.audio.transcriptions.create(
-                            model=_require(GROQ_WHISPER_MODEL, "GROQ_WHISPER_MODEL"),
-                            file=audio_file_obj,
-                        )
-                        text = getattr(resp, "text", None)
-                        if text:
-                            return text.strip()
-                    except Exception as e:
-                        print(f"❌ API moderne échouée: {e}")
+        # Tentative 2: API directe pour v0.4.2
+        if hasattr(client, '_client'):
+            try:
+                # Préparer la requête pour l'API Groq v0.4.2
+                url = "https://api.groq.com/openai/v1/audio/transcriptions"
+                headers = {
+                    "Authorization": f"Bearer {GROQ_API_KEY}"
+                }
+                audio.file.seek(0)
+                files = {
+                    "file": (audio.filename, audio.file, "audio/mpeg"),
+                    "model": (None, model),
+                    "language": (None, "fr")
+                }
                 
-                # Tentative 2: API directe pour v0.4.2
-                if hasattr(client, '_client'):
-                    try:
-                        # Préparer la requête pour l'API Groq v0.4.2
-                        url = "https://api.groq.com/openai/v1/audio/transcriptions"
-                        headers = {
-                            "Authorization": f"Bearer {GROQ_API_KEY}"
-                        }
-                        files = {
-                            "file": (filename, content, "audio/mpeg"),
-                            "model": (None, GROQ_WHISPER_MODEL),
-                            "language": (None, "fr")
-                        }
-                        
-                        response = requests.post(url, headers=headers, files=files, timeout=30)
-                        
-                        if response.status_code == 200:
-                            result = response.json()
-                            text = result.get("text", "")
-                            if text:
-                                return text.strip()
-                        else:
-                            print(f"❌ Erreur HTTP Groq: {response.status_code} - {response.text}")
-                            
-                    except Exception as e:
-                        print(f"❌ API directe échouée: {e}")
-        
-        # Nettoyer le fichier temporaire
-        try:
-            os.unlink(tmp_file.name)
-        except:
-            pass
-            
-        # Si toutes les tentatives échouent, utiliser un fallback
-        print("⚠️ Toutes les méthodes Groq ont échoué, utilisation du fallback")
-        return transcribe_audio_fallback(audio_file)
+                response = http_client.post(url, headers=headers, files=files)
+                
+                if response.status_code == 200:
+                    result = response.json()
+                    text = result.get("text", "")
+                    if text:
+                        return text.strip()
+                else:
+                    print(f"❌ Erreur HTTP Groq: {response.status_code} - {response.text}")
+                    
+            except Exception as e:
+                print(f"❌ API directe échouée: {e}")
+        return None
         
     except Exception as e:
         print(f"❌ Erreur Groq globale: {e}")
         print(f"🔍 Debug - Client Groq attributs: {dir(client)}")
-        
-        # Fallback en cas d'erreur
-        return transcribe_audio_fallback(audio_file)
+        return None
 
 def transcribe_audio_fallback(audio_file) -> str:
     """Fallback de transcription quand Groq ne fonctionne pas."""
@@ -244,35 +340,43 @@ def transcribe_audio_fallback(audio_file) -> str:
 # ──────────────────────────────────────────────────────────────────────────────
 # 2) Reformulation texte → prompt image (Groq Chat)
 # ──────────────────────────────────────────────────────────────────────────────
+REPHRASE_SYSTEM_PROMPT = (
+    "Tu es un assistant qui transforme une description de rêve "
+    "en une description d'image claire et concise (≤120 caractères) EN FRANÇAIS. "
+    "Concentre-toi sur les éléments visuels, couleurs, atmosphère. "
+    "Pas de préambule, seulement la description finale en français."
+)
+REPHRASE_USER_PROMPT = "Description de rêve: {transcription}\nStyle: {style}"
+REPHRASE_PROMPT_VERSION = prompt_version(REPHRASE_SYSTEM_PROMPT, REPHRASE_USER_PROMPT)
+
 def rephrase_text(transcription: str, style: str = "") -> str:
-    """Transforme la transcription en prompt d'image en français."""
+    """Transforme la transcription en prompt d'image en français (en cache par texte normalisé)."""
     try:
-        client = _groq_client()
-        sys = (
-            "Tu es un assistant qui transforme une description de rêve "
-            "en une description d'image claire et concise (≤120 caractères) EN FRANÇAIS. "
-            "Concentre-toi sur les éléments visuels, couleurs, atmosphère. "
-            "Pas de préambule, seulement la description finale en français."
-        )
-        user = f"Description de rêve: {transcription}\nStyle: {style}".strip()
-
-        chat = client.chat.completions.create(
-            model=_require(GROQ_CHAT_MODEL, "GROQ_CHAT_MODEL"),
-            messages=[
-                {"role": "system", "content": sys},
-                {"role": "user", "content": user},
-            ],
-            temperature=0.6,
-            max_tokens=120,
-        )
-        content = chat.choices[0].message.content.strip()
-        return content
+        model = _require(GROQ_CHAT_MODEL, "GROQ_CHAT_MODEL")
+        # Même transcription en preview puis à la sauvegarde : un seul appel Groq
+        key = llm_cache_key('rephrase', model, REPHRASE_PROMPT_VERSION, transcription, style)
+        return cached_call(llm_cache, key, lambda: _rephrase_with_groq(transcription, style, model))
         
     except Exception as e:
         print(f"❌ Erreur reformulation Groq: {e}")
         # Fallback simple
         return rephrase_text_fallback(transcription)
 
+def _rephrase_with_groq(transcription: str, style: str, model: str) -> str:
+    client = _groq_client()
+    user = REPHRASE_USER_PROMPT.format(transcription=transcription, style=style).strip()
+
+    chat = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": REPHRASE_SYSTEM_PROMPT},
+            {"role": "user", "content": user},
+        ],
+        temperature=0.6,
+        max_tokens=120,
+    )
+    return chat.choices[0].message.content.strip()
+
 def rephrase_text_fallback(transcription: str) -> str:
     """Fallback de reformulation quand Groq ne fonctionne pas."""
     print("🔄 Utilisation du fallback de reformulation")
@@ -314,88 +418,132 @@ def rephrase_text_fallback(transcription: str) -> str:
 # ──────────────────────────────────────────────────────────────────────────────
 # 3) Génération d'images - VERSION SIMPLIFIÉE
 # ──────────────────────────────────────────────────────────────────────────────
+# Taille demandée à Pollinations (fait partie de la clé du cache d'images)
+POLLINATIONS_IMAGE_SIZE = 1024
+
+def clean_image_prompt(prompt: str) -> str:
+    """Prompt sans caractères spéciaux (tel qu'envoyé à Pollinations)."""
+    return re.sub(r'[^\w\s,-]', '', prompt)
+
 def generate_image_base64(prompt: str) -> str:
-    """Génère une image via Pollinations (gratuit) ou placeholder."""
+    """Génère une image via Pollinations (gratuit, en cache par prompt) ou placeholder."""
     print(f"🎯 Génération d'image pour: {prompt}")
     
     try:
-        return generate_pollinations_image(prompt)
+        return _cached_pollinations_image(prompt)
     except Exception as e:
         print(f"❌ Échec Pollinations: {e}")
         print("🎨 Génération d'une image placeholder...")
         return generate_artistic_placeholder(prompt)
 
+def _cached_pollinations_image(prompt: str) -> str:
+    """
+    Image Pollinations en cache (prompt nettoyé + taille) : l'entrée pointe vers
+    le blob déjà stocké. Les requêtes identiques simultanées (double clic)
+    partagent un seul appel distant.
+    """
+    key = image_cache_key(clean_image_prompt(prompt), POLLINATIONS_IMAGE_SIZE)
+
+    def fetch() -> str:
+        # Relu dans le vol : un appel précédent a pu le remplir entre-temps
+        cached = image_cache.get(key)
+        if cached is not None:
+            data_uri = blob_as_data_uri(cached['blob_key'])
+            if data_uri:
+                print(f"♻️ Image trouvée en cache ({cached['blob_key'][:12]})")
+                return data_uri
+            image_cache.delete(key)  # Blob supprimé depuis
+
+        data_uri = generate_pollinations_image(prompt)
+        # Stockée dès maintenant : la sauvegarde du rêve retombera sur le même blob
+        blob_key = store_data_uri(data_uri)
+        if blob_key:
+            image_cache.set(key, {'blob_key': blob_key})
+        return data_uri
+
+    return image_flights.do(key, fetch)
+
+class InvalidImageResponse(Exception):
+    """Réponse Pollinations reçue mais inexploitable (statut, taille, format)"""
+
+def _image_mime_type(first_bytes: bytes) -> Optional[str]:
+    """Type MIME d'après les octets magiques, None si ce n'est pas une image supportée."""
+    if first_bytes.startswith(b'\x89PNG'):
+        return 'image/png'
+    if first_bytes.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if first_bytes.startswith(b'GIF'):
+        return 'image/gif'
+    if first_bytes.startswith(b'RIFF'):  # WebP
+        return 'image/png'  # Défaut
+    return None
+
+def _fetch_pollinations_url(image_url: str, timeout: float, cancelled: threading.Event) -> str:
+    """Une tentative : télécharge l'image (interrompue si une autre tentative a gagné)."""
+    # Session partagée (keep-alive, User-Agent DreamShare)
+    response = http_client.get(image_url, timeout=(min(5.0, timeout), timeout), stream=True)
+    try:
+        if response.status_code != 200:
+            raise InvalidImageResponse(f"Erreur HTTP {response.status_code}")
+
+        chunks = []
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            if cancelled.is_set():
+                raise AttemptCancelled("Image déjà obtenue par une autre tentative")
+            chunks.append(chunk)
+        content = b''.join(chunks)
+    finally:
+        response.close()
+
+    if len(content) <= 1000:
+        raise InvalidImageResponse(f"Réponse trop petite: {len(content)} bytes")
+    # Vérifier que c'est bien une image
+    mime_type = _image_mime_type(content[:4])
+    if mime_type is None:
+        raise InvalidImageResponse("Contenu reçu mais pas une image valide")
+
+    print(f"✅ Image valide reçue: {len(content)} bytes")
+    image_base64 = base64.b64encode(content).decode('utf-8')
+    return f"data:{mime_type};base64,{image_base64}"
+
 def generate_pollinations_image(prompt: str) -> str:
-    """Génère une image avec Pollinations AI - GRATUIT avec retry et fallback."""
+    """
+    Génère une image avec Pollinations AI - GRATUIT.
+    Les URLs alternatives sont essayées sous une échéance globale
+    (POLLINATIONS_DEADLINE), avec backoff exponentiel + jitter entre les
+    échecs ; avec POLLINATIONS_HEDGE_AFTER, l'URL suivante part en
+    parallèle si la précédente tarde et la première image valide l'emporte.
+    """
     print(f"🌸 Génération avec Pollinations AI pour: {prompt}")
     
     import urllib.parse
-    import time
     
     # Nettoyer et encoder le prompt
-    clean_prompt = re.sub(r'[^\w\s,-]', '', prompt)  # Supprimer caractères spéciaux
+    clean_prompt = clean_image_prompt(prompt)  # Supprimer caractères spéciaux
     encoded_prompt = urllib.parse.quote(f"dreamy surreal artistic: {clean_prompt}")
     
     # URLs alternatives de Pollinations
     urls = [
-        f"https://pollinations.ai/p/{encoded_prompt}?width=1024&height=1024&nologo=true",
-        f"https://image.pollinations.ai/prompt/{encoded_prompt}?width=1024&height=1024",
+        f"https://pollinations.ai/p/{encoded_prompt}?width={POLLINATIONS_IMAGE_SIZE}&height={POLLINATIONS_IMAGE_SIZE}&nologo=true",
+        f"https://image.pollinations.ai/prompt/{encoded_prompt}?width={POLLINATIONS_IMAGE_SIZE}&height={POLLINATIONS_IMAGE_SIZE}",
         f"https://pollinations.ai/p/{encoded_prompt}?width=512&height=512&nologo=true"  # Plus petite si ça marche pas
     ]
     
-    for attempt, image_url in enumerate(urls, 1):
-        try:
-            print(f"🎯 Tentative {attempt}/3: {image_url[:80]}...")
-            
-            response = requests.get(
-                image_url, 
-                timeout=30,  # Timeout plus court
-                headers={'User-Agent': 'DreamShare/1.0'}  # User-Agent
-            )
-            
-            if response.status_code == 200 and len(response.content) > 1000:
-                # Vérifier que c'est bien une image
-                first_bytes = response.content[:4]
-                
-                # Types d'images supportés
-                is_valid_image = (
-                    first_bytes.startswith(b'\x89PNG') or  # PNG
-                    first_bytes.startswith(b'\xff\xd8\xff') or  # JPEG
-                    first_bytes.startswith(b'GIF') or  # GIF
-                    first_bytes.startswith(b'RIFF')  # WebP
-                )
-                
-                if is_valid_image:
-                    print(f"✅ Image valide reçue: {len(response.content)} bytes")
-                    image_base64 = base64.b64encode(response.content).decode('utf-8')
-                    
-                    # Détecter le type MIME
-                    if first_bytes.startswith(b'\x89PNG'):
-                        mime_type = 'image/png'
-                    elif first_bytes.startswith(b'\xff\xd8\xff'):
-                        mime_type = 'image/jpeg'
-                    elif first_bytes.startswith(b'GIF'):
-                        mime_type = 'image/gif'
-                    else:
-                        mime_type = 'image/png'  # Défaut
-                    
-                    return f"data:{mime_type};base64,{image_base64}"
-                else:
-                    print(f"⚠️ Contenu reçu mais pas une image valide")
-            else:
-                print(f"❌ Erreur HTTP {response.status_code}: {len(response.content)} bytes")
-                
-        except requests.Timeout:
-            print(f"⏰ Timeout sur tentative {attempt}")
-        except Exception as e:
-            print(f"❌ Erreur tentative {attempt}: {e}")
-        
-        # Attendre un peu avant la prochaine tentative
-        if attempt < len(urls):
-            time.sleep(2)
+    def attempt(number: int, image_url: str):
+        def run(timeout: float, cancelled: threading.Event) -> str:
+            print(f"🎯 Tentative {number}/{len(urls)}: {image_url[:80]}...")
+            return _fetch_pollinations_url(image_url, timeout, cancelled)
+        return run
     
-    # Si toutes les tentatives échouent
-    raise Exception("Toutes les tentatives Pollinations ont échoué")
+    # Si toutes les tentatives échouent : RetryBudgetExceeded (→ placeholder)
+    return call_with_retries(
+        [attempt(number, url) for number, url in enumerate(urls, 1)],
+        deadline=settings.POLLINATIONS_DEADLINE,
+        attempt_timeout=settings.POLLINATIONS_ATTEMPT_TIMEOUT,
+        backoff_base=settings.POLLINATIONS_BACKOFF_BASE,
+        hedge_after=settings.POLLINATIONS_HEDGE_AFTER,
+        message="Toutes les tentatives Pollinations ont échoué",
+    )
 
 def generate_artistic_placeholder(prompt: str) -> str:
     """Génère une image placeholder artistique en SVG."""
@@ -556,11 +704,7 @@ def analyze_dream_emotion(transcription: str) -> dict:
     print(f"🔄 Fallback: analyse par mots-clés")
     return analyze_emotion_keywords_fallback(transcription)
 
-def analyze_emotion_with_groq(transcription: str) -> dict:
-    """Analyse émotionnelle via Groq Chat."""
-    client = _groq_client()
-    
-    system_prompt = """
+EMOTION_SYSTEM_PROMPT = """
 Tu es un expert en analyse d'émotions de rêves. Analyse l'émotion dominante de ce rêve et réponds UNIQUEMENT avec un JSON valide selon ce format :
 
 {
@@ -580,12 +724,22 @@ Tu es un expert en analyse d'émotions de rêves. Analyse l'émotion dominante d
 IMPORTANT: Un combat de boxe = excitant (pas stressant). Une course = excitant. Un monstre qui attaque = stressant.
 
 Réponds UNIQUEMENT en JSON, rien d'autre."""
+EMOTION_PROMPT_VERSION = prompt_version(EMOTION_SYSTEM_PROMPT)
+
+def analyze_emotion_with_groq(transcription: str) -> dict:
+    """Analyse émotionnelle via Groq Chat (en cache par texte normalisé)."""
+    model = _require(GROQ_CHAT_MODEL, "GROQ_CHAT_MODEL")
+    key = llm_cache_key('emotion', model, EMOTION_PROMPT_VERSION, transcription)
+    return cached_call(llm_cache, key, lambda: _analyze_emotion_with_groq(transcription, model))
+
+def _analyze_emotion_with_groq(transcription: str, model: str) -> Optional[dict]:
+    client = _groq_client()
     
     try:
         chat = client.chat.completions.create(
-            model=_require(GROQ_CHAT_MODEL, "GROQ_CHAT_MODEL"),
+            model=model,
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": EMOTION_SYSTEM_PROMPT},
                 {"role": "user", "content": f"Rêve: {transcription}"}
             ],
             temperature=0.3,
@@ -625,15 +779,23 @@ Réponds UNIQUEMENT en JSON, rien d'autre."""
         print(f"❌ Erreur Groq: {e}")
         return None
 
+# Utiliser un modèle d'analyse d'émotions en français
+HUGGINGFACE_EMOTION_API_URL = "https://api-inference.huggingface.co/models/cardiffnlp/twitter-xlm-roberta-base-sentiment"
+# À incrémenter si le mapping label → émotion ci-dessous change (invalide le cache)
+HUGGINGFACE_EMOTION_VERSION = "1"
+
 def analyze_emotion_with_huggingface(transcription: str) -> dict:
-    """Analyse émotionnelle via HuggingFace."""
+    """Analyse émotionnelle via HuggingFace (en cache par texte normalisé)."""
     huggingface_key = os.getenv("HUGGINGFACE_API_KEY")
     if not huggingface_key:
         print("⚠️ Clé HuggingFace manquante")
         return None
     
-    # Utiliser un modèle d'analyse d'émotions en français
-    api_url = "https://api-inference.huggingface.co/models/cardiffnlp/twitter-xlm-roberta-base-sentiment"
+    key = llm_cache_key('emotion_hf', HUGGINGFACE_EMOTION_API_URL, HUGGINGFACE_EMOTION_VERSION, transcription)
+    return cached_call(llm_cache, key, lambda: _analyze_emotion_with_huggingface(transcription, huggingface_key))
+
+def _analyze_emotion_with_huggingface(transcription: str, huggingface_key: str) -> Optional[dict]:
+    api_url = HUGGINGFACE_EMOTION_API_URL
     
     headers = {
         "Authorization": f"Bearer {huggingface_key}",
@@ -646,7 +808,7 @@ def analyze_emotion_with_huggingface(transcription: str) -> dict:
     }
     
     try:
-        response = requests.post(api_url, headers=headers, json=payload, timeout=10)
+        response = http_client.post(api_url, headers=headers, json=payload, timeout=10)
         
         if response.status_code == 200:
             results = response.json()
@@ -736,23 +898,49 @@ def analyze_emotion_keywords_fallback(transcription: str) -> dict:
 # ──────────────────────────────────────────────────────────────────────────────
 # 5) Persistance en base
 # ──────────────────────────────────────────────────────────────────────────────
-def save_in_db(user, transcription: str, reformed_prompt: str, img_b64: str, privacy: str = "private") -> Dream:
-    """Crée l'objet Dream avec analyse émotionnelle."""
+def emotion_data_from_values(emotion: str, confidence=None) -> Optional[dict]:
+    """Reconstruit les données émotionnelles d'une analyse déjà faite (preview)."""
+    if emotion not in EMOTIONS:
+        return None
+    try:
+        confidence = min(max(float(confidence), 0.0), 1.0)
+    except (TypeError, ValueError):
+        confidence = 0.5
+
+    emotion_data = EMOTIONS[emotion]
+    return {
+        'emotion': emotion,
+        'confidence': round(confidence, 2),
+        'method': 'preview',
+        'emoji': emotion_data['emoji'],
+        'color': emotion_data['color'],
+    }
+
+def save_in_db(user, transcription: str, reformed_prompt: str, img_b64: str, privacy: str = "private",
+               emotion_data: Optional[dict] = None) -> Dream:
+    """Crée l'objet Dream avec analyse émotionnelle (réutilisée si déjà calculée)."""
     if privacy not in dict(Dream.PRIVACY_CHOICES):
         privacy = "private"
 
-    print(f"😊 Analyse émotionnelle du rêve...")
-    emotion_data = analyze_dream_emotion(transcription)
+    if emotion_data is None:
+        print(f"😊 Analyse émotionnelle du rêve...")
+        emotion_data = analyze_dream_emotion(transcription)
     
     print(f"🎆 Émotion détectée: {emotion_data.get('emotion')} {emotion_data.get('emoji')} (confiance: {emotion_data.get('confidence')})")
 
+    # 🖼️ L'image part dans le stockage adressé par contenu (dédupliqué)
+    image_key = store_data_uri(img_b64) if img_b64 else None
+    image_variants = generate_image_variants(image_key) if image_key else {}
+
     # ✅ SOLUTION FINALE: Utiliser prompt ET transcription pour compatibilité
     dream = Dream.objects.create(
         user=user,
         prompt=transcription,  # Pour compatibilité avec l'ancien schéma
         transcription=transcription,
         reformed_prompt=reformed_prompt,
-        img_b64=img_b64,
+        img_b64=None if image_key else img_b64,  # Legacy seulement si non décodable
+        image_key=image_key,
+        image_variants=image_variants,
         privacy=privacy,
         emotion=emotion_data.get('emotion'),
         emotion_confidence=emotion_data.get('confidence'),
@@ -765,161 +953,109 @@ def save_in_db(user, transcription: str, reformed_prompt: str, img_b64: str, pri
 # ──────────────────────────────────────────────────────────────────────────────
 # 6) Export des rêves
 # ──────────────────────────────────────────────────────────────────────────────
-def export_dream_as_html(dream: Dream, user=None) -> HttpResponse:
-    """Exporte un rêve en HTML."""
-    formatted_date = 'Date inconnue'
-    if dream.date:
-        try:
-            formatted_date = dream.date.strftime('%d/%m/%Y')
-        except:
-            formatted_date = str(dream.date)
-    
-    html_template = '''
-<!DOCTYPE html>
-<html lang="fr">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Mon Rêve - {{ dream_date }}</title>
-    <style>
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            line-height: 1.6;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 20px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-        }
-        .container {
-            background: white;
-            border-radius: 20px;
-            padding: 40px;
-            box-shadow: 0 20px 40px rgba(0,0,0,0.2);
-        }
-        h1 {
-            color: #4a5568;
-            text-align: center;
-            margin-bottom: 30px;
-            font-size: 2rem;
-            border-bottom: 3px solid #667eea;
-            padding-bottom: 15px;
-        }
-        .dream-meta {
-            background: #f7fafc;
-            padding: 20px;
-            border-radius: 12px;
-            margin-bottom: 30px;
-            border-left: 4px solid #667eea;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            flex-wrap: wrap;
-            gap: 15px;
-        }
-        .section {
-            margin-bottom: 30px;
-        }
-        .section h2 {
-            color: #4a5568;
-            margin-bottom: 15px;
-            font-size: 1.3em;
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }
-        .content-box {
-            background: #f8f9fa;
-            padding: 20px;
-            border-radius: 12px;
-            border-left: 4px solid #28a745;
-            font-style: italic;
-            line-height: 1.8;
-        }
-        .dream-image {
-            max-width: 100%;
-            border-radius: 15px;
-            box-shadow: 0 10px 25px rgba(0,0,0,0.2);
-            margin: 20px 0;
-        }
-        .image-container {
-            text-align: center;
-            background: #f0f0f0;
-            padding: 20px;
-            border-radius: 15px;
-        }
-        .footer {
-            text-align: center;
-            margin-top: 40px;
-            color: #6b7280;
-            font-size: 0.9em;
-            border-top: 1px solid #e5e7eb;
-            padding-top: 20px;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>🌙 Mon Rêve</h1>
-        
-        <div class="dream-meta">
-            <div>📅 {{ dream_date }}</div>
-            <div>{{ privacy_label }}</div>
-        </div>
-        
-        {% if transcription %}
-        <div class="section">
-            <h2>🎙️ Mon récit</h2>
-            <div class="content-box">{{ transcription }}</div>
-        </div>
-        {% endif %}
-        
-        {% if reformed_prompt %}
-        <div class="section">
-            <h2>✨ Interprétation IA</h2>
-            <div class="content-box">{{ reformed_prompt }}</div>
-        </div>
-        {% endif %}
-        
-        {% if has_image %}
-        <div class="section">
-            <h2>🎨 Visualisation</h2>
-            <div class="image-container">
-                <img src="{{ image_data }}" alt="Mon rêve visualisé" class="dream-image">
-            </div>
-        </div>
-        {% endif %}
-        
-        <div class="footer">
-            Généré par DreamShare le {{ export_date }}
-        </div>
-    </div>
-</body>
-</html>
-    '''
-    
-    privacy_labels = {
-        'private': '🔒 Privé',
-        'friends_only': '👥 Amis seulement', 
-        'public': '🌍 Public'
-    }
-    
-    context_data = {
-        'dream_date': formatted_date,
-        'privacy_label': privacy_labels.get(dream.privacy, '🔒 Privé'),
-        'transcription': dream.transcription or '',
-        'reformed_prompt': dream.reformed_prompt or '',
-        'has_image': bool(dream.img_b64),
-        'image_data': dream.img_b64 or '',
-        'export_date': datetime.now().strftime('%d/%m/%Y à %H:%M'),
-    }
-    
-    template = Template(html_template)
-    context = Context(context_data)
-    html_content = template.render(context)
+def render_dream_html(dream: Dream, image_src: Optional[str] = None) -> str:
+    """
+    Page HTML d'un rêve. `image_src` : source de l'image (par défaut data URI
+    inline, pour un fichier autonome ; chemin relatif dans une archive).
+    """
+    return get_renderer('html').render(dream, image_src)
+
+def export_dream_file(dream: Dream, renderer_name: str = 'html') -> HttpResponse:
+    """Exporte un rêve avec le renderer demandé (html, print, md)."""
+    renderer = get_renderer(renderer_name)
+    content = renderer.render(dream)
     
-    response = HttpResponse(html_content, content_type='text/html; charset=utf-8')
-    safe_filename = f"reve_{formatted_date.replace('/', '-')}_{datetime.now().strftime('%H%M%S')}"
-    response['Content-Disposition'] = f'attachment; filename="{safe_filename}.html"'
+    response = HttpResponse(content, content_type=renderer.content_type)
+    safe_filename = f"reve_{format_dream_date(dream).replace('/', '-')}_{datetime.now().strftime('%H%M%S')}"
+    response['Content-Disposition'] = f'attachment; filename="{safe_filename}.{renderer.extension}"'
     
     return response
+
+def export_dream_as_html(dream: Dream, user=None) -> HttpResponse:
+    """Exporte un rêve en HTML."""
+    return export_dream_file(dream, 'html')
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 7) Orchestration du pipeline (étapes indépendantes en parallèle)
+# ──────────────────────────────────────────────────────────────────────────────
+PIPELINE_MAX_WORKERS = getattr(settings, 'DREAM_PIPELINE_MAX_WORKERS', 4)
+
+_pipeline_executor = None
+_pipeline_executor_lock = threading.Lock()
+
+def _get_pipeline_executor() -> ThreadPoolExecutor:
+    """Pool de threads partagé par le processus (borne la concurrence vers les APIs IA)."""
+    global _pipeline_executor
+    with _pipeline_executor_lock:
+        if _pipeline_executor is None:
+            _pipeline_executor = ThreadPoolExecutor(
+                max_workers=PIPELINE_MAX_WORKERS, thread_name_prefix="dream-pipeline"
+            )
+        return _pipeline_executor
+
+class Stage:
+    """
+    Étape du pipeline : `func(results)` reçoit les résultats des étapes déjà terminées.
+    Les étapes `inline` (accès base de données) s'exécutent dans le thread appelant.
+    """
+    def __init__(self, name: str, func: Callable[[dict], object], after: Iterable[str] = (), inline: bool = False):
+        self.name = name
+        self.func = func
+        self.after = tuple(after)
+        self.inline = inline
+
+class PipelineStageError(Exception):
+    """Erreur levée par une étape, avec le nom de l'étape concernée."""
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(str(error))
+        self.stage = stage
+        self.error = error
+
+def _execute_stage(stage: Stage, results: dict) -> Tuple[object, float]:
+    started = time.perf_counter()
+    try:
+        value = stage.func(results)
+    except Exception as e:
+        raise PipelineStageError(stage.name, e) from e
+    return value, time.perf_counter() - started
+
+def run_stages(stages: Iterable[Stage], on_stage: Optional[Callable[[str, str], None]] = None) -> Tuple[dict, Dict[str, float]]:
+    """
+    Exécute les étapes dès que leurs dépendances sont prêtes.
+    `on_stage(nom, 'start'|'done')` est toujours appelé depuis le thread appelant.
+    Retourne (résultats par étape, durées en secondes par étape).
+    """
+    on_stage = on_stage or (lambda name, event: None)
+    pending = list(stages)
+    results, timings, running = {}, {}, {}
+
+    def record(stage, value, duration):
+        results[stage.name] = value
+        timings[stage.name] = round(duration, 3)
+        on_stage(stage.name, 'done')
+
+    while pending or running:
+        progressed = True
+        while progressed:
+            progressed = False
+            for stage in [s for s in pending if all(dep in results for dep in s.after)]:
+                pending.remove(stage)
+                on_stage(stage.name, 'start')
+                if stage.inline:
+                    record(stage, *_execute_stage(stage, results))
+                    progressed = True
+                else:
+                    future = _get_pipeline_executor().submit(_execute_stage, stage, dict(results))
+                    running[future] = stage
+
+        if not running:
+            if pending:
+                raise ValueError(f"Dépendances impossibles à résoudre : {[s.name for s in pending]}")
+            break
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            record(running.pop(future), *future.result())
+
+    return results, timings
+
@@ -1,15 +1,46 @@
 # dreams/views.py
+import math
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from .models import Dream
+from .models import Dream, DreamJob, DreamUpload
 from .serializers import DreamSerializer
 from django.shortcuts import render
+from django.urls import reverse
+from django.db.models import Count, Exists, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.http import HttpResponse
-from .utils import transcribe_audio, rephrase_text, generate_image_base64, save_in_db, analyze_dream_emotion, export_dream_as_html, validate_audio_complete
+from django.http import HttpResponse, FileResponse, Http404, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_safe
+from .storage import get_blob_store, is_valid_key, etag_for_key, content_type_for_key, blob_as_data_uri
+from .images import resolve_image_size
+from .pagination import InvalidCursor, wants_cursor, paginate_by_cursor, cursor_pagination_data
+from .streaming import wants_stream, streaming_json_response
+from .feed_cache import FEED_CACHE_WINDOW, feed_cache_enabled, current_version, get_or_build, get_or_build_many, liked_dream_ids
+from .export import InvalidExportRequest, parse_export_range, get_exporter, export_journal, export_filename
+from .utils import save_in_db, export_dream_file, validate_audio_complete, emotion_data_from_values
+from .pipeline import generate_dream, create_dream
+from .jobs import enqueue_dream_job, serialize_job
+from .uploads import UploadError, create_upload, add_segment, finish_upload
+
+def _wants_async(request):
+    """Mode asynchrone demandé ? (?async=1 ou champ async du formulaire)"""
+    value = request.query_params.get('async') or request.data.get('async') or ''
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def _job_accepted_response(request, job):
+    """Réponse 202 avec l'URL de polling de la tâche"""
+    return Response({
+        "message": "Génération en file d'attente",
+        "job_id": str(job.job_id),
+        "status": job.status,
+        "status_url": request.build_absolute_uri(reverse('dream_job_status', args=[job.job_id]))
+    }, status=202)
+
 
 class DreamCreateAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -37,34 +68,12 @@ class DreamCreateAPIView(APIView):
             print(f"Format du fichier : {audio_file.content_type}")
             print(f"🔒 Validation audio: {validation['details']}")
             
-            # Étape 1: Transcription
-            transcription = transcribe_audio(audio_file)
-            print(f"Transcription: {transcription}")
-            
-            # Étape 2: Reformulation
-            prompt = rephrase_text(transcription)
-            print(f"Prompt reformulé: {prompt}")
+            # ⏳ Mode asynchrone : le worker prend le relais
+            if _wants_async(request):
+                job = enqueue_dream_job(request.user, 'create', audio_file)
+                return _job_accepted_response(request, job)
             
-            # Étape 3: Génération d'image
-            img_b64 = generate_image_base64(prompt)
-            print("Image générée avec succès")
-            
-            # Étape 4: Sauvegarde
-            dream = save_in_db(
-                user=request.user, 
-                transcription=transcription, 
-                reformed_prompt=prompt, 
-                img_b64=img_b64, 
-                privacy="private"
-            )
-            
-            return Response({
-                "message": "Success",
-                "dream_id": dream.dream_id,
-                "transcription": transcription,
-                "prompt": prompt,
-                "image": img_b64  # Ajouter l'image base64 dans la réponse
-            })
+            return Response(create_dream(request.user, audio_file, request=request))
             
         except Exception as e:
             print(f"Erreur dans DreamCreateAPIView: {str(e)}")
@@ -99,46 +108,141 @@ class DreamGenerateAPIView(APIView):
             print(f"Format du fichier : {audio_file.content_type}")
             print(f"🔒 Validation audio: {validation['details']}")
             
-            # Étape 1: Transcription
-            transcription = transcribe_audio(audio_file)
-            print(f"Transcription: {transcription}")
+            # ⏳ Mode asynchrone : le worker prend le relais
+            if _wants_async(request):
+                job = enqueue_dream_job(request.user, 'generate', audio_file)
+                return _job_accepted_response(request, job)
             
-            # Étape 2: Reformulation
-            prompt = rephrase_text(transcription)
-            print(f"Prompt reformulé: {prompt}")
+            # ❌ PAS DE SAUVEGARDE ICI
+            # Retourner les données pour preview
+            return Response(generate_dream(audio_file))
             
-            # Étape 3: Analyse émotionnelle 🆕
-            emotion_data = analyze_dream_emotion(transcription)
-            print(f"Émotion détectée: {emotion_data.get('emotion')} {emotion_data.get('emoji')}")
+        except Exception as e:
+            print(f"Erreur dans DreamGenerateAPIView: {str(e)}")
+            return Response({
+                "error": f"Erreur lors de la génération: {str(e)}"
+            }, status=500)
+
+
+class DreamUploadCreateAPIView(APIView):
+    """
+    API pour ouvrir un envoi par segments (preview transcrite pendant la dictée)
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        try:
+            upload = create_upload(request.user)
+            return Response({
+                "upload_id": str(upload.upload_id),
+                # Modèle d'URL : {index} à remplacer par la position du segment (0, 1, 2...)
+                "segment_url": request.build_absolute_uri(
+                    reverse('dream_upload_segment', args=[upload.upload_id, 0]).rsplit('/', 1)[0]
+                ) + "/{index}",
+                "finish_url": request.build_absolute_uri(reverse('dream_upload_finish', args=[upload.upload_id]))
+            }, status=201)
             
-            # Étape 4: Génération d'image (SANS sauvegarde)
-            img_b64 = generate_image_base64(prompt)
-            print("Image générée avec succès (pas encore sauvée)")
+        except Exception as e:
+            print(f"Erreur dans DreamUploadCreateAPIView: {str(e)}")
+            return Response({
+                "error": f"Erreur lors de l'ouverture de l'envoi: {str(e)}"
+            }, status=500)
+
+
+class DreamUploadSegmentAPIView(APIView):
+    """
+    API pour envoyer un segment audio (fichier complet) ; sa transcription démarre aussitôt
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+    
+    def put(self, request, upload_id, index):
+        try:
+            upload = DreamUpload.objects.get(upload_id=upload_id, user=request.user)
+            audio_file = request.FILES.get("audio")
             
-            # ❌ PAS DE SAUVEGARDE ICI
-            # Retourner les données pour preview
+            if not audio_file:
+                return Response({"error": "Fichier audio requis."}, status=400)
             
+            segment = add_segment(upload, index, audio_file)
             return Response({
-                "message": "Rêve généré (preview)",
-                "transcription": transcription,
-                "prompt": prompt,
-                "image": img_b64,
-                "emotion": emotion_data,  # 🆕 AJOUTER L'ÉMOTION
-                # Données nécessaires pour la sauvegarde ultérieure
-                "preview_data": {
-                    "transcription": transcription,
-                    "reformed_prompt": prompt,
-                    "img_b64": img_b64
-                }
-            })
+                "index": segment.index,
+                "size": segment.size,
+                "duration": segment.duration,
+                "received": upload.segments.count()
+            }, status=202)
             
+        except DreamUpload.DoesNotExist:
+            return Response({
+                "error": "Envoi introuvable"
+            }, status=404)
+        except UploadError as e:
+            return Response({"error": str(e), "details": e.details}, status=400)
         except Exception as e:
-            print(f"Erreur dans DreamGenerateAPIView: {str(e)}")
+            print(f"Erreur dans DreamUploadSegmentAPIView: {str(e)}")
+            return Response({
+                "error": f"Erreur lors de l'envoi du segment: {str(e)}"
+            }, status=500)
+
+
+class DreamUploadFinishAPIView(APIView):
+    """
+    API pour terminer un envoi par segments : transcription recollée + preview (sans sauvegarde)
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, upload_id):
+        try:
+            upload = DreamUpload.objects.get(upload_id=upload_id, user=request.user)
+            
+            try:
+                segment_count = int(request.data.get("segment_count"))
+            except (TypeError, ValueError):
+                return Response({"error": "segment_count requis."}, status=400)
+            
+            return Response(finish_upload(upload, segment_count))
+            
+        except DreamUpload.DoesNotExist:
+            return Response({
+                "error": "Envoi introuvable"
+            }, status=404)
+        except UploadError as e:
+            return Response({"error": str(e), "details": e.details}, status=400)
+        except Exception as e:
+            print(f"Erreur dans DreamUploadFinishAPIView: {str(e)}")
             return Response({
                 "error": f"Erreur lors de la génération: {str(e)}"
             }, status=500)
 
 
+class DreamJobStatusAPIView(APIView):
+    """
+    API pour suivre une tâche de génération asynchrone (polling)
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, job_id):
+        try:
+            job = DreamJob.objects.get(job_id=job_id, user=request.user)
+            data = serialize_job(job)
+            
+            # URL d'image absolue pour le client
+            if data['result'] and str(data['result'].get('image_url') or '').startswith('/'):
+                data['result']['image_url'] = request.build_absolute_uri(data['result']['image_url'])
+            
+            return Response(data)
+            
+        except DreamJob.DoesNotExist:
+            return Response({
+                "error": "Tâche introuvable"
+            }, status=404)
+        except Exception as e:
+            print(f"Erreur dans DreamJobStatusAPIView: {str(e)}")
+            return Response({
+                "error": f"Erreur lors de la récupération de la tâche: {str(e)}"
+            }, status=500)
+
+
 class DreamSaveAPIView(APIView):
     """
     API pour sauvegarder un rêve préalablement généré
@@ -151,7 +255,15 @@ class DreamSaveAPIView(APIView):
             transcription = request.data.get('transcription')
             reformed_prompt = request.data.get('reformed_prompt') 
             img_b64 = request.data.get('img_b64')
+            # Preview asynchrone : l'image est déjà dans le stockage des blobs (voir jobs.compact_result)
+            image_key = request.data.get('image_key')
+            if not img_b64 and image_key and is_valid_key(image_key):
+                img_b64 = blob_as_data_uri(image_key)
             privacy = request.data.get('privacy', 'private')  # Par défaut privé
+            # Émotion déjà calculée lors de la preview (évite une seconde analyse IA)
+            emotion_data = emotion_data_from_values(
+                request.data.get('emotion'), request.data.get('emotion_confidence')
+            )
             
             if not all([transcription, reformed_prompt, img_b64]):
                 return Response({
@@ -168,7 +280,8 @@ class DreamSaveAPIView(APIView):
                 transcription=transcription,
                 reformed_prompt=reformed_prompt, 
                 img_b64=img_b64,
-                privacy=privacy
+                privacy=privacy,
+                emotion_data=emotion_data
             )
             
             return Response({
@@ -184,52 +297,118 @@ class DreamSaveAPIView(APIView):
             }, status=500)
 
 
+# Champs exposés par DreamListAPIView → colonnes à charger (?fields=a,b,c)
+DREAM_LIST_FIELDS = {
+    'dream_id': ('dream_id',),
+    'transcription': ('transcription',),
+    'reformed_prompt': ('reformed_prompt',),
+    'image_url': ('image_key', 'image_variants', 'img_b64'),
+    'date': ('date',),
+    'privacy': ('privacy',),
+    'emotion': ('emotion',),
+    'emotion_confidence': ('emotion_confidence',),
+    'emotion_emoji': ('emotion_emoji',),
+    'emotion_color': ('emotion_color',),
+    'user': (),
+}
+
+# ?view=compact : de quoi afficher une vignette du journal
+DREAM_LIST_COMPACT_FIELDS = ('dream_id', 'image_url', 'date', 'privacy', 'emotion', 'emotion_emoji')
+
+
+def _dream_list_fields(request):
+    """Champs demandés (?fields= ou ?view=compact), None si invalides"""
+    if request.GET.get('fields'):
+        fields = [f.strip() for f in request.GET['fields'].split(',') if f.strip()]
+        if not fields or any(f not in DREAM_LIST_FIELDS for f in fields):
+            return None
+        return fields
+    if request.GET.get('view') == 'compact':
+        return list(DREAM_LIST_COMPACT_FIELDS)
+    return list(DREAM_LIST_FIELDS)
+
+
+def _serialize_list_dream(dream, request, fields, image_size=None):
+    """Sérialise un rêve de la liste avec les seuls champs demandés"""
+    data = {}
+    for field in fields:
+        if field == 'image_url':
+            data['image_url'] = dream.get_image_url(request, image_size)
+        elif field == 'user':
+            # Toujours l'utilisateur connecté : pas de jointure nécessaire
+            data['user'] = {
+                'id': request.user.id,
+                'username': request.user.username,
+                'email': request.user.email
+            }
+        else:
+            data[field] = getattr(dream, field)
+    return data
+
+
 class DreamListAPIView(APIView):
     """
     API pour récupérer tous les rêves de l'utilisateur connecté
+    
+    ?fields=dream_id,date,... ou ?view=compact : seules les colonnes utiles sont lues
+    ?stream=1 : réponse JSON streamée
     """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
         try:
-            # Récupérer tous les rêves de l'utilisateur, triés par date (plus récent en premier)
-            dreams = Dream.objects.filter(user=request.user).order_by('-date')
+            fields = _dream_list_fields(request)
+            if fields is None:
+                return Response({
+                    "error": f"Champs invalides. Disponibles: {', '.join(DREAM_LIST_FIELDS)}"
+                }, status=400)
             
-            # Utiliser DreamListSerializer ou sérialiser manuellement
-            dreams_data = []
-            for dream in dreams:
-                dream_data = {
-                    'dream_id': dream.dream_id,
-                    'transcription': dream.transcription,
-                    'reformed_prompt': dream.reformed_prompt,
-                    'img_b64': dream.img_b64,
-                    'date': dream.date,
-                    'privacy': dream.privacy,
-                    'emotion': dream.emotion,
-                    'emotion_confidence': dream.emotion_confidence,
-                    'emotion_emoji': dream.emotion_emoji,
-                    'emotion_color': dream.emotion_color,
-                    'user': {
-                        'id': dream.user.id,
-                        'username': dream.user.username,
-                        'email': dream.user.email
-                    }
-                }
-                dreams_data.append(dream_data)
-            
-            # Ajouter quelques stats
-            stats = {
-                'total_dreams': dreams.count(),
-                'public_dreams': dreams.filter(privacy='public').count(),
-                'private_dreams': dreams.filter(privacy='private').count(),
-                'friends_only_dreams': dreams.filter(privacy='friends_only').count(),
-            }
+            # Vignettes par défaut en mode compact
+            default_size = 'small' if request.GET.get('view') == 'compact' else None
+            image_size = resolve_image_size(request.GET.get('size', default_size))  # 'small', 'medium' ou original
+            
+            # Récupérer les rêves de l'utilisateur, triés par date (plus récent en premier)
+            dreams = Dream.objects.filter(user=request.user)
+            columns = {'dream_id', 'created_at'}.union(*(DREAM_LIST_FIELDS[f] for f in fields))
+            listed = dreams.only(*columns).order_by('-date')
+            
+            # Pagination par curseur (opt-in) : une page à la fois, sans stats
+            if wants_cursor(request):
+                per_page = int(request.GET.get('per_page', 10))
+                page_dreams, next_cursor = paginate_by_cursor(listed, request.GET.get('cursor'), per_page)
+                return Response({
+                    'dreams': [_serialize_list_dream(dream, request, fields, image_size) for dream in page_dreams],
+                    'pagination': cursor_pagination_data(next_cursor, per_page)
+                })
+            
+            # Répartition par privacy en un seul agrégat
+            stats = dreams.aggregate(
+                total_dreams=Count('pk'),
+                public_dreams=Count('pk', filter=Q(privacy='public')),
+                private_dreams=Count('pk', filter=Q(privacy='private')),
+                friends_only_dreams=Count('pk', filter=Q(privacy='friends_only')),
+            )
+            
+            # ?stream=1 : liste émise au fil de la lecture (mémoire bornée)
+            if wants_stream(request):
+                return streaming_json_response(
+                    listed, lambda dream: _serialize_list_dream(dream, request, fields, image_size),
+                    key='dreams', extra={'stats': stats}
+                )
+            
+            # iterator() : pas de cache du queryset, lecture par blocs
+            dreams_data = [
+                _serialize_list_dream(dream, request, fields, image_size)
+                for dream in listed.iterator(chunk_size=500)
+            ]
             
             return Response({
                 'dreams': dreams_data,
                 'stats': stats
             })
             
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=400)
         except Exception as e:
             print(f"Erreur dans DreamListAPIView: {str(e)}")
             return Response({
@@ -237,6 +416,132 @@ class DreamListAPIView(APIView):
             }, status=500)
 
 
+def _with_social_counts(queryset, user=None):
+    """
+    Annote likes_count, comments_count et user_liked via des sous-requêtes
+    corrélées : une seule requête SQL pour toute la page du feed.
+    Sans `user` (partie partagée du cache), user_liked n'est pas annoté.
+    """
+    from social.models import DreamLike, DreamComment
+    
+    likes = DreamLike.objects.filter(dream=OuterRef('pk')).order_by().values('dream').annotate(total=Count('pk')).values('total')
+    comments = DreamComment.objects.filter(dream=OuterRef('pk')).order_by().values('dream').annotate(total=Count('pk')).values('total')
+    
+    queryset = queryset.annotate(
+        likes_count=Coalesce(Subquery(likes, output_field=IntegerField()), 0),
+        comments_count=Coalesce(Subquery(comments, output_field=IntegerField()), 0),
+    )
+    if user is None:
+        return queryset
+    return queryset.annotate(user_liked=Exists(DreamLike.objects.filter(dream=OuterRef('pk'), user=user)))
+
+
+def _serialize_feed_dream(dream, request, image_size=None):
+    """Sérialise un rêve du feed (queryset annoté par _with_social_counts)"""
+    return {
+        'dream_id': dream.dream_id,
+        'transcription': dream.transcription[:200] + '...' if len(dream.transcription) > 200 else dream.transcription,
+        'reformed_prompt': dream.reformed_prompt,
+        'image_url': dream.get_image_url(request, image_size),
+        'date': dream.date,
+        'privacy': dream.privacy,
+        'user': {
+            'id': dream.user.id,
+            'username': dream.user.username,
+            'email': dream.user.email
+        },
+        # 🆕 DONNÉES ÉMOTIONNELLES
+        'emotion': dream.emotion,
+        'emotion_confidence': dream.emotion_confidence,
+        'emotion_emoji': dream.emotion_emoji,
+        'emotion_color': dream.emotion_color,
+        # 🆕 Nouvelles données sociales
+        'likes_count': dream.likes_count,
+        'comments_count': dream.comments_count,
+        'user_liked': getattr(dream, 'user_liked', False)
+    }
+
+
+def _cursor_feed_response(request, dreams_queryset, sort_by, per_page, image_size, **extra):
+    """Réponse d'un feed en pagination par curseur (pas de COUNT(*) ni d'OFFSET)"""
+    if sort_by != 'recent':
+        return Response({
+            "error": "La pagination par curseur n'est disponible que pour le tri 'recent'"
+        }, status=400)
+    
+    dreams, next_cursor = paginate_by_cursor(dreams_queryset, request.GET.get('cursor'), per_page)
+    return Response({
+        'dreams': [_serialize_feed_dream(dream, request, image_size) for dream in dreams],
+        'pagination': cursor_pagination_data(next_cursor, per_page),
+        **extra
+    })
+
+
+# Tri des feeds (le dream_id départage : pagination stable)
+PUBLIC_FEED_ORDERING = {
+    'recent': ('-date', '-dream_id'),
+    'popular': ('-popularity_score', '-dream_id'),  # index (privacy, -popularity_score)
+}
+
+
+def _cached_public_feed_response(request, sort_by, page, per_page, image_size):
+    """
+    Page du feed public recomposée depuis le cache partagé (dreams/feed_cache.py).
+    None si la page sort de la fenêtre indexée : requête classique.
+    """
+    if per_page < 1:
+        return None
+    
+    version = current_version()
+    public_dreams = Dream.objects.filter(privacy='public')
+    ordering = PUBLIC_FEED_ORDERING.get(sort_by, PUBLIC_FEED_ORDERING['recent'])
+    
+    index = get_or_build(
+        ('index', sort_by),
+        lambda: list(public_dreams.order_by(*ordering).values_list('dream_id', 'user_id')[:FEED_CACHE_WINDOW + 1]),
+        version
+    )
+    complete = len(index) <= FEED_CACHE_WINDOW
+    # Le feed exclut les rêves du lecteur
+    visible = [dream_id for dream_id, user_id in index[:FEED_CACHE_WINDOW] if user_id != request.user.id]
+    
+    if complete:
+        total = len(visible)
+    else:
+        total = get_or_build(('count',), public_dreams.count, version) - public_dreams.filter(user=request.user).count()
+    
+    # Même numérotation que Paginator.get_page
+    num_pages = max(1, math.ceil(total / per_page))
+    number = page if 1 <= page <= num_pages else num_pages
+    start = (number - 1) * per_page
+    if not complete and start + per_page > len(visible):
+        return None
+    page_ids = visible[start:start + per_page]
+    
+    def build(dream_ids):
+        dreams = _with_social_counts(Dream.objects.filter(dream_id__in=dream_ids).select_related('user'))
+        return {dream.dream_id: _serialize_feed_dream(dream, request, image_size) for dream in dreams}
+    
+    # Le rendu dépend de l'hôte (URLs absolues des images)
+    payloads = get_or_build_many(('dream', image_size, request.build_absolute_uri('/')), page_ids, build, version)
+    liked = liked_dream_ids(request.user, page_ids)
+    
+    return Response({
+        'dreams': [
+            {**payloads[dream_id], 'user_liked': dream_id in liked}
+            for dream_id in page_ids if dream_id in payloads
+        ],
+        'pagination': {
+            'current_page': page,
+            'total_pages': num_pages,
+            'total_items': total,
+            'has_next': number < num_pages,
+            'has_previous': number > 1,
+            'per_page': per_page
+        }
+    })
+
+
 class PublicDreamsFeedAPIView(APIView):
     """
     API pour récupérer les rêves publics de tous les utilisateurs (feed principal)
@@ -246,32 +551,37 @@ class PublicDreamsFeedAPIView(APIView):
     def get(self, request):
         try:
             from django.core.paginator import Paginator
-            from django.db.models import Q
             
             # Paramètres de pagination
             page = int(request.GET.get('page', 1))
             per_page = int(request.GET.get('per_page', 10))
+            image_size = resolve_image_size(request.GET.get('size'))  # 'small', 'medium' ou original
             
             # Récupérer tous les rêves publics, triés par date (plus récent en premier)
             # Exclure les rêves de l'utilisateur actuel pour éviter de voir ses propres rêves
             sort_by = request.GET.get('sort', 'recent')  # 'recent' ou 'popular'
             
+            # Pages partagées entre lecteurs (cache), user_liked superposé
+            if not wants_cursor(request) and feed_cache_enabled():
+                response = _cached_public_feed_response(request, sort_by, page, per_page, image_size)
+                if response is not None:
+                    return response
+            
             dreams_queryset = Dream.objects.filter(
                 privacy='public'
             ).exclude(
                 user=request.user
-            ).select_related('user').prefetch_related('likes', 'comments')
+            ).select_related('user')
             
-            # Tri selon le paramètre
-            if sort_by == 'popular':
-                # Trier par nombre de likes (plus populaire en premier)
-                from django.db.models import Count
-                dreams = dreams_queryset.annotate(
-                    likes_count=Count('likes')
-                ).order_by('-likes_count', '-date')
-            else:
-                # Tri par date (par défaut)
-                dreams = dreams_queryset.order_by('-date')
+            # Compteurs sociaux calculés dans la même requête (pas de N+1)
+            dreams_queryset = _with_social_counts(dreams_queryset, request.user)
+            
+            # Pagination par curseur (opt-in : ?cursor=, vide pour la première page)
+            if wants_cursor(request):
+                return _cursor_feed_response(request, dreams_queryset, sort_by, per_page, image_size)
+            
+            # Tri selon le paramètre ('popular' : score précalculé, sinon date)
+            dreams = dreams_queryset.order_by(*PUBLIC_FEED_ORDERING.get(sort_by, PUBLIC_FEED_ORDERING['recent']))
             
             # Pagination
             paginator = Paginator(dreams, per_page)
@@ -280,34 +590,7 @@ class PublicDreamsFeedAPIView(APIView):
             # Sérialiser avec infos utilisateur + likes/commentaires
             dreams_data = []
             for dream in current_page:
-                # Compter likes et commentaires
-                likes_count = dream.likes.count()
-                comments_count = dream.comments.count()
-                user_liked = dream.likes.filter(user=request.user).exists()
-                
-                dream_data = {
-                    'dream_id': dream.dream_id,
-                    'transcription': dream.transcription[:200] + '...' if len(dream.transcription) > 200 else dream.transcription,
-                    'reformed_prompt': dream.reformed_prompt,
-                    'img_b64': dream.img_b64,
-                    'date': dream.date,
-                    'privacy': dream.privacy,
-                    'user': {
-                        'id': dream.user.id,
-                        'username': dream.user.username,
-                        'email': dream.user.email
-                    },
-                    # 🆕 DONNÉES ÉMOTIONNELLES
-                    'emotion': dream.emotion,
-                    'emotion_confidence': dream.emotion_confidence,
-                    'emotion_emoji': dream.emotion_emoji,
-                    'emotion_color': dream.emotion_color,
-                    # 🆕 Nouvelles données sociales
-                    'likes_count': likes_count,
-                    'comments_count': comments_count,
-                    'user_liked': user_liked
-                }
-                dreams_data.append(dream_data)
+                dreams_data.append(_serialize_feed_dream(dream, request, image_size))
             
             return Response({
                 'dreams': dreams_data,
@@ -321,6 +604,8 @@ class PublicDreamsFeedAPIView(APIView):
                 }
             })
             
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=400)
         except Exception as e:
             print(f"Erreur dans PublicDreamsFeedAPIView: {str(e)}")
             return Response({
@@ -337,31 +622,21 @@ class FriendsDreamsFeedAPIView(APIView):
     def get(self, request):
         try:
             from django.core.paginator import Paginator
-            from social.models import FriendRequest
+            from social.friends import get_friend_ids
             
             # Paramètres de pagination
             page = int(request.GET.get('page', 1))
             per_page = int(request.GET.get('per_page', 10))
+            image_size = resolve_image_size(request.GET.get('size'))  # 'small', 'medium' ou original
             sort_by = request.GET.get('sort', 'recent')  # 'recent' ou 'popular'
             
-            # Récupérer les IDs des amis acceptés
-            friend_requests_sent = FriendRequest.objects.filter(
-                from_user=request.user, 
-                status='accepted'
-            ).values_list('to_user', flat=True)
-            
-            friend_requests_received = FriendRequest.objects.filter(
-                to_user=request.user, 
-                status='accepted'
-            ).values_list('from_user', flat=True)
-            
-            # Combiner les listes d'amis
-            friends_ids = list(friend_requests_sent) + list(friend_requests_received)
+            # IDs des amis acceptés (adjacence Friendship)
+            friends_ids = get_friend_ids(request.user)
             
             if not friends_ids:
                 return Response({
                     'dreams': [],
-                    'pagination': {
+                    'pagination': cursor_pagination_data(None, per_page) if wants_cursor(request) else {
                         'current_page': 1,
                         'total_pages': 0,
                         'total_items': 0,
@@ -372,22 +647,27 @@ class FriendsDreamsFeedAPIView(APIView):
                     'message': 'Aucun ami trouvé. Ajoutez des amis pour voir leurs rêves !'
                 })
             
-            # Récupérer les rêves des amis (public + friends_only)
+            # Rêves des amis (public + friends_only) lus depuis la timeline matérialisée
             dreams_queryset = Dream.objects.filter(
-                user__id__in=friends_ids,
+                timeline_entries__owner=request.user,
                 privacy__in=['public', 'friends_only']
-            ).select_related('user').prefetch_related('likes', 'comments')
+            ).select_related('user')
+            
+            # Compteurs sociaux calculés dans la même requête (pas de N+1)
+            dreams_queryset = _with_social_counts(dreams_queryset, request.user)
+            
+            # Pagination par curseur (opt-in : ?cursor=, vide pour la première page)
+            if wants_cursor(request):
+                return _cursor_feed_response(request, dreams_queryset, sort_by, per_page, image_size,
+                                             friends_count=len(friends_ids))
             
             # Tri selon le paramètre
             if sort_by == 'popular':
-                # Trier par nombre de likes (plus populaire en premier)
-                from django.db.models import Count
-                dreams = dreams_queryset.annotate(
-                    likes_count=Count('likes')
-                ).order_by('-likes_count', '-date')
+                # Trier par score de popularité précalculé (index privacy, -popularity_score)
+                dreams = dreams_queryset.order_by('-popularity_score', '-dream_id')
             else:
-                # Tri par date (par défaut)
-                dreams = dreams_queryset.order_by('-date')
+                # Tri par date (par défaut) : parcours de l'index (owner, -created_at) de la timeline
+                dreams = dreams_queryset.order_by('-timeline_entries__created_at', '-dream_id')
             
             # Pagination
             paginator = Paginator(dreams, per_page)
@@ -396,34 +676,7 @@ class FriendsDreamsFeedAPIView(APIView):
             # Sérialiser avec infos utilisateur + likes/commentaires
             dreams_data = []
             for dream in current_page:
-                # Compter likes et commentaires
-                likes_count = dream.likes.count()
-                comments_count = dream.comments.count()
-                user_liked = dream.likes.filter(user=request.user).exists()
-                
-                dream_data = {
-                    'dream_id': dream.dream_id,
-                    'transcription': dream.transcription[:200] + '...' if len(dream.transcription) > 200 else dream.transcription,
-                    'reformed_prompt': dream.reformed_prompt,
-                    'img_b64': dream.img_b64,
-                    'date': dream.date,
-                    'privacy': dream.privacy,
-                    'user': {
-                        'id': dream.user.id,
-                        'username': dream.user.username,
-                        'email': dream.user.email
-                    },
-                    # 🆕 DONNÉES ÉMOTIONNELLES
-                    'emotion': dream.emotion,
-                    'emotion_confidence': dream.emotion_confidence,
-                    'emotion_emoji': dream.emotion_emoji,
-                    'emotion_color': dream.emotion_color,
-                    # 🆕 Nouvelles données sociales
-                    'likes_count': likes_count,
-                    'comments_count': comments_count,
-                    'user_liked': user_liked
-                }
-                dreams_data.append(dream_data)
+                dreams_data.append(_serialize_feed_dream(dream, request, image_size))
             
             return Response({
                 'dreams': dreams_data,
@@ -438,6 +691,8 @@ class FriendsDreamsFeedAPIView(APIView):
                 'friends_count': len(friends_ids)
             })
             
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=400)
         except Exception as e:
             print(f"Erreur dans FriendsDreamsFeedAPIView: {str(e)}")
             return Response({
@@ -449,6 +704,30 @@ def home_page(request):
     return HttpResponse("Dream App is up")
 
 
+# Les blobs sont immuables (adressés par contenu) : cache d'un an côté client
+IMAGE_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+@require_safe
+@condition(etag_func=lambda request, key: etag_for_key(key) if is_valid_key(key) else None)
+def dream_image(request, key):
+    """
+    Sert une image de rêve depuis le stockage adressé par contenu.
+    Pas d'authentification : la clé (SHA-256) n'est pas devinable et
+    une balise <img> ne peut pas envoyer de header Authorization.
+    """
+    store = get_blob_store()
+    if not store.exists(key):
+        raise Http404("Image introuvable")
+    
+    response = FileResponse(store.open(key), content_type=content_type_for_key(key))
+    patch_cache_control(response, public=True, max_age=IMAGE_CACHE_MAX_AGE, immutable=True)
+    # Les SVG peuvent contenir du script : on interdit toute exécution
+    response['Content-Security-Policy'] = "default-src 'none'; style-src 'unsafe-inline'"
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
+
+
 class DreamUpdatePrivacyAPIView(APIView):
     """
     API pour modifier la privacy d'un rêve
@@ -493,6 +772,8 @@ class DreamUpdatePrivacyAPIView(APIView):
 class DreamExportAPIView(APIView):
     """
     API pour exporter un rêve en HTML
+    
+    ?type=html (défaut), print (HTML prêt pour impression / PDF) ou md
     """
     permission_classes = [IsAuthenticated]
     
@@ -501,9 +782,11 @@ class DreamExportAPIView(APIView):
             # Vérifier que le rêve existe et appartient à l'utilisateur
             dream = Dream.objects.get(dream_id=dream_id, user=request.user)
             
-            # Exporter le rêve en HTML
-            return export_dream_as_html(dream, request.user)
+            # Exporter le rêve avec le renderer demandé
+            return export_dream_file(dream, request.GET.get('type', 'html'))
             
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
         except Dream.DoesNotExist:
             return Response({
                 "error": "Rêve introuvable ou vous n'en êtes pas le propriétaire"
@@ -512,4 +795,32 @@ class DreamExportAPIView(APIView):
             print(f"Erreur dans DreamExportAPIView: {str(e)}")
             return Response({
                 "error": f"Erreur lors de l'export: {str(e)}"
-            }, status=500)
\ No newline at end of file
+            }, status=500)
+
+
+class DreamJournalExportAPIView(APIView):
+    """
+    API pour exporter tout le journal de l'utilisateur (ou une période), en flux
+    
+    ?type=zip|json|csv|md (zip par défaut), ?start=AAAA-MM-JJ, ?end=AAAA-MM-JJ
+    (`type` et non `format`, réservé par DRF à la négociation de contenu)
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            fmt = request.GET.get('type', 'zip')
+            _, content_type, _ = get_exporter(fmt)
+            start, end = parse_export_range(request.GET.get('start'), request.GET.get('end'))
+            
+            response = StreamingHttpResponse(export_journal(request.user, fmt, start, end), content_type=content_type)
+            response['Content-Disposition'] = f'attachment; filename="{export_filename(request.user, fmt)}"'
+            return response
+            
+        except InvalidExportRequest as e:
+            return Response({"error": str(e)}, status=400)
+        except Exception as e:
+            print(f"Erreur dans DreamJournalExportAPIView: {str(e)}")
+            return Response({
+                "error": f"Erreur lors de l'export: {str(e)}"
+            }, status=500)
@@ -0,0 +1,33 @@
+# backend/social/friends.py
+"""
+Lecture du graphe d'amis (table d'adjacence Friendship).
+
+Chaque amitié acceptée est matérialisée dans les deux sens : la liste des
+amis d'un utilisateur est un simple filtre sur `user_id`, et un test
+d'amitié une recherche sur la clé unique (user, friend). Une requête
+indexée par appel, sans jointure sur FriendRequest.
+
+Volontairement sans cache : ces lectures servent aux contrôles d'accès
+(rêves `friends_only`, messagerie). Un cache local au process ne serait
+invalidé que dans le worker ayant traité le changement d'amitié, et les
+autres continueraient d'autoriser un ancien ami jusqu'à l'expiration.
+"""
+from typing import FrozenSet
+
+
+def get_friend_ids(user) -> FrozenSet[int]:
+    """IDs des amis acceptés de `user` (ensemble vide pour un anonyme)"""
+    if user is None or not getattr(user, 'pk', None):
+        return frozenset()
+    
+    from .models import Friendship
+    return frozenset(Friendship.objects.filter(user_id=user.pk).values_list('friend_id', flat=True))
+
+
+def are_friends(a, b) -> bool:
+    """Les deux utilisateurs sont-ils amis ?"""
+    if a is None or b is None or not getattr(a, 'pk', None) or not getattr(b, 'pk', None):
+        return False
+    
+    from .models import Friendship
+    return Friendship.objects.filter(user_id=a.pk, friend_id=b.pk).exists()
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.11 on 2026-10-17 18:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_friendships(apps, schema_editor):
+    """Construit l'adjacence à partir des demandes déjà acceptées"""
+    FriendRequest = apps.get_model('social', 'FriendRequest')
+    Friendship = apps.get_model('social', 'Friendship')
+    
+    rows = []
+    for from_id, to_id in FriendRequest.objects.filter(status='accepted').values_list('from_user_id', 'to_user_id'):
+        rows.append(Friendship(user_id=from_id, friend_id=to_id))
+        rows.append(Friendship(user_id=to_id, friend_id=from_id))
+    Friendship.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social', '0004_dreamcomment_dreamlike'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Friendship',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('friend', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='friendships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'friend')},
+            },
+        ),
+        migrations.RunPython(populate_friendships, migrations.RunPython.noop),
+    ]
@@ -19,6 +19,21 @@ class FriendRequest(models.Model):
     def __str__(self):
         return f"{self.from_user} → {self.to_user} ({self.status})"
 
+class Friendship(models.Model):
+    """
+    Adjacence du graphe d'amis : deux lignes (a→b et b→a) par amitié acceptée.
+    Dérivée de FriendRequest (social/signals.py), ne pas modifier à la main.
+    """
+    user = models.ForeignKey(User, related_name='friendships', on_delete=models.CASCADE)
+    friend = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'friend')
+
+    def __str__(self):
+        return f"{self.user} ↔ {self.friend}"
+
 class Message(models.Model):
     MESSAGE_TYPES = [
         ('text', 'Texte'),
@@ -0,0 +1,94 @@
+"""
+Maintien incrémental des compteurs dénormalisés de Dream
+(likes_count_cache, comments_count_cache).
+
+Mises à jour atomiques via F() : pas de recomptage ni de course
+lecture/écriture entre requêtes concurrentes. Les dérives éventuelles
+(suppressions en masse, données historiques) sont réparées par
+`manage.py reconcile_dream_counters`.
+
+Chaque événement recalcule aussi le score de popularité du rêve
+(dreams/ranking.py) et invalide le cache du feed public
+(dreams/feed_cache.py).
+
+La table d'adjacence Friendship suit de la même manière les demandes
+d'ami acceptées ou supprimées, puis met à jour les timelines amis
+(dreams/timeline.py).
+"""
+from django.db.models import F, Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import DreamLike, DreamComment, FriendRequest, Friendship
+
+
+def _increment(dream_id, field):
+    from dreams.models import Dream
+    from dreams.feed_cache import invalidate_public_feed
+    from dreams.ranking import refresh_popularity
+    Dream.objects.filter(dream_id=dream_id).update(**{field: F(field) + 1})
+    refresh_popularity(dream_id)
+    invalidate_public_feed()
+
+
+def _decrement(dream_id, field):
+    from dreams.models import Dream
+    from dreams.feed_cache import invalidate_public_feed
+    from dreams.ranking import refresh_popularity
+    # Jamais en dessous de 0 (champ PositiveIntegerField)
+    Dream.objects.filter(dream_id=dream_id, **{f'{field}__gt': 0}).update(**{field: F(field) - 1})
+    refresh_popularity(dream_id)
+    invalidate_public_feed()
+
+
+@receiver(post_save, sender=DreamLike)
+def dream_like_added(sender, instance, created, **kwargs):
+    if created:
+        _increment(instance.dream_id, 'likes_count_cache')
+
+
+@receiver(post_delete, sender=DreamLike)
+def dream_like_removed(sender, instance, **kwargs):
+    _decrement(instance.dream_id, 'likes_count_cache')
+
+
+@receiver(post_save, sender=DreamComment)
+def dream_comment_added(sender, instance, created, **kwargs):
+    if created:
+        _increment(instance.dream_id, 'comments_count_cache')
+
+
+@receiver(post_delete, sender=DreamComment)
+def dream_comment_removed(sender, instance, **kwargs):
+    _decrement(instance.dream_id, 'comments_count_cache')
+
+
+def _sync_friendship(a_id, b_id):
+    """Aligne l'adjacence a↔b sur l'existence d'une demande acceptée"""
+    accepted = FriendRequest.objects.filter(
+        Q(from_user_id=a_id, to_user_id=b_id) | Q(from_user_id=b_id, to_user_id=a_id),
+        status='accepted'
+    ).exists()
+    
+    if accepted:
+        Friendship.objects.bulk_create([
+            Friendship(user_id=a_id, friend_id=b_id),
+            Friendship(user_id=b_id, friend_id=a_id),
+        ], ignore_conflicts=True)
+    else:
+        Friendship.objects.filter(
+            Q(user_id=a_id, friend_id=b_id) | Q(user_id=b_id, friend_id=a_id)
+        ).delete()
+    
+    from dreams.timeline import sync_friendship_timelines
+    sync_friendship_timelines(a_id, b_id, accepted)
+
+
+@receiver(post_save, sender=FriendRequest)
+def friend_request_saved(sender, instance, **kwargs):
+    _sync_friendship(instance.from_user_id, instance.to_user_id)
+
+
+@receiver(post_delete, sender=FriendRequest)
+def friend_request_deleted(sender, instance, **kwargs):
+    _sync_friendship(instance.from_user_id, instance.to_user_id)
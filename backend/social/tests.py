@@ -1,8 +1,12 @@
+import json
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
-from social.models import FriendRequest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from social.models import FriendRequest, Friendship
+from social.friends import are_friends, get_friend_ids
 
 User = get_user_model()
 
@@ -259,6 +263,21 @@ class MessageTestCase(TestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['text'], 'Hello Bob!')
 
+    def test_get_messages_streaming(self):
+        """Test récupération des messages en streaming (?stream=1)"""
+        self.client.force_authenticate(user=self.alice)
+        for i in range(3):
+            self.client.post(f'/api/social/messages/send/{self.bob.username}/', {
+                'text': f'Message {i}',
+                'message_type': 'text'
+            })
+        
+        response = self.client.get(f'/api/social/messages/{self.bob.username}/', {'stream': '1'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([m['text'] for m in data], ['Message 0', 'Message 1', 'Message 2'])
+
     def test_cannot_message_non_friend(self):
         """Test impossible d'envoyer un message à un non-ami"""
         charlie = User.objects.create_user(
@@ -274,3 +293,55 @@ class MessageTestCase(TestCase):
         })
         
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class FriendGraphTestCase(TestCase):
+    def setUp(self):
+        """Setup des utilisateurs de test"""
+        self.alice = User.objects.create_user(
+            username='alice',
+            email='alice@test.com',
+            password='Password123!'
+        )
+        self.bob = User.objects.create_user(
+            username='bob',
+            email='bob@test.com',
+            password='Password123!'
+        )
+        self.client = APIClient()
+
+    def test_accept_creates_symmetric_adjacency(self):
+        """Test de l'adjacence créée dans les deux sens à l'acceptation"""
+        fr = FriendRequest.objects.create(from_user=self.alice, to_user=self.bob, status='pending')
+        self.assertFalse(Friendship.objects.exists())
+
+        self.client.force_authenticate(user=self.bob)
+        self.client.post(f'/api/social/respond/{fr.id}/accept/')
+
+        self.assertTrue(Friendship.objects.filter(user=self.alice, friend=self.bob).exists())
+        self.assertTrue(Friendship.objects.filter(user=self.bob, friend=self.alice).exists())
+        self.assertTrue(are_friends(self.alice, self.bob))
+        self.assertTrue(are_friends(self.bob, self.alice))
+
+    def test_remove_friend_invalidates_cache(self):
+        """Test de l'invalidation après suppression d'un ami"""
+        FriendRequest.objects.create(from_user=self.alice, to_user=self.bob, status='accepted')
+        self.assertEqual(get_friend_ids(self.alice), {self.bob.id})
+
+        self.client.force_authenticate(user=self.alice)
+        self.client.post(f'/api/social/remove-friend/{self.bob.username}/')
+
+        self.assertFalse(Friendship.objects.exists())
+        self.assertEqual(get_friend_ids(self.alice), frozenset())
+
+    def test_friend_check_single_query(self):
+        """Test qu'un test d'amitié est une seule requête, sans cache entre deux requêtes HTTP"""
+        FriendRequest.objects.create(from_user=self.alice, to_user=self.bob, status='accepted')
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(are_friends(self.alice, self.bob))
+        self.assertEqual(len(ctx), 1)
+
+        # Suppression faite ailleurs (autre worker) : visible immédiatement
+        Friendship.objects.all().delete()
+        self.assertFalse(are_friends(self.alice, self.bob))
@@ -6,6 +6,8 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from .models import FriendRequest, Message, DreamLike, DreamComment
+from .friends import are_friends, get_friend_ids
+from dreams.streaming import wants_stream, streaming_json_response
 
 User = get_user_model()
 
@@ -15,7 +17,7 @@ User = get_user_model()
 def _serialize_user(u):
     return {"id": u.id, "username": u.username, "email": u.email}
 
-def _serialize_message(m):
+def _serialize_message(m, request=None):
     # Gestion des anciens messages qui n'ont pas message_type
     message_type = getattr(m, 'message_type', 'text')
     
@@ -36,7 +38,7 @@ def _serialize_message(m):
             "dream_id": m.dream.dream_id,
             "transcription": m.dream.transcription[:150] + '...' if len(m.dream.transcription) > 150 else m.dream.transcription,
             "reformed_prompt": m.dream.reformed_prompt,
-            "img_b64": m.dream.img_b64,
+            "image_url": m.dream.get_image_url(request),
             "date": m.dream.date.isoformat() if m.dream.date else None,
             "privacy": m.dream.privacy,
         }
@@ -47,11 +49,8 @@ def _serialize_message(m):
 # Blocs métier "génériques" (utilisés par plusieurs routes)
 # ----------------------
 def _are_friends(a: User, b: User) -> bool:
-    return FriendRequest.objects.filter(
-        status="accepted"
-    ).filter(
-        (Q(from_user=a, to_user=b)) | (Q(from_user=b, to_user=a))
-    ).exists()
+    # Recherche indexée dans l'adjacence Friendship (social/friends.py)
+    return are_friends(a, b)
 
 # ----------------------
 # Vues exigées par ton urls.py
@@ -126,9 +125,7 @@ def get_friends(request):
     Liste des amis (status=accepted dans un sens OU l'autre).
     """
     me = request.user
-    accepted = FriendRequest.objects.filter(status="accepted").filter(Q(from_user=me) | Q(to_user=me))
-    friend_ids = set(fr.to_user_id if fr.from_user_id == me.id else fr.from_user_id for fr in accepted)
-    friends = User.objects.filter(id__in=friend_ids)
+    friends = User.objects.filter(id__in=get_friend_ids(me))
     return Response([_serialize_user(u) for u in friends], status=status.HTTP_200_OK)
 
 
@@ -229,7 +226,11 @@ def get_messages(request, username: str):
         (Q(sender=me, receiver=other)) | (Q(sender=other, receiver=me))
     ).select_related('sender', 'receiver', 'dream').order_by("timestamp", "id")
     
-    return Response([_serialize_message(m) for m in qs], status=status.HTTP_200_OK)
+    # ?stream=1 : fil émis au fur et à mesure (longs historiques)
+    if wants_stream(request):
+        return streaming_json_response(qs, lambda m: _serialize_message(m, request))
+    
+    return Response([_serialize_message(m, request) for m in qs], status=status.HTTP_200_OK)
 
 
 @api_view(["POST"])
@@ -258,7 +259,7 @@ def send_message(request, username: str):
         return Response({"detail": "Vous n'êtes pas amis."}, status=status.HTTP_403_FORBIDDEN)
 
     msg = Message.objects.create(sender=me, receiver=other, content=text, message_type=message_type)
-    return Response(_serialize_message(msg), status=status.HTTP_201_CREATED)
+    return Response(_serialize_message(msg, request), status=status.HTTP_201_CREATED)
 
 
 @api_view(["POST"])
@@ -306,7 +307,7 @@ def share_dream(request, username: str):
         dream=dream
     )
     
-    return Response(_serialize_message(msg), status=status.HTTP_201_CREATED)
+    return Response(_serialize_message(msg, request), status=status.HTTP_201_CREATED)
 
 
 # 🆕 NOUVELLES VUES POUR LIKES ET COMMENTAIRES
@@ -340,12 +341,13 @@ def toggle_dream_like(request, dream_id: int):
         # Like ajouté
         action = "liked"
     else:
-        # Like supprimé
-        like.delete()
+        # Like supprimé (via queryset : pas de double décrément si un toggle concurrent l'a déjà retiré)
+        DreamLike.objects.filter(pk=like.pk).delete()
         action = "unliked"
     
-    # Compter les likes totaux
-    total_likes = DreamLike.objects.filter(dream=dream).count()
+    # Compteur maintenu incrémentalement (social/signals.py)
+    dream.refresh_from_db(fields=['likes_count_cache'])
+    total_likes = dream.likes_count_cache
     
     return Response({
         "action": action,
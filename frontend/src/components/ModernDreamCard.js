@@ -211,7 +211,7 @@ const ModernDreamCard = ({ dream, showAuthor = true, currentUser = null, onDream
         )}
 
         {/* Image du rêve */}
-        {dream.img_b64 && (
+        {(dream.image_url || dream.img_b64) && (
           <div className="dream-image-container">
             {!imageLoaded && (
               <div className="dream-image-loading">
@@ -219,7 +219,7 @@ const ModernDreamCard = ({ dream, showAuthor = true, currentUser = null, onDream
               </div>
             )}
             <img
-              src={dream.img_b64}
+              src={dream.image_url || dream.img_b64}
               alt="Rêve visualisé"
               className={`dream-image ${imageLoaded ? 'loaded' : 'loading'}`}
               onLoad={() => setImageLoaded(true)}
@@ -236,10 +236,10 @@ export default function Profile() {
               className="profile-dream-card"
             >
               {/* Image du rêve */}
-              {dream.img_b64 && (
+              {(dream.image_url || dream.img_b64) && (
                 <div className="profile-dream-image">
                   <img 
-                    src={dream.img_b64} 
+                    src={dream.image_url || dream.img_b64} 
                     alt="Image du rêve"
                     className="profile-dream-img"
                   />
@@ -92,9 +92,9 @@ const QuickShareModal = ({ show, onClose, dream, onDreamShared }) => {
           {dream && (
             <div className="dream-preview">
               <div className="dream-preview-header">
-                {dream.img_b64 && (
+                {(dream.image_url || dream.img_b64) && (
                   <img 
-                    src={dream.img_b64} 
+                    src={dream.image_url || dream.img_b64} 
                     alt="Rêve" 
                     className="dream-preview-image"
                   />
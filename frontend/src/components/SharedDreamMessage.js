@@ -46,10 +46,10 @@ const SharedDreamMessage = ({ dream, senderUsername, timestamp, isOwnMessage = f
         {/* Contenu du rêve */}
         <div className={`shared-dream-content ${isOwnMessage ? 'own' : 'other'}`}>
           {/* Image du rêve */}
-          {dream.img_b64 && (
+          {(dream.image_url || dream.img_b64) && (
             <div className="shared-dream-image">
               <img 
-                src={dream.img_b64} 
+                src={dream.image_url || dream.img_b64} 
                 alt="Rêve partagé" 
                 className="shared-dream-img"
               />
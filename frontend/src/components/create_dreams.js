@@ -2,6 +2,10 @@ import React, { useRef, useState } from "react";
 import "../styles/CreateDreams.css";
 
 const API_BASE = process.env.REACT_APP_API_BASE || "http://127.0.0.1:8000";
+// Génération asynchrone (file d'attente + worker run_dream_worker) : désactivée par défaut
+const ASYNC_GENERATION = process.env.REACT_APP_ASYNC_GENERATION === "true";
+const JOB_POLL_MS = 1500;
+const JOB_TIMEOUT_MS = 5 * 60 * 1000;
 
 function getAuthHeader() {
   const token = localStorage.getItem("token") || localStorage.getItem("authToken");
@@ -25,14 +29,48 @@ export default function CreateDreams() {
 
   // Enregistrement micro
   const mediaRecorderRef = useRef(null);
+  const streamRef = useRef(null);
   const chunksRef = useRef([]);
   const [recording, setRecording] = useState(false);
 
+  // Envoi par segments pendant la dictée (transcription côté serveur au fil de l'eau)
+  const SEGMENT_MS = 15000;
+  const uploadRef = useRef(null);
+  const segmentTimerRef = useRef(null);
+  // Enregistrement complet en parallèle : renvoyé en une fois si l'envoi par segments échoue
+  const wholeRecordingRef = useRef(null);
+
+  const STAGE_LABELS = {
+    transcription: "🎙️ Transcription...",
+    rephrase: "✍️ Reformulation...",
+    emotion: "😊 Analyse émotionnelle...",
+    image: "🎨 Génération de l'image...",
+  };
+
+  // Polling du statut de la tâche asynchrone jusqu'à la fin (abandon après JOB_TIMEOUT_MS)
+  const waitForJob = async (statusUrl) => {
+    const maxAttempts = Math.ceil(JOB_TIMEOUT_MS / JOB_POLL_MS);
+    for (let attempt = 0; attempt < maxAttempts; attempt++) {
+      await new Promise((resolve) => setTimeout(resolve, JOB_POLL_MS));
+      const res = await fetch(statusUrl, { headers: { ...getAuthHeader() } });
+      if (!res.ok) {
+        const txt = await res.text().catch(() => "");
+        throw new Error(`Erreur ${res.status} : ${txt}`);
+      }
+      const job = await res.json();
+      if (job.status === "done") return job.result;
+      if (job.status === "failed") throw new Error(job.error || "Génération échouée");
+      setStatus(STAGE_LABELS[job.stage] || "⏳ En file d'attente...");
+    }
+    throw new Error("Génération trop longue : aucun worker n'a terminé la tâche, réessayez plus tard");
+  };
+
   const generateDream = async (audioBlobOrFile) => {
     const form = new FormData();
     form.append("audio", audioBlobOrFile, audioBlobOrFile.name || "recording.webm");
 
-    const res = await fetch(`${API_BASE}/api/dreams/generate`, {
+    const url = `${API_BASE}/api/dreams/generate${ASYNC_GENERATION ? "?async=1" : ""}`;
+    const res = await fetch(url, {
       method: "POST",
       headers: {
         ...getAuthHeader(),
@@ -44,7 +82,56 @@ export default function CreateDreams() {
       const txt = await res.text().catch(() => "");
       throw new Error(`Erreur ${res.status} : ${txt}`);
     }
-    return res.json().catch(() => ({}));
+    const data = await res.json().catch(() => ({}));
+    // Le serveur décide : 202 = tâche en file, sinon résultat direct
+    return res.status === 202 && data.status_url ? waitForJob(data.status_url) : data;
+  };
+
+  // Ouvre un envoi par segments ; null si indisponible (envoi classique à la fin)
+  const openUpload = async () => {
+    try {
+      const res = await fetch(`${API_BASE}/api/dreams/generate/uploads`, {
+        method: "POST",
+        headers: { ...getAuthHeader() },
+      });
+      if (!res.ok) return null;
+      const data = await res.json();
+      return { ...data, count: 0, sends: [] };
+    } catch (err) {
+      console.warn("Envoi par segments indisponible:", err);
+      return null;
+    }
+  };
+
+  const sendSegment = async (upload, index, blob) => {
+    const form = new FormData();
+    form.append("audio", blob, `segment_${index}.webm`);
+    const res = await fetch(upload.segment_url.replace("{index}", index), {
+      method: "PUT",
+      headers: { ...getAuthHeader() },
+      body: form,
+    });
+    if (!res.ok) {
+      const txt = await res.text().catch(() => "");
+      throw new Error(`Erreur segment ${res.status} : ${txt}`);
+    }
+  };
+
+  const finishUpload = async (upload) => {
+    await Promise.all(upload.sends);
+    const res = await fetch(upload.finish_url, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        ...getAuthHeader(),
+      },
+      body: JSON.stringify({ segment_count: upload.count }),
+    });
+    if (!res.ok) {
+      const txt = await res.text().catch(() => "");
+      throw new Error(`Erreur ${res.status} : ${txt}`);
+    }
+    return res.json();
   };
 
   const saveDream = async () => {
@@ -88,6 +175,9 @@ export default function CreateDreams() {
     // Afficher l'image
     if (data.image && data.image.includes('data:image/')) {
       setGeneratedImage(data.image);
+    } else if (data.image_url) {
+      // Résultat d'une tâche asynchrone : image servie par URL
+      setGeneratedImage(data.image_url.startsWith("/") ? `${API_BASE}${data.image_url}` : data.image_url);
     }
     
     // Afficher la transcription
@@ -133,6 +223,42 @@ export default function CreateDreams() {
     }
   };
 
+  // Un MediaRecorder par segment : chaque segment est un fichier WebM complet, décodable seul
+  const startSegment = (stream, upload) => {
+    const mr = new MediaRecorder(stream);
+    const parts = [];
+    mr.ondataavailable = (e) => {
+      if (e.data && e.data.size > 0) parts.push(e.data);
+    };
+    mr.onstop = () => {
+      const blob = new Blob(parts, { type: "audio/webm" });
+      chunksRef.current.push(blob);
+      if (upload && blob.size > 0) {
+        const index = upload.count++;
+        const send = sendSegment(upload, index, blob);
+        send.catch(() => {}); // erreur traitée par finishUpload (repli sur l'enregistrement complet)
+        upload.sends.push(send);
+      }
+    };
+    mediaRecorderRef.current = mr;
+    mr.start();
+    return mr;
+  };
+
+  // Enregistrement continu de toute la dictée (les segments, fichiers WebM séparés, ne se concatènent pas)
+  const recordWhole = (stream) => {
+    const recorder = new MediaRecorder(stream);
+    const parts = [];
+    recorder.ondataavailable = (e) => {
+      if (e.data && e.data.size > 0) parts.push(e.data);
+    };
+    const done = new Promise((resolve) => {
+      recorder.onstop = () => resolve(new Blob(parts, { type: "audio/webm" }));
+    });
+    recorder.start();
+    return { recorder, done };
+  };
+
   const startRecording = async () => {
     setStatus("");
     if (!navigator.mediaDevices?.getUserMedia) {
@@ -144,28 +270,18 @@ export default function CreateDreams() {
     
     try {
       const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-      const mr = new MediaRecorder(stream);
+      streamRef.current = stream;
       chunksRef.current = [];
-      mr.ondataavailable = (e) => {
-        if (e.data && e.data.size > 0) chunksRef.current.push(e.data);
-      };
-      mr.onstop = async () => {
-        try {
-          const blob = new Blob(chunksRef.current, { type: "audio/webm" });
-          setLoading(true);
-          const data = await generateDream(blob);
-          setStatus("✅ Rêve généré ! Vous pouvez maintenant choisir de le sauvegarder.");
-          processGenerationResult(data);
-          
-        } catch (err) {
-          console.error(err);
-          setStatus(err.message || "Erreur lors de l'envoi de l'audio micro.");
-        } finally {
-          setLoading(false);
-        }
-      };
-      mediaRecorderRef.current = mr;
-      mr.start();
+      uploadRef.current = await openUpload();
+      wholeRecordingRef.current = uploadRef.current ? recordWhole(stream) : null;
+      startSegment(stream, uploadRef.current);
+      if (uploadRef.current) {
+        // Segment terminé → envoyé pendant que l'enregistrement continue
+        segmentTimerRef.current = setInterval(() => {
+          mediaRecorderRef.current.stop();
+          startSegment(stream, uploadRef.current);
+        }, SEGMENT_MS);
+      }
       setRecording(true);
     } catch (err) {
       console.error(err);
@@ -174,11 +290,43 @@ export default function CreateDreams() {
   };
 
   const stopRecording = () => {
-    if (mediaRecorderRef.current && recording) {
-      mediaRecorderRef.current.stop();
-      mediaRecorderRef.current.stream.getTracks().forEach((t) => t.stop());
-      setRecording(false);
-    }
+    if (!mediaRecorderRef.current || !recording) return;
+    clearInterval(segmentTimerRef.current);
+    const mr = mediaRecorderRef.current;
+    const upload = uploadRef.current;
+    const whole = wholeRecordingRef.current;
+    if (whole) whole.recorder.stop();
+
+    mr.addEventListener("stop", async () => {
+      streamRef.current.getTracks().forEach((t) => t.stop());
+      setLoading(true);
+      try {
+        let data;
+        if (upload) {
+          setStatus("🎙️ Transcription...");
+          try {
+            data = await finishUpload(upload);
+          } catch (err) {
+            // Segment ou finalisation en échec : l'enregistrement n'est pas perdu, envoi en une fois
+            console.warn("Envoi par segments échoué, envoi de l'enregistrement complet:", err);
+            data = await generateDream(await whole.done);
+          }
+        } else {
+          // Repli sans envoi par segments : un seul enregistrement, envoyé en entier
+          data = await generateDream(chunksRef.current[0]);
+        }
+        setStatus("✅ Rêve généré ! Vous pouvez maintenant choisir de le sauvegarder.");
+        processGenerationResult(data);
+        
+      } catch (err) {
+        console.error(err);
+        setStatus(err.message || "Erreur lors de l'envoi de l'audio micro.");
+      } finally {
+        setLoading(false);
+      }
+    });
+    mr.stop();
+    setRecording(false);
   };
 
   const resetResults = () => {
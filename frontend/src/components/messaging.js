@@ -394,9 +394,9 @@ export default function Messaging({ currentUser }) {
                         onClick={() => handleShareDream(dream.dream_id)}
                         className="messaging-dream-item"
                       >
-                        {dream.img_b64 && (
+                        {(dream.image_url || dream.img_b64) && (
                           <img 
-                            src={dream.img_b64} 
+                            src={dream.image_url || dream.img_b64} 
                             alt="Rêve" 
                             className="messaging-dream-image"
                           />
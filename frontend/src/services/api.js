@@ -13,6 +13,12 @@ setAuthHeader();
 
 window.addEventListener("auth-changed", setAuthHeader);
 
+/**
+ * Taille d'image à demander aux feeds selon la largeur de l'écran
+ * ('small' = 256px, 'medium' = 512px, miniatures WebP générées côté serveur)
+ */
+const getFeedImageSize = () => (window.innerWidth < 600 ? 'small' : 'medium');
+
 // 🆕 API FONCTIONS D'AUTHENTIFICATION
 
 /**
@@ -51,7 +57,7 @@ export const logoutUser = () => {
 export const getPublicFeed = async (page = 1, perPage = 10, sort = 'recent') => {
   try {
     setAuthHeader();
-    const response = await api.get(`/api/dreams/feed/public?page=${page}&per_page=${perPage}&sort=${sort}`);
+    const response = await api.get(`/api/dreams/feed/public?page=${page}&per_page=${perPage}&sort=${sort}&size=${getFeedImageSize()}`);
     return response.data;
   } catch (error) {
     console.error('Erreur getPublicFeed:', error);
@@ -68,7 +74,7 @@ export const getPublicFeed = async (page = 1, perPage = 10, sort = 'recent') =>
 export const getFriendsFeed = async (page = 1, perPage = 10, sort = 'recent') => {
   try {
     setAuthHeader();
-    const response = await api.get(`/api/dreams/feed/friends?page=${page}&per_page=${perPage}&sort=${sort}`);
+    const response = await api.get(`/api/dreams/feed/friends?page=${page}&per_page=${perPage}&sort=${sort}&size=${getFeedImageSize()}`);
     return response.data;
   } catch (error) {
     console.error('Erreur getFriendsFeed:', error);